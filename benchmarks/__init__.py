@@ -0,0 +1 @@
+"""Benchmark suite: `python -m benchmarks` (see docs/ARCHITECTURE.md)."""
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from fnmatch import fnmatch
+from pathlib import Path
+import argparse
+import sys
+
+from benchmarks.cases import build_cases
+from benchmarks.runner import compare, format_table, load_report, make_report, measure, save_report
+from benchmarks.workbooks import DEFAULT_SIZES, SIZES
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_BASELINE = HERE / "baseline.json"
+DEFAULT_FIXTURES = HERE / "fixtures"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description="Loader / engine / service benchmarks")
+    p.add_argument("-k", "--select", action="append", default=[], help="only cases matching this glob (repeatable)")
+    p.add_argument("--list", action="store_true", help="list case names and exit")
+    p.add_argument("--out", help="write the JSON report here")
+    p.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline report to compare against")
+    p.add_argument("--no-compare", action="store_true", help="skip the baseline comparison")
+    p.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown of best-of-runs time (0.25 = +25%%)")
+    p.add_argument("--memory-threshold", type=float, default=None, help="allowed growth of peak memory (default: --threshold)")
+    p.add_argument("--min-runs", type=int, default=5)
+    p.add_argument("--min-time", type=float, default=0.5, help="seconds of timed calls per case (at least)")
+    p.add_argument("--fixtures", default=str(DEFAULT_FIXTURES), help="where generated workbooks are kept")
+    p.add_argument(
+        "--sizes", default=",".join(DEFAULT_SIZES),
+        help=f"loader workbook sizes, comma-separated (of {', '.join(SIZES)}; xl is ~100 MB)",
+    )
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    sizes = tuple(s.strip() for s in args.sizes.split(",") if s.strip())
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        print(f"unknown sizes: {', '.join(unknown)} (use {', '.join(SIZES)})", file=sys.stderr)
+        return 2
+    cases = build_cases(Path(args.fixtures), sizes)
+    if args.select:
+        cases = [c for c in cases if any(fnmatch(c.name, pat) for pat in args.select)]
+    if args.list:
+        print("\n".join(f"{c.group:<10} {c.name}" for c in cases))
+        return 0
+    if not cases:
+        print("no benchmark cases selected", file=sys.stderr)
+        return 2
+
+    results = []
+    for case in cases:
+        print(f"running {case.name} ...", file=sys.stderr, flush=True)
+        results.append(measure(case, min_runs=args.min_runs, min_time=args.min_time))
+    report = make_report(results)
+
+    comparisons, regressions = [], []
+    baseline_path = Path(args.baseline)
+    if not args.no_compare and not args.save_baseline and baseline_path.exists():
+        baseline = load_report(baseline_path)
+        comparisons, regressions = compare(report, baseline, args.threshold, args.memory_threshold)
+        report["baseline"] = {
+            "path": str(baseline_path),
+            "threshold": args.threshold,
+            "memory_threshold": args.threshold if args.memory_threshold is None else args.memory_threshold,
+            "regressions": [
+                {"case": c.name, "metric": c.metric, "baseline": c.baseline, "current": c.current, "ratio": c.ratio}
+                for c in regressions
+            ],
+        }
+
+    print(format_table(results, comparisons))
+    if args.out:
+        save_report(report, Path(args.out))
+    if args.save_baseline:
+        save_report(report, baseline_path)
+        print(f"baseline written to {baseline_path}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) past the threshold:", file=sys.stderr)
+        for c in regressions:
+            print(f"  {c.name} {c.metric}: {c.baseline:.6g} -> {c.current:.6g} ({c.ratio:.2f}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.runner import Case
+from benchmarks.workbooks import DEFAULT_SIZES, fixture_workbook
+from core.batch_engine import compile_model, default_rate_maps, evaluate_batch, sizing_grid
+from core.block_layout import LayoutCache
+from core.excel_option_engine import OptionSizing, build_option_annual_table
+from core.lazy_model import LazyModel
+from core.loader import load_model_df
+from core.portfolio import ConsumerSpec, PlantSpec, build_portfolio, evaluate_portfolio
+from core.tod import add_tod_rate, add_tod_slot
+from dashboard.services.option_service import run_option, summarize_totals, sweep_solar_wind
+
+SIZING = OptionSizing(load_mw=10.0, solar_mode="SAT", solar_mw=12.0, solar_loss=0.05, wind_mw=6.0, wind_loss=0.03)
+RATES = default_rate_maps()
+
+
+def build_cases(fixtures: Path, sizes: tuple[str, ...] = DEFAULT_SIZES) -> list[Case]:
+    """Every benchmark case; workbooks are generated into `fixtures` on first use."""
+    cases: list[Case] = []
+
+    # -----------------------------
+    # Loader
+    # -----------------------------
+    for size in sizes:
+        workbook = lambda s=size: fixture_workbook(s, fixtures)
+        cases.append(Case(f"loader.load_model_df[{size}]", "loader", workbook, load_model_df))
+        # cold: no layout cache, every block parsed (first upload of an unknown template)
+        cases.append(Case(
+            f"loader.lazy_cold[{size}]", "loader", workbook,
+            lambda p: LazyModel(p, layouts=LayoutCache()).frame(),
+        ))
+
+    def _model() -> pd.DataFrame:
+        return add_tod_slot(load_model_df(fixture_workbook("small", fixtures)))
+
+    # -----------------------------
+    # Engine
+    # -----------------------------
+    def _hourly(years: int) -> pd.DataFrame:
+        return pd.DataFrame({"hour": np.tile(np.arange(24), 365 * years)})
+
+    cases.append(Case("tod.add_tod_slot[288]", "engine", _model, lambda df: add_tod_slot(df.copy()), items=288))
+    cases.append(Case(
+        "tod.add_tod_slot[87600]", "engine", lambda: _hourly(10), lambda df: add_tod_slot(df.copy()), items=87_600,
+    ))
+    cases.append(Case(
+        "engine.build_option_annual_table", "engine",
+        lambda: add_tod_rate(_model(), RATES["grid_rate_map"]),
+        lambda df: build_option_annual_table(df, SIZING),
+    ))
+
+    # -----------------------------
+    # Service
+    # -----------------------------
+    cases.append(Case("service.run_option", "service", _model, lambda df: run_option(df, SIZING, RATES)))
+    cases.append(Case(
+        "service.summarize_totals", "service",
+        lambda: run_option(_model(), SIZING, RATES), summarize_totals,
+    ))
+
+    # -----------------------------
+    # Batched sweeps (sizing tab, Compare tab, CLI)
+    # -----------------------------
+    for n in (10, 50):
+        values = np.linspace(0.0, 30.0, n)
+        cases.append(Case(
+            f"sweep.sweep_solar_wind[{n}x{n}]", "dashboard",
+            lambda: compile_model(_model()),
+            lambda c, v=values: sweep_solar_wind(c, SIZING, RATES, v, v),
+            items=n * n,
+        ))
+    cases.append(Case(
+        "sweep.evaluate_batch[10000]", "engine",
+        lambda: (compile_model(_model()), sizing_grid(SIZING, np.linspace(0, 30, 100), np.linspace(0, 30, 100))),
+        lambda a: evaluate_batch(a[0], a[1], RATES),
+        items=10_000,
+    ))
+    # same sweep with hourly carbon accounting (flat 0.71 kgCO2/kWh grid)
+    cases.append(Case(
+        "sweep.evaluate_batch_carbon[10000]", "engine",
+        lambda: (compile_model(_model(), grid_ef=0.71), sizing_grid(SIZING, np.linspace(0, 30, 100), np.linspace(0, 30, 100))),
+        lambda a: evaluate_batch(a[0], a[1], RATES),
+        items=10_000,
+    ))
+
+    # -----------------------------
+    # Portfolio (50 consumers x 10 shared plants)
+    # -----------------------------
+    def _portfolio():
+        m = compile_model(_model())
+        rng = np.random.default_rng(0)
+        consumers = [ConsumerSpec(f"c{i}", m, float(rng.uniform(1, 10)), priority=i % 5) for i in range(50)]
+        plants = [
+            PlantSpec(f"p{j}", m, "solar", 30.0, 0.03, "SAT") if j % 2 else PlantSpec(f"p{j}", m, "wind", 20.0, 0.02)
+            for j in range(10)
+        ]
+        return build_portfolio(consumers, plants)
+
+    for method in ("pro_rata", "priority"):
+        cases.append(Case(
+            f"portfolio.evaluate[{method},50x10]", "engine", _portfolio,
+            lambda pf, m=method: evaluate_portfolio(pf, m, rates=RATES),
+            items=50,
+        ))
+    return cases
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.workbooks import WorkbookSpec, write_workbook
+from core.batch_engine import SOLAR_MODES, CompiledModel, compile_model, evaluate_batch
+from core.excel_option_engine import SLOT_ORDER, OptionSizing
+from core.loader import load_model_df
+from core.response_surface import build_response_surface, effective_solar_mode
+from core.tod import add_tod_slot
+from dashboard.services.option_service import preview_option, run_option, run_options_batch
+
+RATE_SOURCES = ("solar", "wind", "bess", "grid")
+CHUNK = 50
+
+
+# -----------------------------
+# Scenarios
+# -----------------------------
+def random_scenarios(n: int, seed: int = 0) -> list[tuple[OptionSizing, dict]]:
+    """
+    n random (sizing, rates) pairs. Covers every solar mode and no solar, zero and heavy
+    oversizing, zero load, and rate plans with missing sources or slots (which count as 0).
+    """
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        load = 0.0 if rng.random() < 0.02 else float(rng.choice([rng.uniform(0.1, 2.0), rng.uniform(2.0, 50.0)]))
+        mode = [*SOLAR_MODES, None][rng.integers(0, len(SOLAR_MODES) + 1)]
+        scale = max(load, 1.0)
+        solar = 0.0 if rng.random() < 0.1 else float(rng.uniform(0.0, 6.0) * scale)
+        wind = 0.0 if rng.random() < 0.2 else float(rng.uniform(0.0, 4.0) * scale)
+        sizing = OptionSizing(
+            load_mw=round(load, 3),
+            solar_mode=mode,
+            solar_mw=round(solar, 3),
+            solar_loss=round(float(rng.uniform(0.0, 0.25)), 4),
+            wind_mw=round(wind, 3),
+            wind_loss=round(float(rng.uniform(0.0, 0.2)), 4),
+        )
+
+        rates = {}
+        for src in RATE_SOURCES:
+            if rng.random() < 0.1:
+                continue                                   # source missing -> all slots 0
+            if rng.random() < 0.3:
+                flat = round(float(rng.uniform(0.0, 12.0)), 2)
+                rates[f"{src}_rate_map"] = {s: flat for s in SLOT_ORDER}
+            else:
+                rates[f"{src}_rate_map"] = {
+                    s: round(float(rng.uniform(0.0, 12.0)), 2) for s in SLOT_ORDER if rng.random() > 0.05
+                }
+        out.append((sizing, rates))
+    return out
+
+
+# -----------------------------
+# Paths under test
+# -----------------------------
+@dataclass(frozen=True)
+class ParityPath:
+    """
+    An implementation checked against the reference (run_option on the pandas model).
+    evaluate(ctx, scenarios) returns one table per scenario (None = not applicable).
+    atol/rtol None means the path is approximate: deviations are reported, never failed.
+    rows limits the comparison to these tod_slot rows (None = the whole table).
+    """
+    name: str
+    evaluate: Callable[["_Context", list[tuple[OptionSizing, dict]]], list[pd.DataFrame | None]]
+    atol: float | None = 0.0
+    rtol: float | None = 0.0
+    rows: tuple[str, ...] | None = None
+
+
+def _batch(ctx: "_Context", scenarios) -> list[pd.DataFrame]:
+    res = evaluate_batch(ctx.compiled, [s for s, _ in scenarios], [r for _, r in scenarios], carbon=False)
+    return [res.annual_table(i) for i in range(len(scenarios))]
+
+
+def _service_batch(ctx: "_Context", scenarios) -> list[pd.DataFrame]:
+    return run_options_batch(ctx.compiled, [s for s, _ in scenarios], [r for _, r in scenarios])
+
+
+def _surface(ctx: "_Context", scenarios) -> list[pd.DataFrame | None]:
+    out = []
+    for sizing, rates in scenarios:
+        mode = effective_solar_mode(sizing)
+        surface = ctx.surfaces.get(mode)
+        if surface is None:
+            surface = ctx.surfaces[mode] = build_response_surface(ctx.compiled, mode)
+        out.append(preview_option(surface, sizing, rates))
+    return out
+
+
+PATHS = {
+    "batch": ParityPath("batch", _batch),
+    "service_batch": ParityPath("service_batch", _service_batch),
+    "surface": ParityPath("surface", _surface, atol=None, rtol=None, rows=("Total",)),
+}
+DEFAULT_PATHS = ("batch", "service_batch", "surface")
+
+
+# -----------------------------
+# Deviation stats
+# -----------------------------
+@dataclass
+class ColumnStats:
+    max_abs: float = 0.0
+    max_rel: float = 0.0
+    mismatches: int = 0
+    worst_scenario: int | None = None
+
+    def merge(self, other: "ColumnStats") -> None:
+        if other.max_abs > self.max_abs:
+            self.max_abs, self.worst_scenario = other.max_abs, other.worst_scenario
+        self.max_rel = max(self.max_rel, other.max_rel)
+        self.mismatches += other.mismatches
+
+
+@dataclass
+class PathStats:
+    evaluated: int = 0
+    skipped: int = 0
+    failed: int = 0                       # scenarios with at least one mismatch
+    errors: list[str] = field(default_factory=list)
+    columns: dict[str, ColumnStats] = field(default_factory=dict)
+
+    def merge(self, other: "PathStats") -> None:
+        self.evaluated += other.evaluated
+        self.skipped += other.skipped
+        self.failed += other.failed
+        self.errors.extend(other.errors[: max(0, 20 - len(self.errors))])
+        for col, st in other.columns.items():
+            self.columns.setdefault(col, ColumnStats()).merge(st)
+
+
+def _numeric(table: pd.DataFrame) -> pd.DataFrame:
+    t = table.set_index(table["tod_slot"].astype(str)).drop(columns=["tod_slot"])
+    return t.apply(lambda c: pd.to_numeric(c, errors="coerce")).astype(float)
+
+
+def _compare(ref: pd.DataFrame, got: pd.DataFrame, sid: int, path: ParityPath, stats: PathStats) -> None:
+    r, g = _numeric(ref), _numeric(got)
+    if path.rows is not None:
+        r = r.loc[r.index.isin(path.rows)]
+    if list(r.index) != list(g.index) or list(r.columns) != list(g.columns):
+        stats.failed += 1
+        stats.errors.append(f"scenario {sid}: rows/columns differ ({list(g.index)} / {list(g.columns)})")
+        return
+
+    bad_row = False
+    for col in r.columns:
+        a, b = r[col].to_numpy(), g[col].to_numpy()
+        nan_a, nan_b = np.isnan(a), np.isnan(b)
+        both = ~nan_a & ~nan_b
+        diff = np.abs(a[both] - b[both])
+        rel = diff / np.maximum(np.abs(a[both]), 1.0)          # no blow-up on near-zero kWh / Rs
+
+        cs = ColumnStats(
+            max_abs=float(diff.max()) if diff.size else 0.0,
+            max_rel=float(rel.max()) if rel.size else 0.0,
+        )
+        if (nan_a != nan_b).any():
+            cs.max_abs = cs.max_rel = float("inf")
+        if cs.max_abs > 0:
+            cs.worst_scenario = sid
+        if path.atol is not None:
+            tol = path.atol + path.rtol * np.abs(a[both])
+            cs.mismatches = int((diff > tol).sum() + (nan_a != nan_b).sum())
+            bad_row |= cs.mismatches > 0
+        stats.columns.setdefault(col, ColumnStats()).merge(cs)
+    stats.failed += bad_row
+
+
+# -----------------------------
+# Workers
+# -----------------------------
+class _Context:
+    def __init__(self, model_df: pd.DataFrame):
+        self.model_df = model_df
+        self.compiled: CompiledModel = compile_model(model_df)
+        self.surfaces: dict = {}
+
+
+_CTX: _Context | None = None
+
+
+def _init_worker(model_df: pd.DataFrame) -> None:
+    global _CTX
+    _CTX = _Context(model_df)
+
+
+def _run_chunk(start: int, scenarios: list[tuple[OptionSizing, dict]], path_names: tuple[str, ...]) -> dict[str, PathStats]:
+    ctx = _CTX
+    refs = [run_option(ctx.model_df, sizing, rates) for sizing, rates in scenarios]
+
+    out = {}
+    for name in path_names:
+        path = PATHS[name]
+        stats = PathStats()
+        try:
+            tables = path.evaluate(ctx, scenarios)
+        except Exception as e:
+            stats.failed += len(scenarios)
+            stats.errors.append(f"scenarios {start}..{start + len(scenarios) - 1}: {type(e).__name__}: {e}")
+            out[name] = stats
+            continue
+        for i, (ref, got) in enumerate(zip(refs, tables)):
+            if got is None:
+                stats.skipped += 1
+                continue
+            stats.evaluated += 1
+            _compare(ref, got, start + i, path, stats)
+        out[name] = stats
+    return out
+
+
+def run_parity(
+    model_df: pd.DataFrame,
+    scenarios: list[tuple[OptionSizing, dict]],
+    path_names: tuple[str, ...] = DEFAULT_PATHS,
+    workers: int | None = None,
+    chunk: int = CHUNK,
+) -> dict[str, PathStats]:
+    """Evaluate every scenario through the reference and each path; merged deviation stats per path."""
+    unknown = [p for p in path_names if p not in PATHS]
+    if unknown:
+        raise KeyError(f"Unknown parity paths {unknown}. Available: {list(PATHS)}")
+
+    model_df = add_tod_slot(model_df.copy()) if "tod_slot" not in model_df.columns else model_df
+    chunks = [(i, scenarios[i:i + chunk]) for i in range(0, len(scenarios), chunk)]
+    totals = {name: PathStats() for name in path_names}
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(model_df)
+        results = (_run_chunk(i, c, path_names) for i, c in chunks)
+        for res in results:
+            for name, st in res.items():
+                totals[name].merge(st)
+        return totals
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_df,)) as pool:
+        futures = [pool.submit(_run_chunk, i, c, path_names) for i, c in chunks]
+        for fut in futures:
+            for name, st in fut.result().items():
+                totals[name].merge(st)
+    return totals
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def report_dict(stats: dict[str, PathStats], meta: dict) -> dict:
+    return {
+        **meta,
+        "paths": {
+            name: {
+                "tolerance": None if PATHS[name].atol is None else {"atol": PATHS[name].atol, "rtol": PATHS[name].rtol},
+                "evaluated": st.evaluated,
+                "skipped": st.skipped,
+                "failed": st.failed,
+                "errors": st.errors,
+                "columns": {c: vars(cs) for c, cs in st.columns.items()},
+            }
+            for name, st in stats.items()
+        },
+    }
+
+
+def format_report(stats: dict[str, PathStats]) -> str:
+    lines = []
+    for name, st in stats.items():
+        kind = "approximate" if PATHS[name].atol is None else f"atol={PATHS[name].atol:g} rtol={PATHS[name].rtol:g}"
+        lines.append(f"[{name}] {kind}: {st.evaluated} compared, {st.skipped} skipped, {st.failed} failed")
+        lines.append(f"  {'column':<22} {'max abs':>14} {'max rel':>12} {'mismatch':>9} {'worst':>7}")
+        for col, cs in st.columns.items():
+            lines.append(
+                f"  {col:<22} {cs.max_abs:>14.6g} {cs.max_rel:>12.3g} {cs.mismatches:>9} {cs.worst_scenario!s:>7}"
+            )
+        lines.extend(f"  ! {e}" for e in st.errors)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.parity", description="Reference vs fast-path parity sweep")
+    p.add_argument("--workbook", help="model workbook (.xlsx); default: a generated synthetic workbook")
+    p.add_argument("--sheet", default="Data")
+    p.add_argument("-n", "--scenarios", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--paths", default=",".join(DEFAULT_PATHS), help=f"comma-separated, of {', '.join(PATHS)}")
+    p.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    p.add_argument("--out", help="write the JSON report here")
+    args = p.parse_args(argv)
+
+    if args.workbook:
+        workbook = Path(args.workbook)
+    else:
+        workbook = Path(__file__).resolve().parent / "fixtures" / f"parity_s{args.seed}.xlsx"
+        if not workbook.exists():
+            write_workbook(workbook, WorkbookSpec("parity", seed=args.seed))
+
+    t0 = time.perf_counter()
+    model_df = load_model_df(workbook, sheet=args.sheet)
+    scenarios = random_scenarios(args.scenarios, seed=args.seed)
+    paths = tuple(s.strip() for s in args.paths.split(",") if s.strip())
+    stats = run_parity(model_df, scenarios, paths, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+
+    print(format_report(stats))
+    print(f"\n{len(scenarios)} scenarios in {elapsed:.1f}s")
+    if args.out:
+        meta = {"workbook": str(workbook), "scenarios": len(scenarios), "seed": args.seed, "elapsed_s": elapsed}
+        Path(args.out).write_text(json.dumps(report_dict(stats, meta), indent=2, default=float) + "\n", encoding="utf-8")
+
+    return 1 if any(st.failed for st in stats.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
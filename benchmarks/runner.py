@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPORT_VERSION = 1
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+@dataclass(frozen=True)
+class Case:
+    """
+    One benchmark. setup() runs once (untimed) and returns the argument passed to fn;
+    fn(arg) is the timed call. `group` is the area it covers (loader, engine, service, dashboard).
+    """
+    name: str
+    group: str
+    setup: Callable[[], Any]
+    fn: Callable[[Any], Any]
+    items: int = 1              # units of work per call (scenarios for sweeps, rows for row ops)
+
+
+@dataclass
+class Measurement:
+    name: str
+    group: str
+    runs: int
+    min_s: float
+    median_s: float
+    mean_s: float
+    stdev_s: float
+    peak_kib: float
+    calls_per_s: float
+    items_per_s: float
+    extra: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "group": self.group,
+            "runs": self.runs,
+            "min_s": self.min_s,
+            "median_s": self.median_s,
+            "mean_s": self.mean_s,
+            "stdev_s": self.stdev_s,
+            "peak_kib": self.peak_kib,
+            "calls_per_s": self.calls_per_s,
+            "items_per_s": self.items_per_s,
+            **self.extra,
+        }
+
+
+def measure(case: Case, min_runs: int = 5, min_time: float = 0.5, max_runs: int = 1000) -> Measurement:
+    """
+    Wall time over repeated calls (one warm-up call first; at least min_runs calls and
+    min_time seconds), then one extra call under tracemalloc for peak Python memory.
+    """
+    arg = case.setup()
+    case.fn(arg)   # warm-up: imports, caches, lazy init
+
+    times: list[float] = []
+    started = time.perf_counter()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - started < min_time):
+            t0 = time.perf_counter()
+            case.fn(arg)
+            times.append(time.perf_counter() - t0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    return Measurement(
+        name=case.name,
+        group=case.group,
+        runs=len(times),
+        min_s=min(times),
+        median_s=median,
+        mean_s=statistics.fmean(times),
+        stdev_s=statistics.stdev(times) if len(times) > 1 else 0.0,
+        peak_kib=peak / 1024.0,
+        calls_per_s=1.0 / median if median > 0 else float("inf"),
+        items_per_s=case.items / median if median > 0 else float("inf"),
+    )
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "commit": _git_commit(),
+    }
+
+
+def make_report(results: list[Measurement]) -> dict:
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": {m.name: m.to_dict() for m in results},
+    }
+
+
+def load_report(path: Path) -> dict:
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark report version {report.get('version')!r}")
+    return report
+
+
+def save_report(report: dict, path: Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float("inf")
+
+
+def compare(report: dict, baseline: dict, threshold: float, memory_threshold: float | None = None) -> tuple[list[Comparison], list[Comparison]]:
+    """
+    Compare best-of-runs wall time (and peak memory) of every case present in both reports.
+    Returns (all comparisons, regressions): a regression is current > baseline * (1 + threshold).
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    rows, regressions = [], []
+    for name, cur in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric, limit in (("min_s", threshold), ("peak_kib", memory_threshold)):
+            c = Comparison(name, metric, float(base[metric]), float(cur[metric]))
+            rows.append(c)
+            if c.ratio > 1.0 + limit:
+                regressions.append(c)
+    return rows, regressions
+
+
+def format_table(results: list[Measurement], comparisons: list[Comparison]) -> str:
+    ratios = {(c.name, c.metric): c.ratio for c in comparisons}
+    lines = [f"{'case':<38} {'best':>10} {'median':>10} {'calls/s':>10} {'peak KiB':>10} {'vs base':>8} {'mem':>7}"]
+    for m in results:
+        t = ratios.get((m.name, "min_s"))
+        p = ratios.get((m.name, "peak_kib"))
+        lines.append(
+            f"{m.name:<38} {m.min_s * 1000:>8.2f}ms {m.median_s * 1000:>8.2f}ms {m.calls_per_s:>10.1f} {m.peak_kib:>10.0f}"
+            f" {'' if t is None else f'{t:.2f}x':>8} {'' if p is None else f'{p:.2f}x':>7}"
+        )
+    return "\n".join(lines)
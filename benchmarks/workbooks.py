@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from pathlib import Path
+import argparse
+import math
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from core.block_namer import map_titles_to_names
+from core.model_builder import MONTH_ORDER
+
+MONTHS = MONTH_ORDER
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# detect_time_month_headers only looks at the top of the sheet
+SCAN_ROWS = 300
+LOOKBACK_ROWS = 3
+EXCEL_MAX_ROWS = 1_048_576
+
+# Block titles the loader maps onto the engine's columns, then the other blocks real files carry
+TITLES = [
+    "Load Reference 1MW",
+    "160 FT Solar Generation Reference for 1 MWp",
+    "SAT Solar Generation Reference for 1 MWp",
+    "EW Solar Generation Reference for 1 MWp",
+    "Wind Generation Reference for 1 MW",
+    "Difference for Discharging Limits",
+    "Difference for Charging Limits",
+    "Load Requirement",
+]
+
+
+@dataclass(frozen=True)
+class WorkbookSpec:
+    """
+    Shape of a synthetic workbook: sheet `sheet` holding `blocks` Time/Jan..Dec blocks,
+    each under a title `title_gap` rows above its header (what the loader scans for) and
+    followed by `pad_rows` blank rows. The defaults (27 rows per block) fit 12 blocks in
+    the SCAN_ROWS the loader looks at.
+
+    helper_cols       numeric columns right of each block, after a second "Time" column
+    formula_noise     share of helper cells written as formulas (no cached value, like an
+                      unsaved workbook); profile cells are always plain numbers
+    tail_rows         helper-only rows after the last block (size without more blocks)
+    tail_cols         width of those rows
+    target_mb         grow tail_rows (and tail_cols past Excel's row limit) to reach this size
+    """
+    name: str = "synthetic"
+    blocks: int = 5
+    helper_cols: int = 0
+    formula_noise: float = 0.0
+    tail_rows: int = 0
+    tail_cols: int = 8
+    target_mb: float | None = None
+    title_gap: int = 1
+    pad_rows: int = 1
+    sheet: str = "Data"
+    seed: int = 0
+
+    @property
+    def block_rows(self) -> int:
+        return self.title_gap + 1 + 24 + self.pad_rows
+
+    @property
+    def titles(self) -> list[str]:
+        return [TITLES[b] if b < len(TITLES) else f"Profile {b}" for b in range(self.blocks)]
+
+    @property
+    def names(self) -> list[str]:
+        """Column names load_model_df gives the blocks."""
+        return map_titles_to_names(self.titles)
+
+    def header_rows(self) -> list[int]:
+        return [b * self.block_rows + self.title_gap for b in range(self.blocks)]
+
+    def validate(self) -> None:
+        if self.blocks < 1:
+            raise ValueError("blocks must be >= 1")
+        if not 1 <= self.title_gap <= LOOKBACK_ROWS:
+            raise ValueError(f"title_gap must be 1..{LOOKBACK_ROWS} (titles are looked up that far above the header)")
+        if not 0.0 <= self.formula_noise <= 1.0:
+            raise ValueError("formula_noise must be within 0..1")
+        last = self.header_rows()[-1]
+        if last >= SCAN_ROWS:
+            fit = (SCAN_ROWS - 1 - self.title_gap) // self.block_rows + 1
+            raise ValueError(
+                f"{self.blocks} blocks put the last header at row {last}; the loader only scans "
+                f"the first {SCAN_ROWS} rows (at most {fit} blocks with this spacing)"
+            )
+
+
+SIZES = {
+    "small": WorkbookSpec("small"),
+    "medium": WorkbookSpec("medium", blocks=10, helper_cols=8, formula_noise=0.1),
+    "large": WorkbookSpec("large", blocks=10, helper_cols=20, formula_noise=0.1, tail_rows=10_000),
+    "xl": WorkbookSpec("xl", blocks=10, helper_cols=20, formula_noise=0.1, target_mb=100),
+}
+DEFAULT_SIZES = ("small", "medium", "large")
+
+
+# -----------------------------
+# Profiles
+# -----------------------------
+def block_profiles(spec: WorkbookSpec) -> dict[str, np.ndarray]:
+    """(24, 12) hour x month values of every block, by loader column name (deterministic in seed)."""
+    rng = np.random.default_rng(spec.seed)
+    hours = np.arange(24)[:, None]
+    months = np.arange(12)[None, :]
+    season = 1.0 + 0.15 * np.cos((months - 5) / 12 * 2 * np.pi)
+
+    out = {}
+    for title, name in zip(spec.titles, spec.names):
+        noise = rng.uniform(0.8, 1.0, size=(24, 12))
+        if title.startswith("Load"):
+            v = 1000.0 * (0.75 + 0.2 * np.sin((hours - 8) / 24 * 2 * np.pi) ** 2) * noise
+        elif "Solar" in title:
+            v = 800.0 * np.clip(np.sin((hours - 6) / 12 * np.pi), 0.0, None) * season * noise
+        elif "Wind" in title:
+            v = 400.0 * (0.6 + 0.4 * np.cos((hours - 2) / 24 * 2 * np.pi)) / season * noise
+        else:
+            v = 500.0 * noise
+        out[name] = np.round(v, 6)
+    return out
+
+
+def expected_model_df(spec: WorkbookSpec) -> pd.DataFrame:
+    """The model_df load_model_df should return for a workbook written from `spec`."""
+    out = pd.DataFrame({
+        "month": pd.Categorical(np.repeat(MONTHS, 24), categories=MONTHS, ordered=True),
+        "hour": np.tile(np.arange(24), 12),
+    })
+    for name, values in block_profiles(spec).items():
+        out[name] = values.T.ravel().astype(float)
+    return out
+
+
+# -----------------------------
+# Workbook
+# -----------------------------
+def _helper_row(r: int, n: int, noise: float, rng: np.random.Generator) -> list:
+    vals = rng.random(n).tolist()
+    if noise > 0:
+        for k in np.flatnonzero(rng.random(n) < noise):
+            vals[k] = f"=SUM(B{r}:M{r})*{vals[k]:.4f}" if k % 2 else f"=B{r}+{k}"
+    return vals
+
+
+def _write(path: Path, spec: WorkbookSpec) -> Path:
+    spec.validate()
+    rng = np.random.default_rng(spec.seed + 1)
+    profiles = block_profiles(spec)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(spec.sheet)
+    helpers = [f"helper{k}" for k in range(spec.helper_cols)]
+    extra = ["Time", *helpers] if spec.helper_cols else []
+
+    written = 0
+
+    def emit(row: list) -> int:
+        """Append a row; returns its 1-based Excel row number."""
+        nonlocal written
+        ws.append(row)
+        written += 1
+        return written
+
+    for title, values in zip(spec.titles, profiles.values()):
+        emit([title])
+        for _ in range(spec.title_gap - 1):
+            emit([])
+        emit(["Time", *MONTHS, None, *extra])
+        for h in range(24):
+            row = [h, *values[h].tolist()]
+            if spec.helper_cols:
+                row += [None, h, *_helper_row(written + 1, spec.helper_cols, spec.formula_noise, rng)]
+            emit(row)
+        for _ in range(spec.pad_rows):
+            emit([])
+
+    pad = [None] * (15 + len(extra))
+    for _ in range(spec.tail_rows):
+        emit([*pad, *_helper_row(written + 1, spec.tail_cols, spec.formula_noise, rng)])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.xlsx")
+    wb.save(tmp)
+    tmp.replace(path)
+    return path
+
+
+def size_for_target(spec: WorkbookSpec) -> WorkbookSpec:
+    """tail_rows / tail_cols that bring the file close to spec.target_mb (measured on a sample)."""
+    if spec.target_mb is None:
+        return spec
+    sample_rows = 2000
+    with tempfile.TemporaryDirectory() as d:
+        base = _write(Path(d) / "base.xlsx", replace(spec, tail_rows=0, target_mb=None)).stat().st_size
+        grown = _write(Path(d) / "tail.xlsx", replace(spec, tail_rows=sample_rows, target_mb=None)).stat().st_size
+    per_cell = max(grown - base, 1) / (sample_rows * spec.tail_cols)
+    cells = max(spec.target_mb * 1024 * 1024 - base, 0) / per_cell
+
+    used = spec.blocks * spec.block_rows
+    tail_cols = max(spec.tail_cols, math.ceil(cells / (EXCEL_MAX_ROWS - used)))
+    return replace(spec, tail_rows=int(cells / tail_cols), tail_cols=tail_cols, target_mb=None)
+
+
+def write_workbook(path: Path, spec: WorkbookSpec) -> Path:
+    """Write `spec` as .xlsx (streamed, so memory stays flat even for 100 MB files)."""
+    return _write(path, size_for_target(spec))
+
+
+def fixture_workbook(size: str, root: Path) -> Path:
+    """Benchmark workbook for `size` (a SIZES key), written once and reused."""
+    spec = SIZES[size]
+    tail = f"mb{spec.target_mb:g}" if spec.target_mb is not None else f"t{spec.tail_rows}"
+    path = Path(root) / f"{spec.name}_b{spec.blocks}_h{spec.helper_cols}_f{spec.formula_noise:g}_{tail}_s{spec.seed}.xlsx"
+    if not path.exists():
+        write_workbook(path, spec)
+    return path
+
+
+# -----------------------------
+# Chronological variants
+# -----------------------------
+def hourly_frame(spec: WorkbookSpec, day_noise: float = 0.1) -> pd.DataFrame:
+    """
+    8760 hourly rows (non-leap year) of every block. Day-to-day noise is normalised per
+    (month, hour), so reduce_to_typical_day gives back the block values.
+    """
+    rng = np.random.default_rng(spec.seed + 2)
+    stamps = pd.date_range("2023-01-01", periods=8760, freq="h")
+    month_of_day = np.repeat(np.arange(12), DAYS_IN_MONTH)
+
+    out = {"timestamp": stamps}
+    for name, values in block_profiles(spec).items():
+        day = values.T[month_of_day]                       # (365, 24)
+        if day_noise > 0:
+            f = rng.uniform(1.0 - day_noise, 1.0 + day_noise, size=day.shape)
+            starts = np.concatenate([[0], np.cumsum(DAYS_IN_MONTH)[:-1]])
+            mean = np.add.reduceat(f, starts, axis=0) / np.array(DAYS_IN_MONTH)[:, None]
+            day = day * f / mean[month_of_day]
+        out[name] = day.ravel()
+    return pd.DataFrame(out)
+
+
+def write_hourly_csv(path: Path, spec: WorkbookSpec, day_noise: float = 0.1) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    hourly_frame(spec, day_noise=day_noise).to_csv(path, index=False, date_format="%Y-%m-%d %H:%M")
+    return path
+
+
+def write_meter_csv(
+    path: Path,
+    spec: WorkbookSpec,
+    minutes: int = 15,
+    meter_id: str = "MTR-0001",
+    day_noise: float = 0.1,
+) -> Path:
+    """
+    Interval meter export of the load block: timestamp, meter_id, kw (mean demand over the
+    interval) and kwh (energy in it). Per hour, kw averages and kwh sums to the hourly value,
+    so reduce_to_typical_day(kw) gives back the load block.
+    """
+    if 60 % minutes:
+        raise ValueError("minutes must divide 60")
+    k = 60 // minutes
+    rng = np.random.default_rng(spec.seed + 3)
+    hourly = hourly_frame(spec, day_noise=day_noise)
+    load_col = spec.names[0]
+
+    w = rng.uniform(0.8, 1.2, size=(len(hourly), k))
+    kw = (hourly[load_col].to_numpy()[:, None] * w / w.mean(axis=1, keepdims=True)).ravel()
+    meter = pd.DataFrame({
+        "timestamp": pd.date_range("2023-01-01", periods=len(kw), freq=f"{minutes}min"),
+        "meter_id": meter_id,
+        "kw": kw,
+        "kwh": kw / k,
+    })
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meter.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M")
+    return path
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.workbooks", description="Write a synthetic model workbook")
+    p.add_argument("out", help="output .xlsx")
+    p.add_argument("--blocks", type=int, default=5)
+    p.add_argument("--helper-cols", type=int, default=0)
+    p.add_argument("--formula-noise", type=float, default=0.0)
+    p.add_argument("--tail-rows", type=int, default=0)
+    p.add_argument("--target-mb", type=float, default=None)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--hourly", help="also write the matching 8760-row CSV here")
+    p.add_argument("--meter", help="also write a matching interval meter CSV (load block) here")
+    p.add_argument("--meter-minutes", type=int, default=15)
+    args = p.parse_args(argv)
+
+    spec = WorkbookSpec(
+        name=Path(args.out).stem,
+        blocks=args.blocks,
+        helper_cols=args.helper_cols,
+        formula_noise=args.formula_noise,
+        tail_rows=args.tail_rows,
+        target_mb=args.target_mb,
+        seed=args.seed,
+    )
+    try:
+        path = write_workbook(Path(args.out), spec)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    print(f"{path} ({path.stat().st_size / 1e6:.1f} MB, blocks: {', '.join(spec.names)})")
+    if args.hourly:
+        print(write_hourly_csv(Path(args.hourly), spec))
+    if args.meter:
+        print(write_meter_csv(Path(args.meter), spec, minutes=args.meter_minutes))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields, replace
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.carbon import CarbonResult, HourlyModel, compile_hourly, scenario_carbon
+from core.excel_option_engine import BESS_EFF, DAYS_IN_MONTH, DISCHARGE_SLOT, SLOT_ORDER, ExcelColMap, OptionSizing, _require
+from core.instrumentation import traced
+from core.model_builder import MONTH_ORDER
+from core.tariff_costing import TariffRates
+from core.tod import add_tod_slot
+
+SOLAR_MODES = ["FT", "SAT", "EW"]
+RATE_SOURCES = ["solar", "wind", "bess", "grid"]
+
+KWH_COLS = ["load_kwh", "solar_kwh", "wind_kwh", "total_re_kwh", "excess_kwh", "bess_kwh", "grid_kwh"]
+RATE_COLS = ["solar_rate", "wind_rate", "bess_rate", "grid_rate"]
+COST_COLS = ["solar_cost_rs", "wind_cost_rs", "bess_cost_rs", "grid_cost_rs", "total_cost_rs"]
+ANNUAL_COLS = ["tod_slot"] + KWH_COLS + ["re_percent"] + RATE_COLS + COST_COLS
+
+
+# -----------------------------
+# Compiled model
+# -----------------------------
+@dataclass(frozen=True)
+class CompiledModel:
+    """
+    model_df reduced to what the engine actually needs.
+
+    Everything before the (month, slot) clipping is linear in the sizing, so each
+    reference profile collapses to a (12, 4) matrix of typical-day kWh per 1 MW(p),
+    summed over the hours of each TOD slot. Months follow MONTH_ORDER, slots SLOT_ORDER.
+    `hourly` is only kept when the model has grid emission factors (carbon accounting).
+    """
+    days: np.ndarray                      # (12,)
+    load: np.ndarray                      # (12, 4)
+    wind: np.ndarray                      # (12, 4)
+    solar: dict[str, np.ndarray] = field(default_factory=dict)   # FT/SAT/EW -> (12, 4)
+    hourly: HourlyModel | None = field(default=None, repr=False)
+
+    @property
+    def nbytes(self) -> int:
+        hourly = self.hourly.nbytes if self.hourly is not None else 0
+        return int(self.days.nbytes + self.load.nbytes + self.wind.nbytes + sum(a.nbytes for a in self.solar.values()) + hourly)
+
+
+def _month_slot_sums(df: pd.DataFrame, col: str, colmap: ExcelColMap) -> np.ndarray:
+    ref = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    g = ref.groupby([df[colmap.month].astype(str), df[colmap.tod_slot].astype(str)]).sum()
+    idx = pd.MultiIndex.from_product([MONTH_ORDER, SLOT_ORDER])
+    return g.reindex(idx, fill_value=0.0).to_numpy(dtype=float).reshape(12, 4)
+
+
+def compile_model(model_df: pd.DataFrame, colmap: ExcelColMap = ExcelColMap(), grid_ef=None) -> CompiledModel:
+    """
+    Collapse a (month, hour) model_df into per-(month, slot) reference sums. If the model
+    has a grid emission factor column, or grid_ef is given (see carbon.grid_ef_matrix),
+    the hourly profiles are kept as well and evaluate_batch adds carbon accounting.
+    """
+    df = model_df
+    if colmap.tod_slot not in df.columns:
+        df = add_tod_slot(df.copy(), hour_col=colmap.hour, out_col=colmap.tod_slot)
+
+    _require(df, [colmap.month, colmap.hour, colmap.tod_slot], "keys/tod")
+    _require(df, [colmap.load_1mw, colmap.wind_1mw], "base refs")
+
+    bad = sorted(set(df[colmap.month].astype(str)) - set(DAYS_IN_MONTH))
+    if bad:
+        raise ValueError(f"Unknown month labels: {bad}. Expected {list(DAYS_IN_MONTH.keys())}")
+
+    solar_cols = {
+        mode: col
+        for mode, col in zip(SOLAR_MODES, [colmap.solar_ft_1mwp, colmap.solar_sat_1mwp, colmap.solar_ew_1mwp])
+        if col in df.columns
+    }
+    hourly = None
+    if grid_ef is not None or colmap.grid_ef in df.columns:
+        hourly = compile_hourly(df, solar_cols, colmap, grid_ef)
+
+    return CompiledModel(
+        days=np.array([DAYS_IN_MONTH[m] for m in MONTH_ORDER], dtype=float),
+        load=_month_slot_sums(df, colmap.load_1mw, colmap),
+        wind=_month_slot_sums(df, colmap.wind_1mw, colmap),
+        solar={mode: _month_slot_sums(df, col, colmap) for mode, col in solar_cols.items()},
+        hourly=hourly,
+    )
+
+
+# -----------------------------
+# Inputs
+# -----------------------------
+def default_rate_maps() -> dict[str, dict[str, float]]:
+    """Typical slot rate maps (same numbers as the dashboard's Typical plans)."""
+    t = TariffRates()
+    return {
+        "solar_rate_map": {s: t.solar_rate for s in SLOT_ORDER},
+        "wind_rate_map": {s: t.wind_rate for s in SLOT_ORDER},
+        "bess_rate_map": {s: t.bess_rate for s in SLOT_ORDER},
+        "grid_rate_map": {s: float(t.grid_rate_map[s]) for s in SLOT_ORDER},
+    }
+
+
+def _rate_matrix(rates: Sequence[dict | None], source: str) -> np.ndarray:
+    """(N, 4) slot rates for one source; missing slots/maps count as 0 like run_option."""
+    out = np.zeros((len(rates), 4), dtype=float)
+    for i, r in enumerate(rates):
+        m = (r or {}).get(f"{source}_rate_map")
+        if isinstance(m, dict):
+            out[i] = [float(m.get(s, 0.0)) for s in SLOT_ORDER]
+    return out
+
+
+@dataclass(frozen=True)
+class SizingArrays:
+    load_mw: np.ndarray
+    solar_code: np.ndarray     # index into SOLAR_MODES, -1 = no solar
+    solar_mw: np.ndarray
+    solar_loss: np.ndarray
+    wind_mw: np.ndarray
+    wind_loss: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.load_mw)
+
+    def __getitem__(self, rows: slice) -> "SizingArrays":
+        """Scenarios `rows` (e.g. one job chunk) as their own SizingArrays."""
+        return SizingArrays(**{f.name: getattr(self, f.name)[rows] for f in fields(self)})
+
+    @classmethod
+    def from_sizings(cls, sizings: Sequence[OptionSizing]) -> "SizingArrays":
+        codes = []
+        for s in sizings:
+            if s.solar_mode and float(s.solar_mw) > 0:
+                m = s.solar_mode.upper().strip()
+                if m not in SOLAR_MODES:
+                    raise ValueError(f"Unknown solar_mode='{s.solar_mode}' (use FT/SAT/EW/None)")
+                codes.append(SOLAR_MODES.index(m))
+            else:
+                codes.append(-1)
+
+        return cls(
+            load_mw=np.array([float(s.load_mw) for s in sizings]),
+            solar_code=np.array(codes, dtype=int),
+            solar_mw=np.array([float(s.solar_mw) for s in sizings]),
+            solar_loss=np.array([float(s.solar_loss) for s in sizings]),
+            wind_mw=np.array([float(s.wind_mw) for s in sizings]),
+            wind_loss=np.array([float(s.wind_loss) for s in sizings]),
+        )
+
+
+def sizing_grid(base: OptionSizing, solar_values, wind_values) -> SizingArrays:
+    """
+    Solar MWp x wind MW grid around a base sizing (load, solar mode, losses kept).
+    Row-major: scenario i -> (solar_values[i // n_wind], wind_values[i % n_wind]).
+    """
+    solar_values = np.asarray(solar_values, dtype=float)
+    wind_values = np.asarray(wind_values, dtype=float)
+    s, w = np.meshgrid(solar_values, wind_values, indexing="ij")
+    s, w = s.ravel(), w.ravel()
+    n = s.size
+
+    mode = (base.solar_mode or "").upper().strip()
+    if mode and mode not in SOLAR_MODES:
+        raise ValueError(f"Unknown solar_mode='{base.solar_mode}' (use FT/SAT/EW/None)")
+    code = np.where((s > 0) & bool(mode), SOLAR_MODES.index(mode) if mode else -1, -1)
+
+    return SizingArrays(
+        load_mw=np.full(n, float(base.load_mw)),
+        solar_code=code.astype(int),
+        solar_mw=s,
+        solar_loss=np.full(n, float(base.solar_loss)),
+        wind_mw=w,
+        wind_loss=np.full(n, float(base.wind_loss)),
+    )
+
+
+# -----------------------------
+# Result
+# -----------------------------
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    Annual TOD results for N scenarios.
+    Slot arrays are (N, 4) in SLOT_ORDER, total arrays are (N,). All values are
+    rounded exactly like run_option's output table. `carbon` holds the hourly carbon
+    accounting when the compiled model has grid emission factors.
+    """
+    slot: dict[str, np.ndarray]
+    total: dict[str, np.ndarray]
+    carbon: CarbonResult | None = None
+
+    def __len__(self) -> int:
+        return len(self.total["load_kwh"])
+
+    def totals_frame(self) -> pd.DataFrame:
+        """One row per scenario with the summarize_totals keys."""
+        return pd.DataFrame({
+            "load_kwh": self.total["load_kwh"],
+            "total_re_kwh": self.total["total_re_kwh"],
+            "re_percent": self.total["re_percent"],
+            "grid_kwh": self.total["grid_kwh"],
+            "total_cost_rs": self.total["total_cost_rs"],
+        })
+
+    def annual_table(self, i: int) -> pd.DataFrame:
+        """Scenario i as the same DataFrame run_option returns (A, C, B, D, Total)."""
+        data = {"tod_slot": SLOT_ORDER + ["Total"]}
+        for c in ANNUAL_COLS[1:]:
+            data[c] = np.append(self.slot[c][i], self.total[c][i])
+        out = pd.DataFrame(data)
+        out["tod_slot"] = out["tod_slot"].astype(str)
+        for c in COST_COLS:
+            out[c] = out[c].astype("Int64")
+        return out
+
+    def long_frame(self, scenario_ids: Sequence | None = None) -> pd.DataFrame:
+        """All scenarios stacked: one row per (scenario, slot incl. Total)."""
+        n = len(self)
+        ids = np.arange(n) if scenario_ids is None else np.asarray(scenario_ids, dtype=object)
+        data = {
+            "scenario_id": np.repeat(ids, 5),
+            "tod_slot": np.tile(np.array(SLOT_ORDER + ["Total"], dtype=object), n),
+        }
+        for c in ANNUAL_COLS[1:]:
+            data[c] = np.concatenate([self.slot[c], self.total[c][:, None]], axis=1).ravel()
+        return pd.DataFrame(data)
+
+
+# -----------------------------
+# MAIN BATCH ENGINE
+# -----------------------------
+@traced("engine.evaluate_batch", lambda res: {"rows": len(res)})
+def evaluate_batch(
+    compiled: CompiledModel,
+    sizings: Sequence[OptionSizing] | SizingArrays,
+    rates: dict | Sequence[dict | None] | None = None,
+    carbon: bool = True,
+) -> BatchResult:
+    """
+    Vectorised equivalent of run_option for N scenarios in one pass.
+
+    rates: one rate dict (shared) or one per scenario, in run_option's form
+           {"solar_rate_map": {...}, "wind_rate_map": ..., "bess_rate_map": ..., "grid_rate_map": ...}.
+    Numbers follow build_option_annual_table + the service cost columns:
+    monthly (month, slot) clipping, BESS = 80% of annual excess into slot D,
+    kWh/costs rounded to 0 dp, grid rate to 2 dp, RE% to 1 dp.
+    carbon: also net hour by hour for CFE% and emissions (see carbon.scenario_carbon)
+    when the model carries grid emission factors; False skips it.
+    """
+    sz = sizings if isinstance(sizings, SizingArrays) else SizingArrays.from_sizings(list(sizings))
+    n = len(sz)
+    if rates is not None and not isinstance(rates, dict) and len(rates) != n:
+        raise ValueError(f"Got {len(rates)} rate dicts for {n} sizings")
+
+    days = compiled.days[None, :, None]
+
+    # -----------------------------
+    # (N, month, slot) energy (kWh)
+    # -----------------------------
+    load = sz.load_mw[:, None, None] * compiled.load[None] * days
+
+    solar_refs = np.stack([compiled.solar.get(m, np.zeros((12, 4))) for m in SOLAR_MODES] + [np.zeros((12, 4))])
+    for code in np.unique(sz.solar_code[sz.solar_code >= 0]):
+        if SOLAR_MODES[code] not in compiled.solar:
+            raise KeyError(f"[solar ref ({SOLAR_MODES[code]})] Missing solar reference column in model")
+    solar_factor = np.where(sz.solar_code >= 0, sz.solar_mw * (1.0 - sz.solar_loss), 0.0)
+    solar = solar_factor[:, None, None] * solar_refs[sz.solar_code] * days   # -1 picks the zero block
+
+    wind = (sz.wind_mw * (1.0 - sz.wind_loss))[:, None, None] * compiled.wind[None] * days
+    total_re = solar + wind
+
+    excess = np.clip(total_re - load, 0.0, None)
+    grid_pre = np.clip(load - total_re, 0.0, None)
+
+    # -----------------------------
+    # Annual by slot + BESS
+    # -----------------------------
+    slot = {
+        "load_kwh": load.sum(axis=1),
+        "solar_kwh": solar.sum(axis=1),
+        "wind_kwh": wind.sum(axis=1),
+        "total_re_kwh": total_re.sum(axis=1),
+        "excess_kwh": excess.sum(axis=1),
+    }
+    res = annual_result(slot, grid_pre.sum(axis=1), rates)
+
+    if carbon and compiled.hourly is not None:
+        bess = slot["excess_kwh"].sum(axis=1) * BESS_EFF
+        wind_factor = sz.wind_mw * (1.0 - sz.wind_loss)
+        res = replace(res, carbon=scenario_carbon(
+            compiled.hourly, sz.load_mw, sz.solar_code, solar_factor, wind_factor, bess, SOLAR_MODES,
+        ))
+    return res
+
+
+def annual_result(slot: dict[str, np.ndarray], grid_pre: np.ndarray, rates: dict | Sequence[dict | None] | None) -> BatchResult:
+    """
+    Finish N scenarios from unrounded (N, 4) annual slot sums.
+
+    slot needs load/solar/wind/total_re/excess kWh; grid_pre is the slot-summed
+    grid import before BESS. Applies BESS, rates, costs and the output rounding.
+    """
+    slot = dict(slot)
+    n = len(grid_pre)
+
+    if rates is None or isinstance(rates, dict):
+        # shared plan: build one row and broadcast it
+        solar_rate, wind_rate, bess_rate, grid_rate = (
+            np.broadcast_to(_rate_matrix([rates], s), (n, 4)) for s in RATE_SOURCES
+        )
+    else:
+        solar_rate, wind_rate, bess_rate, grid_rate = (_rate_matrix(rates, s) for s in RATE_SOURCES)
+
+    bess = np.zeros((n, 4))
+    bess[:, SLOT_ORDER.index(DISCHARGE_SLOT)] = slot["excess_kwh"].sum(axis=1) * BESS_EFF
+    slot["bess_kwh"] = bess
+    slot["grid_kwh"] = np.clip(grid_pre - bess, 0.0, None)
+
+    raw_grid_cost = slot["grid_kwh"] * grid_rate
+
+    total = {c: slot[c].sum(axis=1) for c in KWH_COLS}
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slot["re_percent"] = np.where(
+            slot["load_kwh"] > 0, 100.0 * (slot["load_kwh"] - slot["grid_kwh"]) / slot["load_kwh"], 0.0
+        )
+        total["re_percent"] = np.where(
+            total["load_kwh"] > 0, 100.0 * (total["load_kwh"] - total["grid_kwh"]) / total["load_kwh"], 0.0
+        )
+
+    # -----------------------------
+    # Round only at annual output (same order as the engine + service)
+    # -----------------------------
+    for c in KWH_COLS:
+        slot[c] = np.round(slot[c], 0)
+        total[c] = np.round(total[c], 0)
+    slot["re_percent"] = np.round(slot["re_percent"], 1)
+    total["re_percent"] = np.round(total["re_percent"], 1)
+
+    slot["solar_rate"], slot["wind_rate"], slot["bess_rate"] = solar_rate, wind_rate, bess_rate
+    slot["grid_rate"] = np.round(grid_rate, 2)
+    for c in RATE_COLS:
+        total[c] = np.full(n, np.nan)
+
+    # service costs use the rounded kWh; grid cost comes rounded from the engine
+    raw = {
+        "solar_cost_rs": slot["solar_kwh"] * solar_rate,
+        "wind_cost_rs": slot["wind_kwh"] * wind_rate,
+        "bess_cost_rs": slot["bess_kwh"] * bess_rate,
+        "grid_cost_rs": np.round(raw_grid_cost, 0),
+    }
+    slot_total_raw = raw["solar_cost_rs"] + raw["wind_cost_rs"] + raw["bess_cost_rs"] + raw["grid_cost_rs"]
+
+    for c in ["solar_cost_rs", "wind_cost_rs", "bess_cost_rs", "grid_cost_rs"]:
+        slot[c] = np.round(raw[c], 0)
+    slot["total_cost_rs"] = np.round(slot_total_raw, 0)
+    for c in COST_COLS:
+        total[c] = slot[c].sum(axis=1)
+
+    return BatchResult(slot=slot, total=total)
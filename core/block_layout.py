@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import hashlib
+import json
+import threading
+
+import pandas as pd
+
+from core.block_namer import map_titles_to_names, rect_titles_in_grid
+from core.excel_blocks import block_rects_in_grid, compute_rect_stops, is_header_row
+
+# Bump when detection rules change, so stored layouts are re-detected
+LAYOUT_VERSION = "3"
+
+
+# -----------------------------
+# Layout
+# -----------------------------
+@dataclass(frozen=True)
+class BlockLayout:
+    """
+    Where the Time/Jan..Dec blocks of one sheet are and what they are called.
+    Block i spans rows header_rows[i]:stop_rows[i] and columns col_ranges[i]; side-by-side
+    blocks share a header row.
+    """
+    sheet: str
+    total_rows: int
+    header_rows: tuple[int, ...]
+    titles: tuple[str, ...]
+    names: tuple[str, ...]
+    stop_rows: tuple[int, ...] = ()
+    col_ranges: tuple[tuple[int, int], ...] = ()
+
+    @property
+    def ranges(self) -> list[tuple[int, int]]:
+        return list(zip(self.header_rows, self.stop_rows))
+
+    @property
+    def rects(self) -> list[tuple[int, int, int]]:
+        """(header_row, col_start, col_stop) per block."""
+        return [(hr, c0, c1) for hr, (c0, c1) in zip(self.header_rows, self.col_ranges)]
+
+
+def detect_layout(
+    grid: pd.DataFrame,
+    sheet: str,
+    scan_rows: int = 300,
+    lookback_rows: int = 4,
+    total_rows: int | None = None,
+) -> BlockLayout:
+    """
+    Header rows, titles and column names of a sheet grid (same rules as load_model_df).
+    total_rows: sheet length when `grid` only holds the top of the sheet (streamed reads).
+    """
+    total_rows = int(grid.shape[0] if total_rows is None else total_rows)
+    rects = block_rects_in_grid(grid, scan_rows=scan_rows)
+    titles = rect_titles_in_grid(grid, rects, lookback_rows=lookback_rows)
+    return BlockLayout(
+        sheet=sheet,
+        total_rows=total_rows,
+        header_rows=tuple(hr for hr, _, _ in rects),
+        titles=tuple(titles),
+        names=tuple(map_titles_to_names(titles)),
+        stop_rows=tuple(compute_rect_stops(rects, total_rows)),
+        col_ranges=tuple((c0, c1) for _, c0, c1 in rects),
+    )
+
+
+# -----------------------------
+# Layout cache
+# -----------------------------
+def layout_fingerprint(grid: pd.DataFrame, sheet: str, scan_rows: int = 300, lookback_rows: int = 4) -> str:
+    """
+    Cheap structural fingerprint of a sheet grid: sheet name, dimensions and the text
+    cells of the first column (block titles and "Time" anchors in our templates).
+    Workbooks from one template share it even though their numbers differ.
+    """
+    first = grid.iloc[:, 0] if grid.shape[1] else pd.Series(dtype=object)
+    is_text = first.map(lambda v: isinstance(v, str))
+    anchors = [(int(r), v) for r, v in first[is_text].items()]
+    return fingerprint_from_parts(sheet, grid.shape, anchors, scan_rows=scan_rows, lookback_rows=lookback_rows)
+
+
+def fingerprint_from_parts(
+    sheet: str,
+    shape: tuple[int, int],
+    anchors: list[tuple[int, str]],
+    scan_rows: int = 300,
+    lookback_rows: int = 4,
+) -> str:
+    """layout_fingerprint from pieces collected while streaming a sheet (row, text) anchors."""
+    payload = json.dumps(
+        [LAYOUT_VERSION, sheet, [int(shape[0]), int(shape[1])], scan_rows, lookback_rows,
+         [[int(r), str(v).strip()] for r, v in anchors]],
+        separators=(",", ":"),
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def validate_layout(
+    grid: pd.DataFrame,
+    layout: BlockLayout,
+    lookback_rows: int = 4,
+    total_rows: int | None = None,
+) -> bool:
+    """A stored layout still holds: same row count, every header row is a header, same titles."""
+    if layout.total_rows != (grid.shape[0] if total_rows is None else total_rows):
+        return False
+    if any(hr >= grid.shape[0] or not is_header_row(grid.iloc[hr]) for hr in set(layout.header_rows)):
+        return False
+    return tuple(rect_titles_in_grid(grid, layout.rects, lookback_rows=lookback_rows)) == layout.titles
+
+
+class LayoutCache:
+    """
+    Block layouts by structural fingerprint (LRU), optionally persisted as a JSON file
+    so known templates skip header/title detection across restarts.
+    """
+
+    def __init__(self, path: Path | None = None, max_entries: int = 512):
+        self.path = Path(path) if path is not None else None
+        self.max_entries = int(max_entries)
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.path is not None and self.path.exists():
+            try:
+                self._entries.update(json.loads(self.path.read_text()))
+            except (ValueError, OSError):
+                pass   # unreadable cache file: start empty, it is rewritten on the next put
+
+    def get(self, fingerprint: str) -> BlockLayout | None:
+        with self._lock:
+            d = self._entries.get(fingerprint)
+            if d is None:
+                return None
+            self._entries.move_to_end(fingerprint)
+        titles = tuple(d["titles"])
+        return BlockLayout(
+            sheet=d["sheet"],
+            total_rows=int(d["total_rows"]),
+            header_rows=tuple(int(r) for r in d["header_rows"]),
+            titles=titles,
+            # names follow the current naming rules, not the ones in force when stored
+            names=tuple(map_titles_to_names(list(titles))),
+            stop_rows=tuple(int(r) for r in d["stop_rows"]),
+            col_ranges=tuple((int(a), int(b)) for a, b in d["col_ranges"]),
+        )
+
+    def put(self, fingerprint: str, layout: BlockLayout) -> None:
+        d = asdict(layout)
+        d.pop("names")
+        with self._lock:
+            self._entries[fingerprint] = d
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_text(json.dumps(self._entries))
+                tmp.replace(self.path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def detect(
+        self,
+        grid: pd.DataFrame,
+        sheet: str,
+        scan_rows: int = 300,
+        lookback_rows: int = 4,
+        total_rows: int | None = None,
+        fingerprint: str | None = None,
+    ) -> BlockLayout:
+        """
+        detect_layout, served from the cache when the template is known and still valid.
+        Streamed reads pass the top of the sheet as `grid` plus total_rows and a fingerprint.
+        """
+        fp = fingerprint or layout_fingerprint(grid, sheet, scan_rows=scan_rows, lookback_rows=lookback_rows)
+        layout = self.get(fp)
+        if layout is not None and validate_layout(grid, layout, lookback_rows=lookback_rows, total_rows=total_rows):
+            self.hits += 1
+            return layout
+
+        self.misses += 1
+        layout = detect_layout(grid, sheet, scan_rows=scan_rows, lookback_rows=lookback_rows, total_rows=total_rows)
+        self.put(fp, layout)
+        return layout
+
+
+# process-wide default (in memory only)
+_DEFAULT_CACHE = LayoutCache()
+
+
+def default_layout_cache() -> LayoutCache:
+    return _DEFAULT_CACHE
@@ -1,17 +1,8 @@
 from __future__ import annotations
 from pathlib import Path
-import re
 import pandas as pd
 
-def _clean_title(s: str) -> str:       #Excel titles often have inconsistent spacing
-    s = str(s).strip()
-    s = re.sub(r"\s+", " ", s)         # " Load Reference 1 MW "           "Load Reference 1 MW"
-    return s  
-
-def _slug(s: str) -> str:
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s).strip("_")    #"file@name#1"  → "file_name_1"
-    return s
+from core.block_rules import BlockRules, clean_title, default_block_rules
 
 def detect_block_titles(
     xlsx_path: Path,
@@ -25,82 +16,57 @@ def detect_block_titles(
     that acts like the block title.
     """
     full = pd.read_excel(xlsx_path, sheet_name=sheet, header=None)
+    return titles_in_grid(full, header_rows, lookback_rows=lookback_rows)
 
-    titles = []
-    for hr in header_rows:
-        title = None
-
-        # search rows above the header row
-        for r in range(max(0, hr - lookback_rows), hr)[::-1]:
-            row = full.iloc[r].tolist()
-
-            # pick the first meaningful text cell in that row
-            for cell in row:
-                if pd.isna(cell):
-                    continue
-                txt = _clean_title(cell)
-                if txt and txt.lower() not in ("time", "jan", "feb", "mar"):
-                    title = txt
-                    break
-            if title:
-                break
-
-        if not title:
-            title = f"block_{hr}"
 
-        titles.append(title)
+def titles_in_grid(full: pd.DataFrame, header_rows: list[int], lookback_rows: int = 3) -> list[str]:
+    """detect_block_titles on a sheet that is already read (header=None)."""
+    return [_title_above(full, hr, lookback_rows) or f"block_{hr}" for hr in header_rows]
 
-    return titles
 
-def map_titles_to_names(titles: list[str]) -> list[str]:
+def rect_titles_in_grid(full: pd.DataFrame, rects: list[tuple[int, int, int]], lookback_rows: int = 3) -> list[str]:
     """
-    Convert Excel titles into stable python column names.
-    You can improve these rules anytime without touching extraction code.
+    Titles for (header_row, col_start, col_stop) blocks. A block alone on its header row is
+    titled like titles_in_grid; side-by-side blocks only look above their own columns
+    (the first one also takes anything left of it), up to where the next block starts.
     """
-    names = []
-    for t in titles:
-        tl = t.lower()
-
-        # Load blocks
-        if "load" in tl and "reference" in tl and "1mw" in tl:
-            names.append("load_1mw")
-            continue
-        if "load requirement" in tl:
-            names.append("load_requirement_1mw")
-            continue
+    by_row: dict[int, list[tuple[int, int]]] = {}
+    for hr, c0, c1 in rects:
+        by_row.setdefault(hr, []).append((c0, c1))
 
-        # Solar blocks
-        if "ft solar" in tl and "1mw" in tl:
-            names.append("solar_ft_1mw")
-            continue
-        if "sat solar" in tl and "1mw" in tl:
-            names.append("solar_sat_1mw")
+    titles = []
+    for hr, c0, c1 in rects:
+        row_rects = sorted(by_row[hr])
+        if len(row_rects) == 1:
+            titles.append(_title_above(full, hr, lookback_rows) or f"block_{hr}")
             continue
+        k = row_rects.index((c0, c1))
+        lo = 0 if k == 0 else c0
+        hi = row_rects[k + 1][0] if k + 1 < len(row_rects) else None
+        titles.append(_title_above(full, hr, lookback_rows, cols=slice(lo, hi)) or f"block_{hr}_{c0}")
+    return titles
 
-        # Wind blocks
-        if "wind" in tl and "1mw" in tl:
-            names.append("wind_1mw")
-            continue
 
-        # BESS related
-        if "difference" in tl and "discharging limits" in tl:
-            names.append("bess_discharge_limit_kw")
-            continue
-        if "difference" in tl and "charging limits" in tl:
-            names.append("bess_charge_limit_kw")
-            continue
+def _title_above(full: pd.DataFrame, hr: int, lookback_rows: int, cols: slice | None = None) -> str | None:
+    # search rows above the header row
+    for r in range(max(0, hr - lookback_rows), hr)[::-1]:
+        row = full.iloc[r].tolist()
+        if cols is not None:
+            row = row[cols]
 
-        # fallback
-        names.append(_slug(t))
+        # pick the first meaningful text cell in that row
+        for cell in row:
+            if pd.isna(cell):
+                continue
+            txt = clean_title(cell)
+            if txt and txt.lower() not in ("time", "jan", "feb", "mar"):
+                return txt
+    return None
 
-    # If duplicates happen, make them unique
-    seen = {}
-    out = []
-    for n in names:
-        if n not in seen:
-            seen[n] = 1
-            out.append(n)
-        else:
-            seen[n] += 1
-            out.append(f"{n}_{seen[n]}")
-    return out
+def map_titles_to_names(titles: list[str], rules: BlockRules | None = None) -> list[str]:
+    """
+    Convert Excel titles into stable python column names.
+    The rules live in core/block_rules.json (or $HYBRID_RE_BLOCK_RULES); a new template
+    only needs a rule there, not a code change. Repeated names get _2, _3, ... suffixes.
+    """
+    return (rules or default_block_rules()).names(list(titles))
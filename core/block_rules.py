@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+import json
+import os
+import re
+
+from core.excel_option_engine import role_columns
+from core.fingerprint import file_fingerprint
+
+# HYBRID_RE_BLOCK_RULES points at a client rule file; otherwise the packaged defaults apply
+RULES_ENV = "HYBRID_RE_BLOCK_RULES"
+DEFAULT_RULES_PATH = Path(__file__).with_name("block_rules.json")
+RULES_VERSION = 1
+
+
+def clean_title(s: str) -> str:
+    """Strip and collapse whitespace (Excel titles often have inconsistent spacing)."""
+    return re.sub(r"\s+", " ", str(s).strip())
+
+
+def slug(s: str) -> str:
+    """Fallback column name for a title no rule claims."""
+    return re.sub(r"[^a-z0-9]+", "_", s.lower()).strip("_")
+
+
+# -----------------------------
+# Rules
+# -----------------------------
+@dataclass(frozen=True)
+class BlockRule:
+    """
+    One title rule. It matches when the title contains every `all` keyword, none of the
+    `none` keywords and (if given) matches `regex`; titles are compared lower-cased with
+    whitespace collapsed. A rule names its block either by engine role (the column comes
+    from ExcelColMap) or by an explicit column name.
+    """
+    name: str
+    role: str | None = None
+    regex: str | None = None
+    all: tuple[str, ...] = ()
+    none: tuple[str, ...] = ()
+    priority: int = 0
+
+    def lookahead(self) -> str:
+        """This rule as zero-width lookaheads, so all rules fit in one anchored alternation."""
+        parts = [f"(?=.*?{re.escape(k.lower())})" for k in self.all]
+        parts += [f"(?!.*?{re.escape(k.lower())})" for k in self.none]
+        if self.regex:
+            parts.append(f"(?=.*?(?:{self.regex}))")
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class Resolution:
+    title: str
+    name: str
+    role: str | None = None
+    rule: int | None = None   # index into BlockRules.rules; None = slug fallback
+
+
+class BlockRules:
+    """
+    Title -> column name registry, compiled once into a single regex: one alternative per
+    rule, highest priority first (file order breaks ties), so the first alternative that
+    matches is the winning rule. Titles no rule claims fall back to a slug of the title.
+    """
+
+    def __init__(self, rules: list[BlockRule], source: str = "<rules>"):
+        self.source = source
+        self.rules = tuple(sorted(rules, key=lambda r: -r.priority))
+        body = "|".join(f"(?P<r{i}>{rule.lookahead()})" for i, rule in enumerate(self.rules))
+        self._matcher = re.compile(body or r"(?!)")
+        self._memo: dict[str, Resolution] = {}
+
+    def resolve(self, title: str) -> Resolution:
+        title = clean_title(title)
+        hit = self._memo.get(title)
+        if hit is None:
+            m = self._matcher.match(title.lower())
+            if m is None:
+                hit = Resolution(title=title, name=slug(title))
+            else:
+                i = int(m.lastgroup[1:])
+                rule = self.rules[i]
+                hit = Resolution(title=title, name=rule.name, role=rule.role, rule=i)
+            self._memo[title] = hit
+        return hit
+
+    def resolve_all(self, titles: list[str]) -> list[Resolution]:
+        """resolve() each title, then suffix repeated names (_2, _3, ...) in title order."""
+        seen: dict[str, int] = {}
+        out = []
+        for res in map(self.resolve, titles):
+            seen[res.name] = seen.get(res.name, 0) + 1
+            if seen[res.name] > 1:
+                res = Resolution(title=res.title, name=f"{res.name}_{seen[res.name]}", role=res.role, rule=res.rule)
+            out.append(res)
+        return out
+
+    def names(self, titles: list[str]) -> list[str]:
+        return [r.name for r in self.resolve_all(titles)]
+
+
+# -----------------------------
+# Loading
+# -----------------------------
+def _rule_from_dict(d: dict, i: int, source: str) -> BlockRule:
+    where = f"{source} rule {i}"
+    unknown = set(d) - {"name", "role", "regex", "all", "none", "priority"}
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+    if not (d.get("regex") or d.get("all")):
+        raise ValueError(f"{where}: needs 'regex' and/or 'all' keywords")
+    if d.get("regex"):
+        try:
+            re.compile(d["regex"])
+        except re.error as e:
+            raise ValueError(f"{where}: bad regex {d['regex']!r} ({e})") from None
+
+    roles = role_columns()
+    role, name = d.get("role"), d.get("name")
+    if role in roles:
+        if name and name != roles[role]:
+            raise ValueError(f"{where}: engine role {role!r} is always column {roles[role]!r}")
+        name = roles[role]
+    elif not name:
+        raise ValueError(f"{where}: needs 'name' (engine roles are {sorted(roles)})")
+
+    return BlockRule(
+        name=str(name),
+        role=role,
+        regex=d.get("regex"),
+        all=tuple(str(k) for k in d.get("all", ())),
+        none=tuple(str(k) for k in d.get("none", ())),
+        priority=int(d.get("priority", 0)),
+    )
+
+
+def load_block_rules(path: Path) -> BlockRules:
+    """Read and compile a rule file ({"version": 1, "rules": [...]}, see core/block_rules.json)."""
+    path = Path(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != RULES_VERSION:
+        raise ValueError(f"{path}: unsupported rules version {data.get('version')!r} (expected {RULES_VERSION})")
+    rules = [_rule_from_dict(d, i, path.name) for i, d in enumerate(data.get("rules", []))]
+    return BlockRules(rules, source=str(path))
+
+
+def active_rules_path() -> Path:
+    return Path(os.environ.get(RULES_ENV) or DEFAULT_RULES_PATH)
+
+
+@lru_cache(maxsize=None)
+def _rules_at(path: str, mtime: float) -> BlockRules:
+    return load_block_rules(Path(path))
+
+
+@lru_cache(maxsize=None)
+def _fingerprint_at(path: str, mtime: float) -> str:
+    return f"v{RULES_VERSION}-{file_fingerprint(Path(path))[:16]}"
+
+
+def default_block_rules() -> BlockRules:
+    """Rules from $HYBRID_RE_BLOCK_RULES or the packaged file; recompiled when the file changes."""
+    path = active_rules_path()
+    return _rules_at(str(path), path.stat().st_mtime)
+
+
+def rules_fingerprint() -> str:
+    """
+    RULES_VERSION plus a hash of the active rule file. Column names depend on the rules,
+    so stored results and ingest tags carry this and go stale when the rules change.
+    """
+    path = active_rules_path()
+    return _fingerprint_at(str(path), path.stat().st_mtime)
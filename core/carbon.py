@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from core.excel_option_engine import BESS_EFF, DAYS_IN_MONTH, DISCHARGE_SLOT, SLOT_ORDER, ExcelColMap, OptionResult, _require
+from core.model_builder import MONTH_ORDER
+from core.typical_day import reduce_to_typical_day
+
+CARBON_COLS = ["load_kwh", "cfe_kwh", "residual_grid_kwh", "cfe_percent", "baseline_tco2", "residual_tco2", "avoided_tco2"]
+
+# scenarios per (n, 12, 24) block; small enough to stay in cache
+_CHUNK = 128
+
+
+# -----------------------------
+# Grid emission factors
+# -----------------------------
+def grid_ef_matrix(values) -> np.ndarray:
+    """
+    (12, 24) typical-day grid emission factors (kgCO2/kWh) from a scalar, a (12, 24) /
+    288-long month-major profile, or a chronological year at any resolution (8760, 8784,
+    15-min, ...), which reduce_to_typical_day averages per (month, hour).
+    """
+    a = np.asarray(values, dtype=float)
+    if a.ndim == 0:
+        return np.full((12, 24), float(a))
+    if a.size == 288:
+        return a.reshape(12, 24)
+    return reduce_to_typical_day(a)
+
+
+# -----------------------------
+# Hourly model
+# -----------------------------
+@dataclass(frozen=True)
+class HourlyModel:
+    """
+    model_df as (12, 24) typical-day kWh per 1 MW(p), already multiplied by the days of each
+    month (months follow MONTH_ORDER), plus the grid emission factor of each (month, hour).
+    """
+    load: np.ndarray                      # (12, 24)
+    wind: np.ndarray                      # (12, 24)
+    grid_ef: np.ndarray                   # (12, 24) kgCO2/kWh
+    slot: np.ndarray                      # (24,) index into SLOT_ORDER per hour
+    solar: dict[str, np.ndarray] = field(default_factory=dict)   # FT/SAT/EW -> (12, 24)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.load, self.wind, self.grid_ef, self.slot, *self.solar.values()]
+        return int(sum(a.nbytes for a in arrays))
+
+
+def _month_hour(df: pd.DataFrame, col: str, colmap: ExcelColMap) -> np.ndarray:
+    ref = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    g = ref.groupby([df[colmap.month].astype(str), df[colmap.hour].astype(int)]).sum()
+    idx = pd.MultiIndex.from_product([MONTH_ORDER, range(24)])
+    return g.reindex(idx, fill_value=0.0).to_numpy(dtype=float).reshape(12, 24)
+
+
+def compile_hourly(
+    model_df: pd.DataFrame,
+    solar_modes: dict[str, str],
+    colmap: ExcelColMap = ExcelColMap(),
+    grid_ef=None,
+) -> HourlyModel:
+    """
+    Hourly counterpart of compile_model for carbon accounting. model_df must carry tod_slot;
+    solar_modes maps FT/SAT/EW to the solar columns present. grid_ef overrides the
+    workbook's emission factor block (see grid_ef_matrix for the accepted forms).
+    """
+    _require(model_df, [colmap.month, colmap.hour, colmap.tod_slot], "keys/tod")
+    if grid_ef is None:
+        _require(model_df, [colmap.grid_ef], "grid emission factors")
+        ef = _month_hour(model_df, colmap.grid_ef, colmap)
+    else:
+        ef = grid_ef_matrix(grid_ef)
+
+    slots = model_df.groupby(model_df[colmap.hour].astype(int))[colmap.tod_slot].first().astype(str)
+    slots = slots.reindex(range(24))
+    if slots.isna().any() or not slots.isin(SLOT_ORDER).all():
+        raise ValueError(f"Every hour 0..23 needs a TOD slot in {SLOT_ORDER}")
+
+    days = np.array([DAYS_IN_MONTH[m] for m in MONTH_ORDER], dtype=float)[:, None]
+    return HourlyModel(
+        load=_month_hour(model_df, colmap.load_1mw, colmap) * days,
+        wind=_month_hour(model_df, colmap.wind_1mw, colmap) * days,
+        grid_ef=ef,
+        slot=np.array([SLOT_ORDER.index(s) for s in slots], dtype=int),
+        solar={mode: _month_hour(model_df, col, colmap) * days for mode, col in solar_modes.items()},
+    )
+
+
+# -----------------------------
+# Result
+# -----------------------------
+def _finish(kwh: np.ndarray, ef_kg: np.ndarray, load: np.ndarray, load_ef: np.ndarray) -> dict[str, np.ndarray]:
+    baseline = load_ef / 1000.0
+    # fully matched hours cancel to tiny negatives; clip so tables show 0, not -0.0
+    residual = np.clip((load_ef - ef_kg) / 1000.0, 0.0, None)
+    residual_kwh = np.clip(load - kwh, 0.0, None)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(load > 0, 100.0 * kwh / load, 0.0)
+    return {
+        "load_kwh": np.round(load, 0),
+        "cfe_kwh": np.round(kwh, 0),
+        "residual_grid_kwh": np.round(residual_kwh, 0),
+        "cfe_percent": np.round(pct, 1),
+        "baseline_tco2": np.round(baseline, 2),
+        "residual_tco2": np.round(residual, 2),
+        "avoided_tco2": np.round(baseline - residual, 2),
+    }
+
+
+@dataclass(frozen=True)
+class CarbonResult:
+    """
+    Hourly carbon accounting for N scenarios, kept as unrounded (month, slot) sums; the slot
+    (N, 4), month (N, 12) and total (N,) views are rounded like the annual table (kWh to
+    0 dp, tCO2 to 2 dp, CFE% to 1 dp) and built on first access, so a sweep that only
+    reads totals never pays for the month roll-up.
+    """
+    cfe: np.ndarray          # (N, 12, 8) CFE kWh per (month, slot), then the grid kgCO2 it displaces
+    load_mw: np.ndarray      # (N,)
+    per_mw: np.ndarray       # (12, 8) the same for the load of 1 MW
+
+    def __len__(self) -> int:
+        return len(self.load_mw)
+
+    @cached_property
+    def slot(self) -> dict[str, np.ndarray]:
+        cfe = np.einsum("nmk->nk", self.cfe)
+        load = self.load_mw[:, None] * self.per_mw.sum(axis=0)
+        return _finish(cfe[:, :4], cfe[:, 4:], load[:, :4], load[:, 4:])
+
+    @cached_property
+    def month(self) -> dict[str, np.ndarray]:
+        cfe = np.einsum("nmjs->nmj", self.cfe.reshape(len(self), 12, 2, 4))
+        load = self.load_mw[:, None, None] * self.per_mw.reshape(12, 2, 4).sum(axis=2)
+        return _finish(cfe[:, :, 0], cfe[:, :, 1], load[:, :, 0], load[:, :, 1])
+
+    @cached_property
+    def total(self) -> dict[str, np.ndarray]:
+        cfe = np.einsum("nmk->nk", self.cfe).reshape(len(self), 2, 4).sum(axis=2)
+        load = self.load_mw[:, None] * self.per_mw.reshape(12, 2, 4).sum(axis=(0, 2))
+        return _finish(cfe[:, 0], cfe[:, 1], load[:, 0], load[:, 1])
+
+    def slot_table(self, i: int) -> pd.DataFrame:
+        """Scenario i by TOD slot (A, C, B, D, Total)."""
+        data = {"tod_slot": SLOT_ORDER + ["Total"]}
+        for c in CARBON_COLS:
+            data[c] = np.append(self.slot[c][i], self.total[c][i])
+        return pd.DataFrame(data)
+
+    def month_table(self, i: int) -> pd.DataFrame:
+        """Scenario i by month (Jan..Dec, Total)."""
+        data = {"month": MONTH_ORDER + ["Total"]}
+        for c in CARBON_COLS:
+            data[c] = np.append(self.month[c][i], self.total[c][i])
+        return pd.DataFrame(data)
+
+    def totals_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({c: self.total[c] for c in CARBON_COLS})
+
+
+# -----------------------------
+# Hourly matching
+# -----------------------------
+def _slot_weights(hm: HourlyModel) -> np.ndarray:
+    """(12, 24, 8): hour -> slot one-hot (kWh), then the same scaled by the hour's emission factor."""
+    onehot = np.eye(4)[hm.slot]                                   # (24, 4)
+    return np.concatenate([np.broadcast_to(onehot, (12, 24, 4)), onehot[None] * hm.grid_ef[:, :, None]], axis=2)
+
+
+def scenario_carbon(
+    hm: HourlyModel,
+    load_mw: np.ndarray,
+    solar_code: np.ndarray,
+    solar_factor: np.ndarray,
+    wind_factor: np.ndarray,
+    bess: np.ndarray,
+    solar_modes: list[str],
+) -> CarbonResult:
+    """
+    N scenarios netted hour by hour (24/7 matching). solar_code indexes solar_modes
+    (-1 = no solar); solar_factor / wind_factor are MW x (1 - loss); bess is each
+    scenario's annual BESS discharge in kWh as the energy engine computed it.
+
+    CFE (carbon-free energy) per hour = min(load, RE), plus BESS, which serves the unmatched
+    slot-D hours in proportion to their shortfall (never more than the shortfall). Residual
+    emissions are the rest of the load times the hour's grid emission factor; avoided
+    emissions are the baseline (all load from grid) minus the residual.
+
+    The only per-hour work is the min(); each (n, 12, 24) block is reduced straight to
+    (month, slot) kWh and kgCO2 with one batched matmul, and BESS and load are handled on
+    those (month, slot) grids or on the 1 MW load. Roll-ups are left to CarbonResult.
+    """
+    n = len(load_mw)
+    weights = _slot_weights(hm)
+    solar_refs = np.stack([hm.solar.get(m, np.zeros((12, 24))) for m in solar_modes] + [np.zeros((12, 24))])
+
+    # contiguous runs of one solar profile (sweeps are mostly a single mode), then unsort
+    order = np.argsort(solar_code, kind="stable")
+    codes, lm, sf, wf = solar_code[order], load_mw[order], solar_factor[order], wind_factor[order]
+    edges = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1, [n]])
+
+    sorted_matched = np.empty((n, 12, 8))
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        ref = solar_refs[codes[lo]]                              # -1 picks the zero block
+        for start in range(lo, hi, _CHUNK):
+            rows = slice(start, min(start + _CHUNK, hi))
+            load = lm[rows, None, None] * hm.load[None]
+            re = sf[rows, None, None] * ref[None]
+            re += wf[rows, None, None] * hm.wind[None]
+            np.minimum(load, re, out=re)
+            sorted_matched[rows] = np.matmul(re.transpose(1, 0, 2), weights).transpose(1, 0, 2)
+    matched = np.empty_like(sorted_matched)
+    matched[order] = sorted_matched
+
+    # load is linear in load_mw, so its roll-ups come from the 1 MW profile
+    per_mw = np.einsum("mh,mhk->mk", hm.load, weights)            # (12, 8) load of 1 MW
+    d = SLOT_ORDER.index(DISCHARGE_SLOT)
+    short = load_mw[:, None, None] * per_mw[None, :, [d, d + 4]] - matched[:, :, [d, d + 4]]
+    need = short[:, :, 0].sum(axis=1)                              # unmatched slot-D kWh
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(need > 0, np.minimum(bess / need, 1.0), 0.0)
+    cfe = matched
+    cfe[:, :, [d, d + 4]] += short * scale[:, None, None]
+
+    return CarbonResult(cfe=cfe, load_mw=np.asarray(load_mw, dtype=float), per_mw=per_mw)
+
+
+def option_carbon(result: OptionResult, grid_ef=None) -> CarbonResult:
+    """
+    Carbon accounting for one engine pass (build_option_result / run_option_result), from
+    the hourly kW it already holds. grid_ef as in compile_hourly; default is the model's
+    emission factor column.
+    """
+    c = result.colmap
+    h = result.hourly_kw
+    if grid_ef is None:
+        _require(h, [c.grid_ef], "grid emission factors")
+        ef = _month_hour(h, c.grid_ef, c)
+    else:
+        ef = grid_ef_matrix(grid_ef)
+
+    # the hourly kW are already sized, so this is one scenario with every factor at 1
+    days = np.array([DAYS_IN_MONTH[m] for m in MONTH_ORDER], dtype=float)[:, None]
+    slots = h.groupby(h[c.hour].astype(int))[c.tod_slot].first().astype(str).reindex(range(24))
+    hm = HourlyModel(
+        load=_month_hour(h, "load_kw", c) * days,
+        wind=_month_hour(h, "wind_kw", c) * days,
+        grid_ef=ef,
+        slot=np.array([SLOT_ORDER.index(s) for s in slots], dtype=int),
+        solar={"sized": _month_hour(h, "solar_kw", c) * days},
+    )
+    bess = float(result.slot_daily["excess_kwh"].sum()) * BESS_EFF
+    one = np.ones(1)
+    return scenario_carbon(hm, one, np.zeros(1, dtype=int), one, one, np.array([bess]), ["sized"])
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+from core.batch_engine import CompiledModel, compile_model, evaluate_batch
+from core.excel_option_engine import ENGINE_VERSION
+from core.model_bundle import BUNDLE_SUFFIX, load_any_model, save_model_bundle, build_base_model
+from core.fingerprint import file_fingerprint
+from core.ingest import find_workbooks, run_ingest
+from core.scenario_io import (
+    completed_scenarios,
+    format_results,
+    iter_scenario_records,
+    output_format,
+    parse_scenario,
+)
+
+# Worker-process state (set once per worker by the pool initializer)
+_WORKER_MODEL: CompiledModel | None = None
+
+
+def _init_worker(compiled: CompiledModel) -> None:
+    global _WORKER_MODEL
+    _WORKER_MODEL = compiled
+
+
+def _evaluate_chunk(compiled: CompiledModel, records: list[tuple[int, dict]], fmt: str, header: bool) -> tuple[int, str]:
+    parsed = [parse_scenario(rec, i) for i, rec in records]
+    ids = [p[0] for p in parsed]
+    result = evaluate_batch(compiled, [p[1] for p in parsed], [p[2] for p in parsed], carbon=False)
+    return len(parsed), format_results(result, ids, fmt, header=header)
+
+
+def _worker_chunk(records: list[tuple[int, dict]], fmt: str, header: bool) -> tuple[int, str]:
+    return _evaluate_chunk(_WORKER_MODEL, records, fmt, header)
+
+
+def _chunks(it, size: int):
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resume_path(out_path: Path) -> Path:
+    """Sidecar recording which inputs an output file was computed from."""
+    return out_path.with_name(out_path.name + ".resume.json")
+
+
+def _resume_mismatch(out_path: Path, inputs: dict) -> str | None:
+    """Why out_path can't be resumed with these inputs, or None if it can."""
+    if not out_path.exists() or out_path.stat().st_size == 0:
+        return None
+    try:
+        recorded = json.loads(resume_path(out_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return f"no readable {resume_path(out_path).name} next to it, so its inputs are unknown"
+    changed = [k for k in inputs if recorded.get(k) != inputs[k]]
+    if changed:
+        return f"it was computed from a different {', '.join(changed)}"
+    return None
+
+
+# -----------------------------
+# batch
+# -----------------------------
+def cmd_batch(args: argparse.Namespace) -> int:
+    model_df, workbook_fp = load_any_model(Path(args.model), sheet=args.sheet)
+    compiled = compile_model(model_df)
+
+    out_path = Path(args.out)
+    fmt = output_format(out_path)
+    if args.overwrite:
+        out_path.unlink(missing_ok=True)
+        resume_path(out_path).unlink(missing_ok=True)
+
+    # resuming only makes sense against the very same inputs
+    inputs = {
+        "scenarios_fp": file_fingerprint(Path(args.scenarios)),
+        "workbook_fp": workbook_fp,
+        "engine_version": ENGINE_VERSION,
+    }
+    reason = _resume_mismatch(out_path, inputs)
+    if reason:
+        print(f"error: won't resume {out_path}: {reason} (use --overwrite to start over)", file=sys.stderr)
+        return 2
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    resume_path(out_path).write_text(json.dumps(inputs, indent=2), encoding="utf-8")
+
+    skip = completed_scenarios(out_path, fmt)
+    need_header = fmt == "csv" and (not out_path.exists() or out_path.stat().st_size == 0)
+    if skip:
+        print(f"resuming: {skip:,} scenarios already in {out_path.name}", file=sys.stderr)
+
+    records = islice(enumerate(iter_scenario_records(Path(args.scenarios))), skip, None)
+    chunks = _chunks(records, args.chunk_size)
+
+    done = 0
+    t0 = time.perf_counter()
+
+    def _report(n: int) -> None:
+        nonlocal done
+        done += n
+        elapsed = time.perf_counter() - t0
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"{skip + done:,} scenarios | {rate:,.0f}/s", file=sys.stderr)
+
+    with open(out_path, "a", encoding="utf-8", newline="") as out:
+        if args.workers <= 1:
+            for chunk in chunks:
+                n, text = _evaluate_chunk(compiled, chunk, fmt, need_header)
+                need_header = False
+                out.write(text)
+                out.flush()
+                _report(n)
+        else:
+            # bounded window of in-flight chunks keeps memory constant and output ordered
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(compiled,)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_worker_chunk, chunk, fmt, need_header))
+                    need_header = False
+                    if len(pending) >= 2 * args.workers:
+                        n, text = pending.popleft().result()
+                        out.write(text)
+                        out.flush()
+                        _report(n)
+                while pending:
+                    n, text = pending.popleft().result()
+                    out.write(text)
+                    out.flush()
+                    _report(n)
+
+    elapsed = time.perf_counter() - t0
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(
+        f"done: {done:,} new scenarios in {elapsed:.2f}s ({rate:,.0f}/s), workbook {workbook_fp[:12]} -> {out_path}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+# -----------------------------
+# bundle
+# -----------------------------
+def cmd_bundle(args: argparse.Namespace) -> int:
+    xlsx = Path(args.workbook)
+    out = Path(args.out) if args.out else xlsx.with_suffix(BUNDLE_SUFFIX)
+    model_df = build_base_model(xlsx, sheet=args.sheet)
+    save_model_bundle(model_df, out, workbook_fp=file_fingerprint(xlsx), source=str(xlsx))
+    print(f"wrote {out}", file=sys.stderr)
+    return 0
+
+
+# -----------------------------
+# ingest
+# -----------------------------
+def cmd_ingest(args: argparse.Namespace) -> int:
+    workbooks = find_workbooks(args.inputs)
+    if not workbooks:
+        print("no workbooks found", file=sys.stderr)
+        return 2
+
+    def _progress(rec: dict, done: int, total: int) -> None:
+        detail = rec.get("error") or f"{len(rec['profiles'])} profiles, {rec['fingerprint'][:12]}"
+        print(f"[{done}/{total}] {rec['status']:<6} {rec['site']} ({rec['elapsed_s']:.1f}s) {detail}", file=sys.stderr)
+
+    summary = run_ingest(
+        workbooks, Path(args.out_dir), sheet=args.sheet, workers=args.workers,
+        retry_failed=args.retry_failed, progress=_progress,
+    )
+    print(
+        f"done: {summary.total} workbooks, {summary.skipped} unchanged, {summary.ok} parsed, "
+        f"{summary.cached} already cached, {summary.failed} failed in {summary.elapsed_s:.1f}s -> {summary.index_path}",
+        file=sys.stderr,
+    )
+    return 1 if summary.failed else 0
+
+
+# -----------------------------
+# serve
+# -----------------------------
+def cmd_serve(args: argparse.Namespace) -> int:
+    from core.http_api import serve
+
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        model_cache_mb=args.model_cache_mb,
+        preload=[Path(p) for p in args.preload],
+        sheet=args.sheet,
+        models_dir=Path(args.models_dir) if args.models_dir else None,
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m core", description="Hybrid RE engine (headless)")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    b = sub.add_parser("batch", help="evaluate a scenario file against a workbook or model bundle")
+    b.add_argument("model", help=f"workbook (.xlsx/.xls) or model bundle ({BUNDLE_SUFFIX})")
+    b.add_argument("scenarios", help="scenario file (.csv or .jsonl)")
+    b.add_argument("-o", "--out", required=True, help="output file (.csv: one row per scenario x slot, .jsonl: one line per scenario)")
+    b.add_argument("--sheet", default="Data")
+    b.add_argument("--chunk-size", type=int, default=2000)
+    b.add_argument("--workers", type=int, default=1)
+    b.add_argument("--overwrite", action="store_true", help="start over instead of resuming an existing output")
+    b.set_defaults(func=cmd_batch)
+
+    m = sub.add_parser("bundle", help=f"parse a workbook once into a reusable model bundle ({BUNDLE_SUFFIX})")
+    m.add_argument("workbook")
+    m.add_argument("-o", "--out")
+    m.add_argument("--sheet", default="Data")
+    m.set_defaults(func=cmd_bundle)
+
+    g = sub.add_parser("ingest", help="parse many workbooks into a model cache directory with a site index")
+    g.add_argument("inputs", nargs="+", help="workbook files, directories (recursive) or glob patterns")
+    g.add_argument("-o", "--out-dir", required=True, help="cache directory (bundles, ingest.jsonl, index.json)")
+    g.add_argument("--sheet", default="Data")
+    g.add_argument("--workers", type=int, default=None, help="processes, one workbook each (default: CPU count)")
+    g.add_argument("--retry-failed", action="store_true", help="re-parse unchanged workbooks that failed last time")
+    g.set_defaults(func=cmd_ingest)
+
+    s = sub.add_parser("serve", help="local HTTP JSON API with warm models")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8765)
+    s.add_argument("--workers", type=int, default=8)
+    s.add_argument("--model-cache-mb", type=int, default=256)
+    s.add_argument("--preload", nargs="*", default=[], help="workbooks / bundles to register at startup")
+    s.add_argument("--models-dir", help="directory POST /models {\"path\"} may read workbooks from (default: path registration off)")
+    s.add_argument("--sheet", default="Data")
+    s.set_defaults(func=cmd_serve)
+
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
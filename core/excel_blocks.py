@@ -14,17 +14,76 @@ def detect_time_month_headers(xlsx_path: Path, sheet: str, scan_rows=300):
         header=None,                                #No headers assumed (header=None)
         nrows=scan_rows
     )
+    return header_rows_in_grid(preview)
+
+
+def header_rows_in_grid(grid: pd.DataFrame, scan_rows: int | None = None) -> list[int]:
+    """detect_time_month_headers on a sheet that is already read (header=None)."""
+    preview = grid if scan_rows is None else grid.iloc[:scan_rows]
 
     header_rows = []
 
     for i in range(len(preview)):
-        row = preview.iloc[i].dropna().astype(str).str.strip().str.lower()         #Cleans up the row values 
-        if "time" in row.values and MONTHS.issubset(set(row.values)):          #Checks if 'time' and all months are present in the row
+        if is_header_row(preview.iloc[i]):
             header_rows.append(i)
 
     return sorted(header_rows)                                                  #Return sorted list of detected header rows
 
 
+def is_header_row(values: pd.Series) -> bool:
+    row = values.dropna().astype(str).str.strip().str.lower()                   #Cleans up the row values 
+    return "time" in row.values and MONTHS.issubset(set(row.values))            #Checks if 'time' and all months are present in the row
+
+
+def _norm(v) -> str | None:
+    return v.strip().lower() if isinstance(v, str) else None
+
+
+def header_segments(values: list) -> list[tuple[int, int]]:
+    """
+    (col_start, col_stop) of every Time + Jan..Dec table in one header row.
+    Each "Time" cell opens a segment that runs to the next "Time" cell (or the row end);
+    a segment holding all twelve months is a block, so side-by-side tables come out
+    separately and helper columns after a second "Time" are not one.
+    """
+    cells = [_norm(v) for v in values]
+    starts = [j for j, c in enumerate(cells) if c == "time"]
+    segments = []
+    for k, c0 in enumerate(starts):
+        c1 = starts[k + 1] if k + 1 < len(starts) else len(cells)
+        if MONTHS.issubset(set(cells[c0:c1])):
+            segments.append((c0, c1))
+    if not segments and is_header_row(pd.Series(values)):
+        segments.append((0, len(cells)))    # months left of "Time": the whole row is one block
+    return segments
+
+
+def block_rects_in_grid(grid: pd.DataFrame, scan_rows: int | None = None) -> list[tuple[int, int, int]]:
+    """
+    Every Time/months rectangle header as (header_row, col_start, col_stop), in row then
+    column order, from one pass over the first scan_rows rows.
+    """
+    preview = grid if scan_rows is None else grid.iloc[:scan_rows]
+    rects = []
+    for i, row in enumerate(preview.itertuples(index=False, name=None)):
+        if "time" not in {_norm(v) for v in row}:
+            continue
+        rects.extend((i, c0, c1) for c0, c1 in header_segments(list(row)))
+    return rects
+
+
+def compute_rect_stops(rects: list[tuple[int, int, int]], total_rows: int) -> list[int]:
+    """
+    Stop row of each rectangle: the next header row below it with a block overlapping its
+    columns, else the end of the sheet (compute_block_ranges for side-by-side tables).
+    """
+    stops = []
+    for hr, c0, c1 in rects:
+        below = [r for r, d0, d1 in rects if r > hr and d0 < c1 and c0 < d1]
+        stops.append(min(below) if below else total_rows)
+    return stops
+
+
 def compute_block_ranges(header_rows, total_rows):
     """
     “If a table starts at row X, where does it end?”
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
 import numpy as np
 import pandas as pd
 
+from core.instrumentation import frame_counts, traced
+from core.model_builder import MONTH_ORDER
+
 # -----------------------------
 # Constants
 # -----------------------------
@@ -13,6 +17,13 @@ DAYS_IN_MONTH = {
 }
 SLOT_ORDER = ["A", "C", "B", "D"]
 
+# BESS (Excel truth): 80% of the year's excess comes back in slot D
+BESS_EFF = 0.80
+DISCHARGE_SLOT = "D"
+
+# Bump whenever engine numbers can change (stored results are keyed on it)
+ENGINE_VERSION = "2"
+
 # -----------------------------
 # Column mapping
 # -----------------------------
@@ -21,17 +32,36 @@ class ExcelColMap:
     month: str = "month"
     hour: str = "hour"
 
+    # profile columns: the canonical names core/block_rules.json gives each role's block
     load_1mw: str = "load_1mw"
-    wind_1mw: str = "wind_generation_reference_for_1_mw"
+    wind_1mw: str = "wind_1mw"
 
-    solar_ft_1mwp: str = "160_ft_solar_generation_reference_for_1_mwp"
-    solar_sat_1mwp: str = "sat_solar_generation_reference_for_1_mwp"
-    solar_ew_1mwp: str = "ew_solar_generation_reference_for_1_mwp"
+    solar_ft_1mwp: str = "solar_ft_1mwp"
+    solar_sat_1mwp: str = "solar_sat_1mwp"
+    solar_ew_1mwp: str = "solar_ew_1mwp"
+
+    grid_ef: str = "grid_ef_kg_per_kwh"   # optional: grid emission factor, kgCO2/kWh
 
     tod_slot: str = "tod_slot"
     tod_rate: str = "tod_rate_rs_per_kwh"
 
 
+# Profile roles the engine reads -> ExcelColMap field holding the role's column
+ROLE_FIELDS = {
+    "load": "load_1mw",
+    "solar_ft": "solar_ft_1mwp",
+    "solar_sat": "solar_sat_1mwp",
+    "solar_ew": "solar_ew_1mwp",
+    "wind": "wind_1mw",
+    "grid_ef": "grid_ef",
+}
+
+
+def role_columns(colmap: ExcelColMap = ExcelColMap()) -> dict[str, str]:
+    """role -> model_df column, e.g. {"load": "load_1mw", "solar_sat": "solar_sat_1mwp", ...}."""
+    return {role: getattr(colmap, field) for role, field in ROLE_FIELDS.items()}
+
+
 @dataclass(frozen=True)
 class OptionSizing:
     load_mw: float = 1.0
@@ -73,6 +103,92 @@ def _solar_ref_col(colmap: ExcelColMap, mode: str) -> str:
     raise ValueError(f"Unknown solar_mode='{mode}' (use FT/SAT/EW/None)")
 
 
+# -----------------------------
+# Result with drill-down views
+# -----------------------------
+@dataclass(frozen=True)
+class OptionResult:
+    """
+    One engine pass. `annual` is the usual A, C, B, D, Total table; `monthly` (month x slot)
+    and `hourly` (month x hour typical-day kW) are built on first access from the frames the
+    pass already computed, so they never re-run the engine and cost nothing if unused.
+    """
+    annual: pd.DataFrame
+    sizing: OptionSizing
+    hourly_kw: pd.DataFrame = field(repr=False)    # model rows + load_kw/solar_kw/wind_kw/total_re_kw
+    slot_daily: pd.DataFrame = field(repr=False)   # unrounded (month, slot) kWh before BESS
+    rates: dict = field(default_factory=dict, repr=False)
+    colmap: ExcelColMap = ExcelColMap()
+
+    @cached_property
+    def monthly(self) -> pd.DataFrame:
+        """
+        (month, slot) rows with the annual table's columns. The annual BESS energy is spread
+        over the months' slot-D rows in proportion to their pre-BESS grid import, so monthly
+        grid kWh add up to the annual figure exactly (costs up to rounding).
+        """
+        c = self.colmap
+        sd = self.slot_daily.copy()
+        sd[c.month] = pd.Categorical(sd[c.month].astype(str), categories=MONTH_ORDER, ordered=True)
+        sd[c.tod_slot] = pd.Categorical(sd[c.tod_slot].astype(str), categories=SLOT_ORDER, ordered=True)
+        sd = sd.sort_values([c.month, c.tod_slot]).reset_index(drop=True)
+
+        is_d = (sd[c.tod_slot] == DISCHARGE_SLOT).to_numpy()
+        grid_pre = sd["grid_kwh"].to_numpy(dtype=float)
+        bess_total = float(sd["excess_kwh"].sum()) * BESS_EFF
+        need = grid_pre * is_d
+        weights = need / need.sum() if need.sum() > 0 else sd["days"].to_numpy(dtype=float) * is_d / sd.loc[is_d, "days"].sum()
+        sd["bess_kwh"] = bess_total * weights
+        sd["grid_kwh"] = np.clip(grid_pre - sd["bess_kwh"].to_numpy(), 0.0, None)
+
+        slots = sd[c.tod_slot].astype(str)
+        sd["solar_rate"] = slots.map(self.rates.get("solar_rate_map", {}))
+        sd["wind_rate"] = slots.map(self.rates.get("wind_rate_map", {}))
+        sd["bess_rate"] = slots.map(self.rates.get("bess_rate_map", {}))
+        grid_map = self.rates.get("grid_rate_map")
+        sd["grid_rate"] = slots.map(grid_map) if isinstance(grid_map, dict) and grid_map else sd["grid_rate_excel"]
+
+        sd["re_percent"] = np.where(
+            sd["load_kwh"] > 0, 100.0 * (sd["load_kwh"] - sd["grid_kwh"]) / sd["load_kwh"], 0.0
+        )
+        for src in ["solar", "wind", "bess", "grid"]:
+            sd[f"{src}_cost_rs"] = sd[f"{src}_kwh"] * sd[f"{src}_rate"]
+        cost_cols = ["solar_cost_rs", "wind_cost_rs", "bess_cost_rs", "grid_cost_rs"]
+        sd["total_cost_rs"] = sd[cost_cols].sum(axis=1)
+
+        kwh_cols = ["load_kwh", "solar_kwh", "wind_kwh", "total_re_kwh", "excess_kwh", "bess_kwh", "grid_kwh"]
+        for col in kwh_cols + cost_cols + ["total_cost_rs"]:
+            sd[col] = sd[col].round(0)
+        for col in ["solar_rate", "wind_rate", "bess_rate", "grid_rate"]:
+            sd[col] = sd[col].round(2)
+        sd["re_percent"] = sd["re_percent"].round(1)
+
+        sd = sd.rename(columns={c.month: "month", c.tod_slot: "tod_slot"})
+        return sd[
+            ["month", "tod_slot", "days"] + kwh_cols + ["re_percent", "solar_rate", "wind_rate", "bess_rate", "grid_rate"]
+            + cost_cols + ["total_cost_rs"]
+        ]
+
+    @cached_property
+    def hourly(self) -> pd.DataFrame:
+        """Typical-day kW per (month, hour) before BESS; excess/grid are the hourly net positions."""
+        c = self.colmap
+        h = self.hourly_kw
+        load, re = h["load_kw"], h["total_re_kw"]
+        out = pd.DataFrame({
+            "month": pd.Categorical(h[c.month].astype(str), categories=MONTH_ORDER, ordered=True),
+            "hour": h[c.hour].to_numpy(),
+            "tod_slot": h[c.tod_slot].astype(str).to_numpy(),
+            "load_kw": load.to_numpy(),
+            "solar_kw": h["solar_kw"].to_numpy(),
+            "wind_kw": h["wind_kw"].to_numpy(),
+            "total_re_kw": re.to_numpy(),
+            "excess_kw": (re - load).clip(lower=0.0).to_numpy(),
+            "grid_kw": (load - re).clip(lower=0.0).to_numpy(),
+        })
+        return out.sort_values(["month", "hour"]).reset_index(drop=True)
+
+
 # -----------------------------
 # MAIN ENGINE
 # -----------------------------
@@ -82,8 +198,20 @@ def build_option_annual_table(
     rates: dict | None = None,
     colmap: ExcelColMap = ExcelColMap(),
 ) -> pd.DataFrame:
+    """Annual TOD table (A, C, B, D, Total); see build_option_result for the columns and rules."""
+    return build_option_result(model_df, sizing, rates, colmap).annual
+
+
+# span keeps the annual-table name so existing traces and benchmark baselines line up
+@traced("engine.build_option_annual_table", lambda res: frame_counts(res.annual))
+def build_option_result(
+    model_df: pd.DataFrame,
+    sizing: OptionSizing,
+    rates: dict | None = None,
+    colmap: ExcelColMap = ExcelColMap(),
+) -> OptionResult:
     """
-    Returns Annual TOD table with:
+    One engine pass -> OptionResult. Its .annual is the Annual TOD table with:
       Energy (kWh): load, solar, wind, total_re, excess, bess, grid
       Share (%): re_percent
       Rates (₹/kWh): solar_rate, wind_rate, bess_rate, grid_rate
@@ -172,13 +300,10 @@ def build_option_annual_table(
     # -----------------------------
     # BESS logic (Excel truth)
     # -----------------------------
-    bess_eff = 0.80
-    discharge_slot = "D"
-
-    bess_total_usable = float(annual["excess_kwh"].sum()) * bess_eff
+    bess_total_usable = float(annual["excess_kwh"].sum()) * BESS_EFF
 
     annual["bess_kwh"] = 0.0
-    annual.loc[annual[colmap.tod_slot] == discharge_slot, "bess_kwh"] = bess_total_usable
+    annual.loc[annual[colmap.tod_slot] == DISCHARGE_SLOT, "bess_kwh"] = bess_total_usable
 
     # Grid AFTER BESS
     annual["grid_kwh"] = (annual["grid_kwh"] - annual["bess_kwh"]).clip(lower=0.0)
@@ -282,4 +407,11 @@ def build_option_annual_table(
     ]
 
     # return only requested columns (if present)
-    return out[[c for c in cols if c in out.columns]]
+    return OptionResult(
+        annual=out[[c for c in cols if c in out.columns]],
+        sizing=sizing,
+        hourly_kw=df,
+        slot_daily=slot_daily,
+        rates=rates,
+        colmap=colmap,
+    )
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import math
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+
+from core.block_layout import fingerprint_from_parts
+from core.excel_timeseries import MONTHS
+
+STREAM_SUFFIXES = (".xlsx", ".xlsm")
+
+# Strings pandas.read_excel turns into NaN by default
+NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+_NA_TEXT = NA_STRINGS | frozenset(ERROR_CODES)
+
+
+def _cell(v):
+    """One cell as pandas.read_excel(engine="openpyxl") would give it."""
+    if v is None:
+        return math.nan
+    if type(v) is float:
+        i = int(v) if math.isfinite(v) else None
+        return i if i == v else v
+    if type(v) is str and v in _NA_TEXT:
+        return math.nan
+    return v
+
+
+def _row_width(row: tuple) -> int:
+    """Length of a row once trailing empty cells are dropped."""
+    n = len(row)
+    while n and (row[n - 1] is None or row[n - 1] == ""):
+        n -= 1
+    return n
+
+
+def _is_block_header(v) -> bool:
+    return isinstance(v, str) and (v in MONTHS or v.strip().lower() == "time")
+
+
+# -----------------------------
+# Streamed sheet
+# -----------------------------
+@dataclass(frozen=True)
+class StreamedSheet:
+    """
+    One worksheet read in a single read-only pass.
+
+    head holds the first `scan_rows` rows at full width (enough to find every block header
+    and title). Past that only columns 0..tail_width-1 are kept, where tail_width covers the
+    right-most Time/month header cell in the head; helper columns further right are dropped,
+    and so are rows left with nothing in the kept columns (tail is indexed by sheet row).
+    total_rows / width / anchors describe the whole sheet, as read_excel(header=None) sees it.
+    """
+    sheet: str
+    head: pd.DataFrame
+    tail: pd.DataFrame
+    total_rows: int
+    width: int
+    anchors: tuple[tuple[int, str], ...]   # (row, text) of column-0 text cells
+
+    def fingerprint(self, scan_rows: int = 300, lookback_rows: int = 4) -> str:
+        """Same key as block_layout.layout_fingerprint on the full grid."""
+        return fingerprint_from_parts(
+            self.sheet, (self.total_rows, self.width), list(self.anchors),
+            scan_rows=scan_rows, lookback_rows=lookback_rows,
+        )
+
+    def rows(self, start: int, stop: int) -> pd.DataFrame:
+        """Grid rows start:stop (0-based, header=None numbering) over the kept columns."""
+        n_head = len(self.head)
+        if stop <= n_head:
+            return self.head.iloc[start:stop]
+        idx = self.tail.index
+        tail = self.tail[(idx >= start) & (idx < stop)]
+        if start >= n_head:
+            return tail
+        return pd.concat([self.head.iloc[start:, : self.tail.shape[1]], tail])
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(f.memory_usage(deep=True, index=True).sum() for f in (self.head, self.tail)))
+
+
+def stream_sheet(xlsx_path: Path, sheet: str, scan_rows: int = 300) -> StreamedSheet:
+    """
+    Read one sheet with openpyxl in read-only mode, keeping only what block extraction needs.
+    Cell values are converted exactly like pandas.read_excel, so layouts and profiles match
+    the full-grid path.
+    """
+    return stream_sheets(xlsx_path, [sheet], scan_rows=scan_rows)[sheet]
+
+
+def stream_sheets(xlsx_path: Path, sheets: list[str] | None = None, scan_rows: int = 300) -> dict[str, StreamedSheet]:
+    """stream_sheet for several sheets (None = every worksheet), opening the workbook once."""
+    wb = load_workbook(Path(xlsx_path), read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheets is None:
+            # chartsheets have no cells
+            sheets = [ws.title for ws in wb.worksheets if hasattr(ws, "iter_rows")]
+        for sheet in sheets:
+            if sheet not in wb.sheetnames:
+                raise ValueError(f"Worksheet named '{sheet}' not found")
+        return {sheet: _stream_worksheet(wb[sheet], sheet, scan_rows) for sheet in sheets}
+    finally:
+        wb.close()
+
+
+def _stream_worksheet(ws, sheet: str, scan_rows: int) -> StreamedSheet:
+    ws.reset_dimensions()   # stored dimensions are often wrong; walk the actual rows
+
+    head: list[list] = []
+    tail: list[list] = []
+    tail_rows: list[int] = []
+    anchors: list[tuple[int, str]] = []
+    total_rows = width = 0
+    keep = None   # tail width, fixed once the head is read
+
+    for r, row in enumerate(ws.iter_rows(values_only=True)):
+        n = _row_width(row)
+        if n:
+            total_rows = r + 1
+            width = max(width, n)
+            first = row[0]
+            if type(first) is str and first not in _NA_TEXT:
+                anchors.append((r, first))
+
+        if r < scan_rows:
+            head.append([_cell(v) for v in row[:n]])
+            continue
+        if keep is None:
+            keep = _tail_width(head)
+        kept = [_cell(v) for v in row[: min(n, keep)]]
+        if any(v == v for v in kept):   # NaN != NaN
+            tail.append(kept)
+            tail_rows.append(r)
+
+    if keep is None:
+        keep = _tail_width(head)
+    head = head[:total_rows]
+
+    return StreamedSheet(
+        sheet=sheet,
+        head=_frame(head, width),
+        tail=_frame(tail, min(keep, width), index=tail_rows),
+        total_rows=total_rows,
+        width=width,
+        anchors=tuple(anchors),
+    )
+
+
+def _tail_width(head: list[list]) -> int:
+    """Columns a block can use past the head: up to the right-most Time/month header cell."""
+    right = -1
+    for row in head:
+        if any(isinstance(v, str) and v.strip().lower() == "time" for v in row):
+            for j, v in enumerate(row):
+                if j > right and _is_block_header(v):
+                    right = j
+    return right + 1
+
+
+def _frame(rows: list[list], width: int, index: list[int] | None = None) -> pd.DataFrame:
+    nan = math.nan
+    padded = [r + [nan] * (width - len(r)) if len(r) < width else r for r in rows]
+    return pd.DataFrame(padded, index=index, columns=range(width), dtype=object)
@@ -11,7 +11,33 @@ def extract_block_timeseries(
 ):
     # Read full sheet once (ok for now; later we can optimize with skiprows/nrows)
     full = pd.read_excel(xlsx_path, sheet_name=sheet, header=None)
+    return block_timeseries_from_grid(full, header_row, stop_row, value_name)
 
+
+def trim_block(full: pd.DataFrame, header_row: int, stop_row: int) -> pd.DataFrame:
+    """
+    Rows header_row:stop_row of a sheet grid, cut down to the columns
+    block_timeseries_from_grid keeps (first "Time" + month columns, first occurrence each).
+    The result extracts exactly like the full grid, at a fraction of the memory.
+    """
+    header = pd.Index(full.iloc[header_row].tolist())
+    first = ~header.duplicated()
+
+    keep, have_time = [], False
+    for j, c in enumerate(header):
+        if not first[j]:
+            continue
+        if isinstance(c, str) and c.strip().lower() == "time":
+            if not have_time:
+                keep.append(j)
+                have_time = True
+        elif c in MONTHS:
+            keep.append(j)
+    return full.iloc[header_row:stop_row, keep]
+
+
+def block_timeseries_from_grid(full: pd.DataFrame, header_row: int, stop_row: int, value_name: str) -> pd.DataFrame:
+    """extract_block_timeseries on a sheet that is already read (header=None)."""
     raw = full.iloc[header_row:stop_row].copy()
 
     # First row is header
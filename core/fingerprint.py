@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+_CHUNK = 1 << 20
+
+
+def bytes_fingerprint(data: bytes | memoryview) -> str:
+    """sha256 hex digest of raw workbook bytes (e.g. a Streamlit upload)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_fingerprint(path: Path) -> str:
+    """sha256 hex digest of a file's contents, streamed in 1 MB chunks."""
+    h = hashlib.sha256()
+    with open(Path(path), "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
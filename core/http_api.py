@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from core.batch_engine import CompiledModel, SOLAR_MODES, compile_model, evaluate_batch
+from core.fingerprint import file_fingerprint
+from core.instrumentation import prometheus_text
+from core.model_bundle import BUNDLE_SUFFIX, build_base_model, load_model_bundle
+from core.model_cache import ModelCache
+from core.scenario_io import json_ready, parse_scenario
+
+MAX_BODY_BYTES = 16 * 1024 * 1024          # JSON bodies, held in memory
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024       # octet-stream workbooks, streamed to a temp file
+UPLOAD_CHUNK = 1 << 20
+KEEPALIVE_TIMEOUT_S = 15.0
+LATENCY_WINDOW = 10_000
+WORKBOOK_SUFFIXES = (".xlsx", ".xls")
+
+
+# -----------------------------
+# Warm model pool
+# -----------------------------
+class ModelPool:
+    """Compiled models kept warm by workbook fingerprint (LRU, byte budget)."""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, sheet: str = "Data", models_dir: Path | None = None):
+        self.cache = ModelCache(max_bytes=max_bytes)
+        self.sheet = sheet
+        self.models_dir = Path(models_dir).resolve() if models_dir else None
+
+    def resolve_request_path(self, path: str) -> Path:
+        """
+        Map a client-supplied path onto a workbook inside models_dir.
+
+        Requests may only name .xlsx/.xls files under the configured directory;
+        bundles are pickles and are only loaded from --preload, never on request.
+        """
+        if self.models_dir is None:
+            raise PermissionError("path registration is disabled (start the server with --models-dir)")
+        resolved = (self.models_dir / path).resolve()
+        if not resolved.is_relative_to(self.models_dir):
+            raise PermissionError(f"path outside the models directory: {path}")
+        if resolved.suffix.lower() not in WORKBOOK_SUFFIXES:
+            raise PermissionError(f"only workbooks ({', '.join(WORKBOOK_SUFFIXES)}) can be registered by path")
+        return resolved
+
+    def register_path(self, path: Path) -> tuple[str, CompiledModel]:
+        """Register a trusted local workbook or bundle (startup preload; never called with request input)."""
+        path = Path(path)
+        if path.suffix == BUNDLE_SUFFIX:
+            model_df, meta = load_model_bundle(path)
+            fp = meta.get("workbook_fp") or file_fingerprint(path)
+            return fp, self.cache.get_or_load(fp, lambda: compile_model(model_df))
+
+        fp = file_fingerprint(path)
+        return fp, self.cache.get_or_load(fp, lambda: compile_model(build_base_model(path, sheet=self.sheet)))
+
+    def register_stream(self, chunks, suffix: str = ".xlsx") -> tuple[str, CompiledModel]:
+        """
+        Register workbook bytes arriving in chunks (an upload body).
+
+        The chunks are spooled to a temp file while hashing, so the fingerprint matches
+        bytes_fingerprint/file_fingerprint without holding the workbook in memory.
+        """
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    h.update(chunk)
+                    f.write(chunk)
+            fp = h.hexdigest()
+            return fp, self.cache.get_or_load(fp, lambda: compile_model(build_base_model(Path(tmp), sheet=self.sheet)))
+        finally:
+            os.unlink(tmp)
+
+    def get(self, fingerprint: str) -> CompiledModel | None:
+        return self.cache.get(fingerprint)
+
+
+# -----------------------------
+# Latency tracking
+# -----------------------------
+class LatencyStats:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+        self._counts: dict[str, int] = {}
+        self._window = window
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = {k: np.array(v) for k, v in self._samples.items()}
+            counts = dict(self._counts)
+        out = {}
+        for k, arr in items.items():
+            out[k] = {
+                "count": counts[k],
+                "p50_ms": float(np.percentile(arr, 50) * 1000.0),
+                "p99_ms": float(np.percentile(arr, 99) * 1000.0),
+                "max_ms": float(arr.max() * 1000.0),
+            }
+        return out
+
+
+# -----------------------------
+# Request handling
+# -----------------------------
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _totals_records(result, ids: list[str]) -> list[dict]:
+    totals = result.totals_frame()
+    recs = []
+    for i, sid in enumerate(ids):
+        rec = {"scenario_id": sid}
+        rec.update({k: json_ready(v) for k, v in totals.iloc[i].items()})
+        recs.append(rec)
+    return recs
+
+
+def _annual_records(result, i: int) -> list[dict]:
+    rows = result.annual_table(i).to_dict("records")
+    return [{k: json_ready(v) for k, v in r.items()} for r in rows]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server: "ApiServer"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # small JSON replies; don't wait on delayed ACKs
+    # socket timeout: an idle keep-alive connection holds a pool worker, so drop it after this long
+    timeout = KEEPALIVE_TIMEOUT_S
+
+    # quiet default access log; latency lives in /stats
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: dict | str) -> None:
+        if isinstance(payload, str):
+            body, ctype = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, ctype = json.dumps(payload).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _content_type(self) -> str:
+        return (self.headers.get("Content-Type") or "").split(";")[0].strip()
+
+    def _content_length(self, limit: int) -> int:
+        n = int(self.headers.get("Content-Length") or 0)
+        if n > limit:
+            # body stays unread, so this connection can't be reused
+            self.close_connection = True
+            raise ApiError(413, f"body larger than {limit} bytes")
+        return n
+
+    def _read_body(self) -> bytes:
+        n = self._content_length(MAX_BODY_BYTES)
+        return self.rfile.read(n) if n else b""
+
+    def _body(self) -> bytes:
+        return self._raw_body
+
+    def _stream_body(self):
+        """Yield an octet-stream body in UPLOAD_CHUNK pieces (left unread by _dispatch)."""
+        while self._unread > 0:
+            chunk = self.rfile.read(min(UPLOAD_CHUNK, self._unread))
+            if not chunk:
+                raise ApiError(400, "body shorter than Content-Length")
+            self._unread -= len(chunk)
+            yield chunk
+
+    def _json(self) -> dict:
+        try:
+            data = json.loads(self._body() or b"{}")
+        except ValueError as e:
+            raise ApiError(400, f"invalid JSON: {e}") from None
+        if not isinstance(data, dict):
+            raise ApiError(400, "expected a JSON object")
+        return data
+
+    def _dispatch(self, method: str) -> None:
+        t0 = time.perf_counter()
+        route = self.path.split("?", 1)[0].rstrip("/") or "/"
+        self._raw_body = b""
+        self._unread = 0
+        try:
+            # JSON bodies are read up front so keep-alive connections stay in sync;
+            # workbook uploads are left for the route to stream
+            if self._content_type() == "application/octet-stream":
+                self._unread = self._content_length(MAX_UPLOAD_BYTES)
+            else:
+                self._raw_body = self._read_body()
+            handler = ROUTES.get((method, route))
+            if handler is None:
+                raise ApiError(404, f"no route {method} {route}")
+            status, payload = handler(self)
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except (KeyError, ValueError) as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        if self._unread:
+            self.close_connection = True
+        self._send(status, payload)
+        self.server.latency.record(f"{method} {route}", time.perf_counter() - t0)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+def _h_health(h: ApiHandler):
+    return 200, {"status": "ok"}
+
+
+def _h_stats(h: ApiHandler):
+    cs = h.server.pool.cache.stats()
+    return 200, {
+        "latency": h.server.latency.snapshot(),
+        "models": {
+            "entries": cs.entries, "bytes_used": cs.bytes_used, "max_bytes": cs.max_bytes,
+            "hits": cs.hits, "misses": cs.misses, "evictions": cs.evictions,
+        },
+        "workers": h.server.workers,
+    }
+
+
+def _h_metrics(h: ApiHandler):
+    """Span counters (HYBRID_RE_TRACE=1) in Prometheus text format."""
+    return 200, prometheus_text()
+
+
+def _h_register(h: ApiHandler):
+    """
+    Register a workbook and keep its compiled model warm.
+      JSON {"path": "<.xlsx/.xls relative to --models-dir>"}  or  raw workbook bytes
+      (Content-Type: application/octet-stream, optional ?suffix=.xls).
+    """
+    if h._content_type() == "application/octet-stream":
+        query = parse_qs(urlsplit(h.path).query)
+        suffix = query.get("suffix", [".xlsx"])[0]
+        if suffix not in WORKBOOK_SUFFIXES:
+            raise ApiError(400, f"unsupported suffix {suffix!r} (use .xlsx or .xls)")
+        if not h._unread:
+            raise ApiError(400, "empty workbook body")
+        fp, compiled = h.server.pool.register_stream(h._stream_body(), suffix=suffix)
+    else:
+        path = h._json().get("path")
+        if not path:
+            raise ApiError(400, "expected {'path': ...} or an application/octet-stream workbook body")
+        try:
+            resolved = h.server.pool.resolve_request_path(str(path))
+        except PermissionError as e:
+            raise ApiError(403, str(e)) from None
+        if not resolved.is_file():
+            raise ApiError(404, f"file not found: {path}")
+        fp, compiled = h.server.pool.register_path(resolved)
+
+    return 200, {"fingerprint": fp, "solar_modes": [m for m in SOLAR_MODES if m in compiled.solar]}
+
+
+def _evaluate(h: ApiHandler):
+    req = h._json()
+    fp = req.get("fingerprint")
+    compiled = h.server.pool.get(fp) if fp else None
+    if compiled is None:
+        raise ApiError(404, f"unknown model fingerprint {fp!r}; POST /models first")
+
+    scenarios = req.get("scenarios")
+    if scenarios is None and ("sizing" in req or "rates" in req):
+        scenarios = [req]
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ApiError(400, "expected 'scenarios': [{'sizing': {...}, 'rates': {...}}, ...]")
+
+    parsed = [parse_scenario(rec, i) for i, rec in enumerate(scenarios)]
+    ids = [p[0] for p in parsed]
+    result = evaluate_batch(compiled, [p[1] for p in parsed], [p[2] for p in parsed], carbon=False)
+    return ids, result
+
+
+def _h_evaluate(h: ApiHandler):
+    ids, result = _evaluate(h)
+    results = _totals_records(result, ids)
+    for i, rec in enumerate(results):
+        rec["annual"] = _annual_records(result, i)
+    return 200, {"results": results}
+
+
+def _h_totals(h: ApiHandler):
+    ids, result = _evaluate(h)
+    return 200, {"results": _totals_records(result, ids)}
+
+
+ROUTES = {
+    ("GET", "/health"): _h_health,
+    ("GET", "/stats"): _h_stats,
+    ("GET", "/metrics"): _h_metrics,
+    ("POST", "/models"): _h_register,
+    ("POST", "/evaluate"): _h_evaluate,
+    ("POST", "/totals"): _h_totals,
+}
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class ApiServer(HTTPServer):
+    """HTTPServer that serves requests from a fixed-size worker pool."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], pool: ModelPool, workers: int = 8):
+        super().__init__(address, ApiHandler)
+        self.pool = pool
+        self.workers = int(workers)
+        self.latency = LatencyStats()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hre-api")
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = 8, model_cache_mb: int = 256,
+          preload: list[Path] | None = None, sheet: str = "Data", models_dir: Path | None = None) -> None:
+    pool = ModelPool(max_bytes=model_cache_mb * 1024 * 1024, sheet=sheet, models_dir=models_dir)
+    for p in preload or []:
+        fp, _ = pool.register_path(Path(p))
+        print(f"preloaded {p} -> {fp}", flush=True)
+
+    httpd = ApiServer((host, port), pool, workers=workers)
+    print(f"serving on http://{host}:{httpd.server_address[1]} ({workers} workers)", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
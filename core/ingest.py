@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from glob import glob, has_magic
+from pathlib import Path
+from typing import Callable, Iterable
+import hashlib
+import json
+import os
+import time
+
+from core.block_layout import LAYOUT_VERSION
+from core.block_rules import rules_fingerprint
+from core.fingerprint import file_fingerprint
+from core.model_bundle import BUNDLE_FORMAT, BUNDLE_SUFFIX, build_base_model, load_model_bundle, save_model_bundle
+
+WORKBOOK_SUFFIXES = (".xlsx", ".xlsm", ".xls")
+MODELS_DIR = "models"
+INGEST_LOG = "ingest.jsonl"     # append-only, one record per processed workbook (resume state)
+INDEX_FILE = "index.json"       # site -> fingerprint -> profiles, rebuilt from the log
+OK = "ok"
+CACHED = "cached"               # same bytes already bundled (another path or an earlier run)
+ERROR = "error"
+_NON_PROFILE = {"month", "hour", "tod_slot"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# -----------------------------
+# Inputs
+# -----------------------------
+def _is_workbook(path: Path) -> bool:
+    # "~$name.xlsx" are Excel lock files left next to open workbooks
+    return path.is_file() and path.suffix.lower() in WORKBOOK_SUFFIXES and not path.name.startswith("~$")
+
+
+def _glob_root(pattern: str) -> Path:
+    parts = []
+    for part in Path(pattern).parts:
+        if has_magic(part):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path(".")
+
+
+def _site_name(path: Path, root: Path) -> str:
+    try:
+        rel = path.relative_to(root)
+    except ValueError:
+        rel = Path(path.name)
+    return rel.with_suffix("").as_posix()
+
+
+def find_workbooks(inputs: Iterable[str | Path]) -> list[tuple[str, Path]]:
+    """
+    Directories (searched recursively), glob patterns and plain files -> sorted (site, path).
+    The site name is the path relative to the directory / glob root, without the suffix,
+    so per-site folders holding identically named workbooks stay distinct.
+    """
+    found: dict[Path, str] = {}
+    for item in inputs:
+        item = str(item)
+        if has_magic(item):
+            root = _glob_root(item)
+            paths = [Path(p) for p in glob(item, recursive=True)]
+        elif Path(item).is_dir():
+            root = Path(item)
+            paths = list(root.rglob("*"))
+        else:
+            root = Path(item).parent
+            paths = [Path(item)]
+            if not Path(item).exists():
+                raise FileNotFoundError(f"No such workbook or directory: {item}")
+        for p in paths:
+            if _is_workbook(p):
+                found.setdefault(p.resolve(), _site_name(p, root))
+
+    by_site: dict[str, list[Path]] = {}
+    for path, site in found.items():
+        by_site.setdefault(site, []).append(path)
+    clashes = {s: ps for s, ps in by_site.items() if len(ps) > 1}
+    if clashes:
+        detail = "; ".join(f"{s}: {', '.join(map(str, ps))}" for s, ps in sorted(clashes.items()))
+        raise ValueError(f"Several workbooks map to the same site name ({detail}). Pass their parent directory instead.")
+
+    return sorted(((site, path) for path, site in found.items()), key=lambda t: t[0])
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+def parse_tag(sheet: str) -> str:
+    """
+    Short id for how a workbook was parsed: sheet, block detection (LAYOUT_VERSION),
+    the active title rules (RULES_VERSION + rule-file hash) and bundle format.
+    """
+    key = json.dumps([sheet, LAYOUT_VERSION, rules_fingerprint(), BUNDLE_FORMAT])
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+def bundle_path(out_dir: Path, fingerprint: str, sheet: str = "Data") -> Path:
+    """
+    Content-addressed bundle location: identical workbooks parsed the same way share one
+    model; another sheet, a detection change or a rule-file edit gets its own bundle.
+    """
+    return Path(out_dir) / MODELS_DIR / f"{fingerprint[:24]}-{parse_tag(sheet)}{BUNDLE_SUFFIX}"
+
+
+def ingest_workbook(site: str, path: str, out_dir: str, sheet: str = "Data") -> dict:
+    """
+    Parse one workbook into the model cache. Never raises: failures come back as an
+    "error" record so one bad file does not stop the batch.
+    """
+    t0 = time.perf_counter()
+    src = Path(path)
+    rec = {
+        "site": site, "source": str(src), "sheet": sheet,
+        "layout_version": LAYOUT_VERSION, "rules": rules_fingerprint(), "finished_at": None,
+    }
+    try:
+        st = src.stat()
+        rec.update(size=st.st_size, mtime=st.st_mtime)
+        fp = file_fingerprint(src)
+        out = bundle_path(Path(out_dir), fp, sheet)
+        if out.exists():
+            model_df, _ = load_model_bundle(out)
+            status = CACHED
+        else:
+            model_df = build_base_model(src, sheet=sheet)
+            save_model_bundle(model_df, out, workbook_fp=fp, source=str(src))
+            status = OK
+        rec.update(
+            status=status,
+            fingerprint=fp,
+            bundle=str(out.relative_to(out_dir)),
+            profiles=[c for c in model_df.columns if c not in _NON_PROFILE],
+            rows=int(len(model_df)),
+        )
+    except Exception as e:
+        rec.update(status=ERROR, error=f"{type(e).__name__}: {e}")
+    rec["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    rec["finished_at"] = _now()
+    return rec
+
+
+# -----------------------------
+# Log / index
+# -----------------------------
+def read_ingest_log(out_dir: Path) -> dict[str, dict]:
+    """Latest record per source path (a torn last line from a killed run is ignored)."""
+    log = Path(out_dir) / INGEST_LOG
+    latest: dict[str, dict] = {}
+    if not log.exists():
+        return latest
+    with open(log, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            latest[rec["source"]] = rec
+    return latest
+
+
+def _up_to_date(rec: dict | None, path: Path, out_dir: Path, sheet: str, retry_failed: bool) -> bool:
+    if rec is None:
+        return False
+    if rec.get("sheet") != sheet or rec.get("layout_version") != LAYOUT_VERSION:
+        return False
+    if rec.get("rules") != rules_fingerprint():
+        return False
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    if rec.get("size") != st.st_size or rec.get("mtime") != st.st_mtime:
+        return False
+    if rec["status"] == ERROR:
+        return not retry_failed
+    return (Path(out_dir) / rec["bundle"]).exists()
+
+
+def build_index(records: Iterable[dict]) -> dict:
+    """
+    {"sites": {site: {fingerprint: {profiles, bundle, source, ...}}}, "errors": {site: {...}}}.
+    A site keeps every fingerprint it has been ingested with (one per delivered revision).
+    """
+    sites: dict[str, dict] = {}
+    errors: dict[str, dict] = {}
+    for rec in records:
+        site = rec["site"]
+        if rec["status"] == ERROR:
+            errors[site] = {"source": rec["source"], "error": rec["error"], "finished_at": rec["finished_at"]}
+            continue
+        errors.pop(site, None)
+        sites.setdefault(site, {})[rec["fingerprint"]] = {
+            "profiles": rec["profiles"],
+            "bundle": rec["bundle"],
+            "source": rec["source"],
+            "sheet": rec["sheet"],
+            "rows": rec["rows"],
+            "ingested_at": rec["finished_at"],
+        }
+    return {
+        "generated_at": _now(),
+        "sites": dict(sorted(sites.items())),
+        "errors": dict(sorted(errors.items())),
+    }
+
+
+def write_index(out_dir: Path) -> Path:
+    out = Path(out_dir) / INDEX_FILE
+    records = sorted(read_ingest_log(out_dir).values(), key=lambda r: r["finished_at"] or "")
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps(build_index(records), indent=2), encoding="utf-8")
+    tmp.replace(out)
+    return out
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+@dataclass(frozen=True)
+class IngestSummary:
+    total: int
+    skipped: int
+    ok: int
+    cached: int
+    failed: int
+    elapsed_s: float
+    index_path: Path
+
+
+def run_ingest(
+    workbooks: list[tuple[str, Path]],
+    out_dir: Path,
+    sheet: str = "Data",
+    workers: int | None = None,
+    retry_failed: bool = False,
+    progress: Callable[[dict, int, int], None] | None = None,
+) -> IngestSummary:
+    """
+    Ingest workbooks into out_dir (bundles under models/, ingest.jsonl, index.json),
+    one workbook per pool task. Each finished workbook is appended to the log right away,
+    so an interrupted run resumes with the files it had not reached; unchanged files
+    (same size and mtime, same sheet, LAYOUT_VERSION and block rules) that were already ingested,
+    or already failed, are skipped.
+    """
+    out_dir = Path(out_dir)
+    (out_dir / MODELS_DIR).mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+
+    previous = read_ingest_log(out_dir)
+    todo = [
+        (site, path) for site, path in workbooks
+        if not _up_to_date(previous.get(str(path)), path, out_dir, sheet, retry_failed)
+    ]
+    counts = {OK: 0, CACHED: 0, ERROR: 0}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo) or 1))
+
+    with open(out_dir / INGEST_LOG, "a", encoding="utf-8") as log:
+        def _record(rec: dict) -> None:
+            log.write(json.dumps(rec) + "\n")
+            log.flush()
+            counts[rec["status"]] += 1
+            if progress is not None:
+                progress(rec, sum(counts.values()), len(todo))
+
+        if workers == 1:
+            for site, path in todo:
+                _record(ingest_workbook(site, str(path), str(out_dir), sheet))
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            try:
+                futures = [pool.submit(ingest_workbook, site, str(path), str(out_dir), sheet) for site, path in todo]
+                for fut in as_completed(futures):
+                    _record(fut.result())
+            except BaseException:
+                # Ctrl-C: drop queued workbooks; everything logged so far is kept for the resume
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            pool.shutdown()
+
+    index_path = write_index(out_dir)
+    return IngestSummary(
+        total=len(workbooks),
+        skipped=len(workbooks) - len(todo),
+        ok=counts[OK],
+        cached=counts[CACHED],
+        failed=counts[ERROR],
+        elapsed_s=time.perf_counter() - t0,
+        index_path=index_path,
+    )
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable
+import json
+import os
+import threading
+import time
+
+# HYBRID_RE_TRACE=1 turns spans on at import; HYBRID_RE_TRACE_FILE also appends them as JSON lines
+TRACE_ENV = "HYBRID_RE_TRACE"
+TRACE_FILE_ENV = "HYBRID_RE_TRACE_FILE"
+RING_SIZE = 4096
+METRIC_PREFIX = "hre_span"
+
+
+# -----------------------------
+# Spans
+# -----------------------------
+class Span:
+    """One timed stage. Attach counters with set(rows=..., bytes=...) while it is open."""
+
+    __slots__ = ("name", "attrs", "parent", "depth", "start", "duration_s", "thread", "_t0")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.parent: str | None = None
+        self.depth = 0
+        self.start = 0.0
+        self.duration_s = 0.0
+        self.thread = ""
+        self._t0 = 0.0
+
+    def set(self, **attrs: Any) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self) -> "Span":
+        stack = _stack()
+        if stack:
+            self.parent = stack[-1].name
+            self.depth = len(stack)
+        stack.append(self)
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration_s = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        _RECORDER.record(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "ms": self.duration_s * 1000.0,
+            "parent": self.parent,
+            "depth": self.depth,
+            "thread": self.thread,
+            **self.attrs,
+        }
+
+
+class _NoSpan:
+    """Shared stand-in while tracing is off: entering, exiting and set() do nothing."""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> "_NoSpan":
+        return self
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+_local = threading.local()
+
+
+def _stack() -> list[Span]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# -----------------------------
+# Recorder: ring buffer, JSON lines, aggregates
+# -----------------------------
+@dataclass
+class SpanTotals:
+    count: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+
+class _Recorder:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._ring: deque[dict] = deque(maxlen=RING_SIZE)
+        self._totals: dict[str, SpanTotals] = {}
+        self._jsonl = None   # open line-buffered file while a JSON-lines sink is configured
+
+    def configure(self, enabled: bool, jsonl_path: Path | None, ring_size: int) -> None:
+        with self._lock:
+            self.enabled = bool(enabled)
+            if self._jsonl is not None:
+                self._jsonl.close()
+            self._jsonl = open(Path(jsonl_path), "a", buffering=1, encoding="utf-8") if jsonl_path else None
+            if ring_size != self._ring.maxlen:
+                self._ring = deque(self._ring, maxlen=int(ring_size))
+
+    def record(self, span: Span) -> None:
+        rec = span.to_dict()
+        line = json.dumps(rec, default=str) if self._jsonl is not None else None
+        with self._lock:
+            self._ring.append(rec)
+            t = self._totals.get(span.name)
+            if t is None:
+                t = self._totals[span.name] = SpanTotals()
+            t.count += 1
+            t.errors += "error" in span.attrs
+            t.seconds += span.duration_s
+            t.max_seconds = max(t.max_seconds, span.duration_s)
+            t.rows += int(span.attrs.get("rows", 0) or 0)
+            t.bytes += int(span.attrs.get("bytes", 0) or 0)
+            if line is not None:
+                self._jsonl.write(line + "\n")
+
+    def recent(self, n: int | None) -> list[dict]:
+        with self._lock:
+            items = list(self._ring)
+        return items if n is None else items[-n:]
+
+    def totals(self) -> dict[str, SpanTotals]:
+        with self._lock:
+            return {k: SpanTotals(**vars(v)) for k, v in self._totals.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ring.clear()
+            self._totals.clear()
+
+
+_RECORDER = _Recorder()
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def configure(enabled: bool = True, jsonl_path: Path | None = None, ring_size: int = RING_SIZE) -> None:
+    """Turn spans on/off; jsonl_path additionally appends every finished span as one JSON line."""
+    _RECORDER.configure(enabled, jsonl_path, ring_size)
+
+
+def enabled() -> bool:
+    return _RECORDER.enabled
+
+
+def span(name: str, **attrs: Any) -> Span | _NoSpan:
+    """
+    Time a stage:
+        with span("excel.read", sheet=sheet) as sp:
+            ...
+            sp.set(rows=len(df), bytes=nbytes)
+    Costs one attribute lookup when tracing is off.
+    """
+    if not _RECORDER.enabled:
+        return _NO_SPAN
+    return Span(name, attrs)
+
+
+def traced(name: str, counts: Callable[[Any], dict] | None = None):
+    """
+    Decorator form of span(). counts(result) may return rows/bytes (or other attributes)
+    to attach once the call returns; it only runs while tracing is on, and if it
+    raises, the error is recorded as a counts_error attribute instead of failing the call.
+    """
+    def deco(fn):
+        @wraps(fn)
+        def run(*args, **kwargs):
+            if not _RECORDER.enabled:
+                return fn(*args, **kwargs)
+            with Span(name, {}) as sp:
+                out = fn(*args, **kwargs)
+                if counts is not None:
+                    try:
+                        sp.set(**counts(out))
+                    except Exception as e:
+                        sp.set(counts_error=f"{type(e).__name__}: {e}")
+                return out
+
+        return run
+
+    return deco
+
+
+def frame_counts(df) -> dict:
+    """rows/bytes of a DataFrame result (column buffers only; DataFrame.memory_usage costs ms)."""
+    return {"rows": int(len(df)), "bytes": int(sum(col.array.nbytes for _, col in df.items()))}
+
+
+def recent_spans(n: int | None = 200) -> list[dict]:
+    """Latest finished spans from the in-process ring buffer (oldest first)."""
+    return _RECORDER.recent(n)
+
+
+def span_totals() -> dict[str, SpanTotals]:
+    return _RECORDER.totals()
+
+
+def reset_spans() -> None:
+    _RECORDER.reset()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Aggregated span counters in the Prometheus text exposition format."""
+    totals = _RECORDER.totals()
+    metrics = [
+        ("count_total", "counter", "Finished spans", lambda t: t.count),
+        ("errors_total", "counter", "Spans that ended with an exception", lambda t: t.errors),
+        ("seconds_total", "counter", "Wall time spent in spans", lambda t: t.seconds),
+        ("seconds_max", "gauge", "Slowest single span", lambda t: t.max_seconds),
+        ("rows_total", "counter", "Rows reported by spans", lambda t: t.rows),
+        ("bytes_total", "counter", "Bytes reported by spans", lambda t: t.bytes),
+    ]
+    lines = []
+    for suffix, kind, help_text, get in metrics:
+        metric = f"{METRIC_PREFIX}_{suffix}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name in sorted(totals):
+            lines.append(f'{metric}{{span="{_label(name)}"}} {get(totals[name]):.9g}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path) -> Path:
+    """Dump prometheus_text() atomically (for a node_exporter textfile collector)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(prometheus_text(), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+if os.environ.get(TRACE_ENV, "").strip().lower() in ("1", "true", "yes", "on") or os.environ.get(TRACE_FILE_ENV):
+    configure(True, jsonl_path=os.environ.get(TRACE_FILE_ENV) or None)
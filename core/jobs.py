@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, Future, wait
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+import json
+import multiprocessing as mp
+import os
+import pickle
+import shutil
+import socket
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from core.batch_engine import CompiledModel, SizingArrays, evaluate_batch
+from core.excel_option_engine import OptionSizing
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"   # owning process went away mid-run; resume() picks it up
+FINAL_STATES = {DONE, FAILED, CANCELLED}
+
+# a live owner touches status.json at least this often; older than STALE_AFTER_S means it is gone
+HEARTBEAT_S = 10.0
+STALE_AFTER_S = 120.0
+
+# per-worker-process cache of compiled models (path -> model), least recently used first
+_WORKER_MODELS: OrderedDict[str, CompiledModel] = OrderedDict()
+WORKER_MODEL_CACHE_SIZE = 2
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    tmp.replace(path)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True   # os.kill(pid, 0) terminates on Windows; rely on the heartbeat there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+def _run_chunk(model_path: str, chunk_path: str, part_path: str) -> int:
+    """Evaluate one checkpointed chunk and write its part file atomically."""
+    compiled = _WORKER_MODELS.get(model_path)
+    if compiled is None:
+        with open(model_path, "rb") as f:
+            compiled = pickle.load(f)
+        _WORKER_MODELS[model_path] = compiled
+        while len(_WORKER_MODELS) > WORKER_MODEL_CACHE_SIZE:
+            _WORKER_MODELS.popitem(last=False)
+    else:
+        _WORKER_MODELS.move_to_end(model_path)
+
+    with open(chunk_path, "rb") as f:
+        ids, sizings, rates = pickle.load(f)
+
+    result = evaluate_batch(compiled, sizings, rates, carbon=False)
+    part = Path(part_path)
+    tmp = part.with_name(part.name + ".tmp")
+    result.long_frame(ids).to_csv(tmp, index=False)
+    tmp.replace(part)
+    return len(ids)
+
+
+# -----------------------------
+# Status
+# -----------------------------
+@dataclass
+class JobStatus:
+    job_id: str
+    label: str
+    state: str
+    total: int
+    done: int
+    n_chunks: int
+    created_at: str
+    updated_at: str
+    error: str | None = None
+    owner_pid: int | None = None
+    owner_host: str | None = None
+
+    @property
+    def progress(self) -> float:
+        return 100.0 * self.done / self.total if self.total else 100.0
+
+    def owner_alive(self) -> bool:
+        """True while the process driving this job still exists and keeps its heartbeat fresh."""
+        if self.owner_pid is None:
+            return False
+        try:
+            age = (datetime.now(timezone.utc) - datetime.fromisoformat(self.updated_at)).total_seconds()
+        except ValueError:
+            return False
+        if age > STALE_AFTER_S:
+            return False
+        if self.owner_host != socket.gethostname():
+            return True   # can't probe a PID on another host; the heartbeat decides
+        return _pid_alive(self.owner_pid)
+
+
+# -----------------------------
+# Manager
+# -----------------------------
+class JobManager:
+    """
+    Background jobs for long sweeps / Monte Carlo runs.
+
+    Engine work runs in a process pool. Inputs, per-chunk checkpoints and status
+    live under root/<job_id>/, so status polling is a small file read, finished
+    chunks survive restarts, and resume() only recomputes missing chunks.
+    """
+
+    def __init__(self, root: Path, max_workers: int = 2):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_workers = int(max_workers)
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._cancel: dict[str, threading.Event] = {}
+        self._futures: dict[str, list[Future]] = {}
+
+        # jobs whose owning process died (or stopped heartbeating) cannot still be running;
+        # jobs driven by another live process sharing this root are left alone
+        for st in self.list_jobs():
+            if st.state in (QUEUED, RUNNING) and not st.owner_alive():
+                self._update(st.job_id, state=INTERRUPTED)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: safe to start from threaded hosts like Streamlit
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("spawn"))
+            return self._pool
+
+    def _dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def _update(self, job_id: str, **changes) -> JobStatus:
+        path = self._dir(job_id) / "status.json"
+        with self._lock:
+            data = json.loads(path.read_text())
+            data.update(changes)
+            data["updated_at"] = _now()
+            _write_json(path, data)
+        return JobStatus(**data)
+
+    # -----------------------------
+    # Submit / run
+    # -----------------------------
+    def submit(
+        self,
+        compiled: CompiledModel,
+        sizings: Sequence[OptionSizing] | SizingArrays,
+        rates: dict | Sequence[dict | None] | None = None,
+        scenario_ids: Sequence | None = None,
+        chunk_size: int = 5000,
+        label: str = "",
+    ) -> str:
+        """
+        Queue N scenarios (one rate dict shared, or one per scenario). Returns the job id.
+        Large sweeps should pass SizingArrays (sizing_grid) and array ids: chunks are then
+        written as array slices, never as per-scenario objects.
+        """
+        n = len(sizings)
+        shared = rates is None or isinstance(rates, dict)
+        ids = np.asarray(scenario_ids) if scenario_ids is not None else np.arange(n)
+        if (not shared and len(rates) != n) or len(ids) != n:
+            n_rates = n if shared else len(rates)
+            raise ValueError(f"sizings ({n}), rates ({n_rates}) and scenario_ids ({len(ids)}) must match")
+
+        job_id = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        d = self._dir(job_id)
+        (d / "chunks").mkdir(parents=True)
+        (d / "parts").mkdir()
+
+        with open(d / "model.pkl", "wb") as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        n_chunks = 0
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            with open(d / "chunks" / f"{n_chunks:05d}.pkl", "wb") as f:
+                chunk = sizings[start:stop] if isinstance(sizings, SizingArrays) else list(sizings[start:stop])
+                pickle.dump((ids[start:stop], chunk, rates if shared else list(rates[start:stop])), f)
+            n_chunks += 1
+
+        status = JobStatus(
+            job_id=job_id, label=label, state=QUEUED, total=n, done=0,
+            n_chunks=n_chunks, created_at=_now(), updated_at=_now(),
+            owner_pid=os.getpid(), owner_host=socket.gethostname(),
+        )
+        _write_json(d / "status.json", asdict(status))
+        self._start(job_id)
+        return job_id
+
+    def resume(self, job_id: str) -> None:
+        """Restart an interrupted/failed job; finished chunks are kept."""
+        st = self.status(job_id)
+        if st.state in (QUEUED, RUNNING) and (job_id in self._cancel or st.owner_alive()):
+            return
+        self._update(job_id, state=QUEUED, error=None, owner_pid=os.getpid(), owner_host=socket.gethostname())
+        self._start(job_id)
+
+    def _start(self, job_id: str) -> None:
+        cancel = threading.Event()
+        self._cancel[job_id] = cancel
+        threading.Thread(target=self._drive, args=(job_id, cancel), daemon=True, name=f"job-{job_id}").start()
+
+    def _drive(self, job_id: str, cancel: threading.Event) -> None:
+        d = self._dir(job_id)
+        st = self.status(job_id)
+        pool = self._get_pool()
+
+        todo, done = [], 0
+        for i in range(st.n_chunks):
+            part = d / "parts" / f"{i:05d}.csv"
+            if part.exists():
+                with open(part) as f:
+                    done += sum(1 for _ in f) // 5   # header + 5 rows (A, C, B, D, Total) per scenario
+            else:
+                todo.append(i)
+
+        self._update(job_id, state=RUNNING, done=done)
+        futures = [
+            pool.submit(_run_chunk, str(d / "model.pkl"), str(d / "chunks" / f"{i:05d}.pkl"), str(d / "parts" / f"{i:05d}.csv"))
+            for i in todo
+        ]
+        self._futures[job_id] = futures
+
+        try:
+            for fut in futures:
+                while not cancel.is_set() and not wait([fut], timeout=HEARTBEAT_S).done:
+                    self._update(job_id)   # heartbeat while a long chunk runs
+                if cancel.is_set():
+                    break
+                try:
+                    done += fut.result()
+                except Exception as e:
+                    if cancel.is_set():
+                        break
+                    for f in futures:
+                        f.cancel()
+                    self._update(job_id, state=FAILED, done=done, error=f"{type(e).__name__}: {e}")
+                    return
+                self._update(job_id, done=done)
+
+            if cancel.is_set():
+                for f in futures:
+                    f.cancel()
+                self._update(job_id, state=CANCELLED, done=done)
+            else:
+                self._update(job_id, state=DONE, done=done)
+        finally:
+            self._futures.pop(job_id, None)
+            self._cancel.pop(job_id, None)
+
+    # -----------------------------
+    # Control / query
+    # -----------------------------
+    def cancel(self, job_id: str) -> None:
+        ev = self._cancel.get(job_id)
+        if ev is not None:
+            ev.set()
+            for f in self._futures.get(job_id, []):
+                f.cancel()
+        elif self.status(job_id).state not in FINAL_STATES:
+            self._update(job_id, state=CANCELLED)
+
+    def status(self, job_id: str) -> JobStatus:
+        path = self._dir(job_id) / "status.json"
+        if not path.exists():
+            raise KeyError(f"Unknown job {job_id}")
+        return JobStatus(**json.loads(path.read_text()))
+
+    def list_jobs(self) -> list[JobStatus]:
+        out = []
+        for p in sorted(self.root.glob("*/status.json"), reverse=True):
+            try:
+                out.append(JobStatus(**json.loads(p.read_text())))
+            except (ValueError, TypeError):
+                continue
+        return out
+
+    def result(self, job_id: str, totals_only: bool = False) -> pd.DataFrame:
+        """
+        Results gathered so far (also partial ones): one row per (scenario, slot),
+        or one Total row per scenario with totals_only=True.
+        """
+        parts = sorted((self._dir(job_id) / "parts").glob("*.csv"))
+        if not parts:
+            return pd.DataFrame()
+        df = pd.concat([pd.read_csv(p) for p in parts], ignore_index=True)
+        if totals_only:
+            df = df[df["tod_slot"] == "Total"].reset_index(drop=True)
+        return df
+
+    def delete(self, job_id: str) -> None:
+        self.cancel(job_id)
+        shutil.rmtree(self._dir(job_id), ignore_errors=True)
+
+    def shutdown(self) -> None:
+        for ev in list(self._cancel.values()):
+            ev.set()
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from pathlib import Path
+import threading
+
+import pandas as pd
+
+from core.block_layout import BlockLayout, LayoutCache, default_layout_cache
+from core.block_rules import BlockRules, default_block_rules
+from core.excel_option_engine import ExcelColMap, OptionSizing, _solar_ref_col
+from core.excel_stream import STREAM_SUFFIXES, stream_sheets
+from core.excel_timeseries import block_timeseries_from_grid, trim_block
+from core.instrumentation import span
+from core.model_builder import build_model_df
+
+
+# -----------------------------
+# Column selection
+# -----------------------------
+def engine_columns(colmap: ExcelColMap = ExcelColMap()) -> list[str]:
+    """Every profile column the option engine can use."""
+    return [colmap.load_1mw, colmap.solar_ft_1mwp, colmap.solar_sat_1mwp, colmap.solar_ew_1mwp, colmap.wind_1mw, colmap.grid_ef]
+
+
+def required_columns(sizing: OptionSizing, colmap: ExcelColMap = ExcelColMap()) -> list[str]:
+    """Profile columns one run of build_option_annual_table reads (load and wind are always required)."""
+    cols = [colmap.load_1mw]
+    if sizing.solar_mode and float(sizing.solar_mw) > 0:
+        cols.append(_solar_ref_col(colmap, sizing.solar_mode))
+    cols.append(colmap.wind_1mw)
+    return cols
+
+
+# -----------------------------
+# Lazy model
+# -----------------------------
+class LazyModel:
+    """
+    A workbook's profile blocks, extracted on demand.
+
+    Each sheet is read and its layout detected once (or recalled from the layout cache).
+    Each block is kept as a trimmed slice (Time + month columns only) and turned into a
+    (month, hour) profile the first time it is asked for; extracted profiles are memoised.
+    frame() with no names gives exactly what load_model_df always returned.
+
+    sheet may be one sheet name, a list of them, or None for every sheet; blocks from all
+    of them (stacked or side by side) are named together, in sheet order, by the block
+    title rules (core/block_rules.py). roles maps engine roles to the blocks that fill them.
+
+    reader="stream" reads .xlsx/.xlsm in one openpyxl read-only pass that drops columns
+    right of the blocks; "pandas" reads the full grid with read_excel (needed for .xls).
+    "auto" picks by file suffix.
+    """
+
+    def __init__(
+        self,
+        xlsx_path: Path,
+        sheet: str | list[str] | None = "Data",
+        layouts: LayoutCache | None = None,
+        reader: str = "auto",
+        rules: BlockRules | None = None,
+    ):
+        self.path = Path(xlsx_path)
+        self.sheet = sheet
+        if reader == "auto":
+            reader = "stream" if self.path.suffix.lower() in STREAM_SUFFIXES else "pandas"
+        if reader not in ("stream", "pandas"):
+            raise ValueError(f"Unknown reader={reader!r} (use auto/stream/pandas)")
+        self.reader = reader
+        wanted = [sheet] if isinstance(sheet, str) else (None if sheet is None else list(sheet))
+
+        layouts = default_layout_cache() if layouts is None else layouts
+        self.layouts: dict[str, BlockLayout] = {}
+        sources = {}
+        if reader == "stream":
+            with span("excel.read", reader=reader, sheet=sheet) as sp:
+                streamed = stream_sheets(self.path, wanted)
+                sp.set(
+                    rows=sum(st.total_rows for st in streamed.values()),
+                    bytes=sum(st.nbytes for st in streamed.values()),
+                )
+            for name, st in streamed.items():
+                with span("layout.detect", sheet=name) as sp:
+                    self.layouts[name] = layouts.detect(
+                        st.head, name, total_rows=st.total_rows, fingerprint=st.fingerprint(),
+                    )
+                    sp.set(blocks=len(self.layouts[name].names))
+                sources[name] = st.rows
+        else:
+            with span("excel.read", reader=reader, sheet=sheet) as sp:
+                grids = pd.read_excel(self.path, sheet_name=wanted, header=None)
+                sp.set(
+                    rows=sum(len(g) for g in grids.values()),
+                    bytes=sum(int(g.memory_usage(index=True).sum()) for g in grids.values()),
+                )
+            for name, grid in grids.items():
+                with span("layout.detect", sheet=name) as sp:
+                    self.layouts[name] = layouts.detect(grid, name)
+                    sp.set(blocks=len(self.layouts[name].names))
+                sources[name] = lambda start, stop, g=grid: g.iloc[start:stop]
+
+        # names are given across sheets so a title repeated on two sheets stays unique
+        placed = [
+            (name, rows, start, stop, cols)
+            for name, rows in sources.items()
+            for (start, stop), cols in zip(self.layouts[name].ranges, self.layouts[name].col_ranges)
+        ]
+        titles = [t for name in sources for t in self.layouts[name].titles]
+        resolved = (rules or default_block_rules()).resolve_all(titles)
+        self._names = [r.name for r in resolved]
+        self.roles: dict[str, str] = {}                      # engine role -> block (first one wins)
+        for r in resolved:
+            if r.role is not None:
+                self.roles.setdefault(r.role, r.name)
+        self.origins: dict[str, tuple[str, int, int]] = {}   # block -> (sheet, header_row, col_start)
+
+        with span("block.trim") as sp:
+            self._raw = {}
+            for block, (sh, rows, start, stop, (c0, c1)) in zip(self._names, placed):
+                self._raw[block] = trim_block(rows(start, stop).iloc[:, c0:c1], 0, stop - start)
+                self.origins[block] = (sh, start, c0)
+            sp.set(blocks=len(self._raw), rows=sum(len(r) for r in self._raw.values()))
+        self._blocks: dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def sheets(self) -> list[str]:
+        """Sheets that were read (including ones without blocks)."""
+        return list(self.layouts)
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._names)
+
+    @property
+    def extracted(self) -> list[str]:
+        """Blocks parsed so far (in layout order)."""
+        return [n for n in self._names if n in self._blocks]
+
+    @property
+    def nbytes(self) -> int:
+        """Raw block slices plus the profiles extracted so far (grows as blocks are parsed)."""
+        with self._lock:
+            frames = list(self._raw.values()) + list(self._blocks.values())
+        return int(sum(f.memory_usage(deep=True, index=True).sum() for f in frames))
+
+    def block(self, name: str) -> pd.DataFrame:
+        """Long [hour, month, name] table of one block, parsed on first access."""
+        with self._lock:
+            ts = self._blocks.get(name)
+            if ts is None:
+                raw = self._raw.get(name)
+                if raw is None:
+                    raise KeyError(f"No block named {name!r} in sheet(s) {self.sheets}. Available: {self.names}")
+                with span("block.extract", block=name) as sp:
+                    ts = block_timeseries_from_grid(raw, 0, len(raw), value_name=name)
+                    sp.set(rows=len(ts))
+                self._blocks[name] = ts
+            return ts
+
+    def frame(self, names: list[str] | None = None, missing: str = "raise") -> pd.DataFrame:
+        """
+        Merged [month, hour, <names...>] model_df. names=None means every block.
+        missing="skip" silently leaves out names the workbook does not have.
+        """
+        if names is None:
+            names = self.names
+        elif missing == "skip":
+            names = [n for n in names if n in self._raw]
+        if not names:
+            raise ValueError(f"None of the requested blocks exist in sheet(s) {self.sheets}. Available: {self.names}")
+        blocks = [self.block(n) for n in names]
+        with span("model.merge", columns=len(names)) as sp:
+            df = build_model_df(blocks, list(names))
+            sp.set(rows=len(df))
+        return df
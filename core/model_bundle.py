@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import os
+import pickle
+
+import pandas as pd
+
+from core.fingerprint import file_fingerprint
+from core.loader import load_model_df
+from core.tod import add_tod_slot
+
+BUNDLE_FORMAT = 1
+BUNDLE_SUFFIX = ".hremodel"
+
+# Column names bundles written before the block title rules carried (title slugs)
+LEGACY_COLUMNS = {
+    "160_ft_solar_generation_reference_for_1_mwp": "solar_ft_1mwp",
+    "sat_solar_generation_reference_for_1_mwp": "solar_sat_1mwp",
+    "ew_solar_generation_reference_for_1_mwp": "solar_ew_1mwp",
+    "wind_generation_reference_for_1_mw": "wind_1mw",
+}
+
+
+def build_base_model(xlsx_path: Path, sheet: str = "Data") -> pd.DataFrame:
+    """Parsed model_df with TOD slots (what the engine and dashboard consume)."""
+    return add_tod_slot(load_model_df(Path(xlsx_path), sheet=sheet))
+
+
+def save_model_bundle(model_df: pd.DataFrame, out_path: Path, workbook_fp: str | None = None, source: str | None = None) -> Path:
+    """
+    Write a parsed model to disk so later runs skip Excel parsing entirely.
+    Bundles are plain pickles: only load bundles you created yourself.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = {
+        "format": BUNDLE_FORMAT,
+        "workbook_fp": workbook_fp,
+        "source": source,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model_df": model_df,
+    }
+    # per-process temp name: parallel ingest workers may write the same bundle at once
+    tmp = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(out_path)
+    return out_path
+
+
+def load_model_bundle(path: Path) -> tuple[pd.DataFrame, dict]:
+    """Returns (model_df, metadata)."""
+    with open(Path(path), "rb") as f:
+        payload = pickle.load(f)
+
+    if not isinstance(payload, dict) or payload.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a model bundle (format {BUNDLE_FORMAT})")
+
+    model_df = payload.pop("model_df")
+    legacy = {old: new for old, new in LEGACY_COLUMNS.items() if old in model_df.columns and new not in model_df.columns}
+    if legacy:
+        model_df = model_df.rename(columns=legacy)
+    return model_df, payload
+
+
+def load_any_model(path: Path, sheet: str = "Data") -> tuple[pd.DataFrame, str]:
+    """Workbook or bundle -> (model_df, workbook fingerprint)."""
+    path = Path(path)
+    if path.suffix == BUNDLE_SUFFIX:
+        model_df, meta = load_model_bundle(path)
+        return model_df, meta.get("workbook_fp") or file_fingerprint(path)
+    return build_base_model(path, sheet=sheet), file_fingerprint(path)
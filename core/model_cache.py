@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+import threading
+
+import numpy as np
+import pandas as pd
+
+def sizeof_value(value: Any) -> int:
+    """Best-effort resident size in bytes of a cached value."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    return 0
+
+
+def _view(value: Any) -> Any:
+    """Zero-copy, read-only handle on a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # a shallow copy shares buffers; pandas 3 copy-on-write keeps callers' edits local
+        return value.copy(deep=False)
+    if isinstance(value, np.ndarray):
+        v = value.view()
+        v.flags.writeable = False
+        return v
+    return value
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes_used: int
+    max_bytes: int
+
+
+class ModelCache:
+    """
+    Process-wide LRU cache for parsed models with a byte budget.
+
+    - Entries are sized on insert (DataFrame deep memory usage); refresh() re-sizes one
+      that grows in place.
+    - Least recently used entries are evicted once the budget is exceeded;
+      a single entry larger than the whole budget is returned but not kept.
+    - get_or_load() hands out zero-copy views, so sessions share one parsed model
+      (safe because pandas >= 3 always copies on write).
+    - Concurrent loads of the same key run the loader once.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = sizeof_value):
+        self.max_bytes = int(max_bytes)
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _view(entry[0])
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _view(entry[0])
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                # another thread may have finished loading while we waited
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return _view(entry[0])
+                    self.misses += 1
+
+                value = loader()
+                self.put(key, value)
+        finally:
+            # dropped even when the loader raises, so failed keys do not pile up; only our own
+            # lock, since a later loader may already have registered a new one for this key
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+        return _view(value)
+
+    # -----------------------------
+    # Insert / evict
+    # -----------------------------
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def refresh(self, key: Hashable) -> None:
+        """
+        Re-measure an entry that grew after insert (e.g. a LazyModel that parsed more blocks)
+        and evict least recently used entries until the budget holds again.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = self._sizeof(entry[0])
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current[0] is not entry[0]:
+                return   # replaced or evicted meanwhile
+            self._bytes += size - current[1]
+            if size > self.max_bytes:
+                del self._entries[key]
+                self._bytes -= size
+                return
+            self._entries[key] = (current[0], size)
+            self._entries.move_to_end(key)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                bytes_used=self._bytes,
+                max_bytes=self.max_bytes,
+            )
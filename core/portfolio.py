@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.batch_engine import ANNUAL_COLS, COST_COLS, KWH_COLS, RATE_COLS, SOLAR_MODES, BatchResult, CompiledModel, annual_result
+from core.excel_option_engine import SLOT_ORDER
+from core.instrumentation import traced
+
+PLANT_KINDS = ("solar", "wind")
+ALLOCATIONS = ("pro_rata", "priority", "fixed")
+
+
+# -----------------------------
+# Inputs
+# -----------------------------
+@dataclass(frozen=True)
+class ConsumerSpec:
+    """One load: its own workbook's load shape scaled to load_mw, and its own tariff."""
+    name: str
+    model: CompiledModel
+    load_mw: float
+    priority: int = 0            # "priority" allocation: higher is served first
+    rates: dict | None = None    # run_option form; None = the portfolio-wide rates
+
+
+@dataclass(frozen=True)
+class PlantSpec:
+    """One shared plant, using the resource profile of its own site's workbook."""
+    name: str
+    model: CompiledModel
+    kind: str                    # "solar" | "wind"
+    mw: float
+    loss: float = 0.0
+    solar_mode: str | None = None   # FT/SAT/EW for solar plants
+
+
+@dataclass(frozen=True)
+class Portfolio:
+    """
+    Consumers and plants as (month, slot) energy tensors: kWh per month summed over the
+    hours of each TOD slot (months follow MONTH_ORDER, slots SLOT_ORDER), i.e. exactly
+    what evaluate_batch clips per scenario before the annual roll-up.
+    """
+    consumers: tuple[str, ...]
+    plants: tuple[str, ...]
+    plant_kinds: tuple[str, ...]
+    load: np.ndarray             # (C, 12, 4)
+    generation: np.ndarray       # (P, 12, 4)
+    priority: np.ndarray         # (C,)
+    rates: tuple[dict | None, ...]
+
+    def __post_init__(self):
+        c, p = len(self.consumers), len(self.plants)
+        if self.load.shape != (c, 12, 4) or self.generation.shape != (p, 12, 4):
+            raise ValueError(f"Expected load ({c}, 12, 4) and generation ({p}, 12, 4), got {self.load.shape} / {self.generation.shape}")
+        bad = sorted(set(self.plant_kinds) - set(PLANT_KINDS))
+        if bad:
+            raise ValueError(f"Unknown plant kinds {bad} (use {'/'.join(PLANT_KINDS)})")
+
+
+def consumer_load(model: CompiledModel, load_mw: float) -> np.ndarray:
+    return float(load_mw) * model.load * model.days[:, None]
+
+
+def plant_generation(model: CompiledModel, kind: str, mw: float, loss: float = 0.0, solar_mode: str | None = None) -> np.ndarray:
+    """(12, 4) kWh of one plant; same scaling as build_option_annual_table."""
+    if kind == "wind":
+        ref = model.wind
+    elif kind == "solar":
+        mode = (solar_mode or "").upper().strip()
+        if mode not in SOLAR_MODES:
+            raise ValueError(f"Unknown solar_mode='{solar_mode}' for a solar plant (use FT/SAT/EW)")
+        if mode not in model.solar:
+            raise KeyError(f"[solar ref ({mode})] Missing solar reference column in model")
+        ref = model.solar[mode]
+    else:
+        raise ValueError(f"Unknown plant kind={kind!r} (use {'/'.join(PLANT_KINDS)})")
+    return float(mw) * (1.0 - float(loss)) * ref * model.days[:, None]
+
+
+def build_portfolio(consumers: Sequence[ConsumerSpec], plants: Sequence[PlantSpec]) -> Portfolio:
+    if not consumers:
+        raise ValueError("A portfolio needs at least one consumer")
+    for label, items in (("consumer", consumers), ("plant", plants)):
+        names = [x.name for x in items]
+        dup = sorted({n for n in names if names.count(n) > 1})
+        if dup:
+            raise ValueError(f"Duplicate {label} names: {dup}")
+
+    return Portfolio(
+        consumers=tuple(c.name for c in consumers),
+        plants=tuple(p.name for p in plants),
+        plant_kinds=tuple(p.kind for p in plants),
+        load=np.stack([consumer_load(c.model, c.load_mw) for c in consumers]),
+        generation=(
+            np.stack([plant_generation(p.model, p.kind, p.mw, p.loss, p.solar_mode) for p in plants])
+            if plants else np.zeros((0, 12, 4))
+        ),
+        priority=np.array([int(c.priority) for c in consumers]),
+        rates=tuple(c.rates for c in consumers),
+    )
+
+
+# -----------------------------
+# Allocation
+# -----------------------------
+def _share_matrix(portfolio: Portfolio, shares) -> np.ndarray:
+    """(C, P) fixed shares from an array or {plant: {consumer: share}}; each plant must sum to 1."""
+    c, p = len(portfolio.consumers), len(portfolio.plants)
+    if isinstance(shares, dict):
+        out = np.zeros((c, p))
+        for plant, row in shares.items():
+            if plant not in portfolio.plants:
+                raise KeyError(f"Unknown plant {plant!r} in shares. Available: {list(portfolio.plants)}")
+            j = portfolio.plants.index(plant)
+            for consumer, share in row.items():
+                if consumer not in portfolio.consumers:
+                    raise KeyError(f"Unknown consumer {consumer!r} in shares. Available: {list(portfolio.consumers)}")
+                out[portfolio.consumers.index(consumer), j] = float(share)
+    else:
+        out = np.asarray(shares, dtype=float)
+        if out.shape != (c, p):
+            raise ValueError(f"shares must be (consumers, plants) = ({c}, {p}), got {out.shape}")
+
+    if (out < 0).any():
+        raise ValueError("shares must be >= 0")
+    off = ~np.isclose(out.sum(axis=0), 1.0)
+    if off.any():
+        raise ValueError(f"Shares of plants {[portfolio.plants[j] for j in np.flatnonzero(off)]} do not sum to 1")
+    return out
+
+
+def _load_shares(load: np.ndarray) -> np.ndarray:
+    """(C, 12, 4) share of each consumer in the load of each (month, slot); cells nobody loads use annual shares."""
+    total = load.sum(axis=0, keepdims=True)
+    annual = load.sum(axis=(1, 2))
+    fallback = annual / annual.sum() if annual.sum() > 0 else np.full(len(annual), 1.0 / len(annual))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, load / total, fallback[:, None, None])
+
+
+def allocate(portfolio: Portfolio, method: str = "pro_rata", shares=None) -> np.ndarray:
+    """
+    (C, P, 12, 4) kWh of each plant's output given to each consumer. Every kWh is allocated:
+
+    pro_rata  each (month, slot) of every plant is split in proportion to consumer load there
+    priority  the pooled output serves consumers in priority order up to their load; what is
+              left after the last one is split pro-rata to load. Each consumer gets the same
+              fraction of every plant (solar/wind mix follows the pool)
+    fixed     shares[c, p] of plant p's output always goes to consumer c (contracted shares)
+    """
+    load, gen = portfolio.load, portfolio.generation
+    if method == "fixed":
+        return _share_matrix(portfolio, shares)[:, :, None, None] * gen[None]
+
+    if method == "pro_rata":
+        frac = _load_shares(load)
+    elif method == "priority":
+        pool = gen.sum(axis=0)                                    # (12, 4)
+        order = np.argsort(-portfolio.priority, kind="stable")
+        ahead = np.cumsum(load[order], axis=0) - load[order]       # load of consumers served before
+        served = np.empty_like(load)
+        served[order] = np.clip(pool[None] - ahead, 0.0, load[order])
+        surplus = np.clip(pool - load.sum(axis=0), 0.0, None)
+        received = served + surplus[None] * _load_shares(load)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = np.where(pool > 0, received / pool, 0.0)
+    else:
+        raise ValueError(f"Unknown allocation method={method!r} (use {'/'.join(ALLOCATIONS)})")
+    return frac[:, None] * gen[None]
+
+
+# -----------------------------
+# Result
+# -----------------------------
+@dataclass(frozen=True)
+class PortfolioResult:
+    """
+    Per-consumer annual TOD tables (a BatchResult, one scenario per consumer, with the same
+    BESS rule, rates, rounding and costs as run_option) plus the allocation itself.
+    """
+    portfolio: Portfolio
+    result: BatchResult
+    allocated: np.ndarray        # (C, P) annual kWh from each plant to each consumer
+
+    def _index(self, consumer: int | str) -> int:
+        if isinstance(consumer, str):
+            if consumer not in self.portfolio.consumers:
+                raise KeyError(f"Unknown consumer {consumer!r}. Available: {list(self.portfolio.consumers)}")
+            return self.portfolio.consumers.index(consumer)
+        return int(consumer)
+
+    def consumer_table(self, consumer: int | str) -> pd.DataFrame:
+        """One consumer's table, same shape as run_option's (A, C, B, D, Total)."""
+        return self.result.annual_table(self._index(consumer))
+
+    def portfolio_table(self) -> pd.DataFrame:
+        """Sum over consumers by slot (rates blank, RE% recomputed from the summed kWh)."""
+        data = {"tod_slot": SLOT_ORDER + ["Total"]}
+        for c in KWH_COLS + COST_COLS:
+            slot = self.result.slot[c].sum(axis=0)
+            data[c] = np.append(slot, slot.sum())
+        load, grid = data["load_kwh"], data["grid_kwh"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data["re_percent"] = np.round(np.where(load > 0, 100.0 * (load - grid) / load, 0.0), 1)
+        for c in RATE_COLS:
+            data[c] = np.full(5, np.nan)
+        out = pd.DataFrame(data)[ANNUAL_COLS]
+        for c in COST_COLS:
+            out[c] = out[c].astype("Int64")
+        return out
+
+    def totals_frame(self) -> pd.DataFrame:
+        """One row per consumer (summarize_totals keys), indexed by consumer name."""
+        return self.result.totals_frame().set_axis(list(self.portfolio.consumers), axis=0)
+
+    def allocation_frame(self) -> pd.DataFrame:
+        """Annual kWh consumer x plant."""
+        return pd.DataFrame(self.allocated, index=list(self.portfolio.consumers), columns=list(self.portfolio.plants))
+
+
+# -----------------------------
+# MAIN PORTFOLIO ENGINE
+# -----------------------------
+@traced("engine.evaluate_portfolio", lambda res: {"rows": len(res.result)})
+def evaluate_portfolio(
+    portfolio: Portfolio,
+    allocation: str = "pro_rata",
+    shares=None,
+    rates: dict | None = None,
+) -> PortfolioResult:
+    """
+    Allocate the shared plants and evaluate every consumer in one vectorised pass.
+    Each consumer is then netted like a single run: its allocated solar + wind against its
+    own load per (month, slot), BESS = 80% of its annual excess into slot D, costs at its
+    own rates (ConsumerSpec.rates, else `rates`).
+    """
+    alloc = allocate(portfolio, allocation, shares)               # (C, P, 12, 4)
+    kinds = np.array(portfolio.plant_kinds)
+    solar = alloc[:, kinds == "solar"].sum(axis=1)                # (C, 12, 4)
+    wind = alloc[:, kinds == "wind"].sum(axis=1)
+    load = portfolio.load
+    total_re = solar + wind
+
+    slot = {
+        "load_kwh": load.sum(axis=1),
+        "solar_kwh": solar.sum(axis=1),
+        "wind_kwh": wind.sum(axis=1),
+        "total_re_kwh": total_re.sum(axis=1),
+        "excess_kwh": np.clip(total_re - load, 0.0, None).sum(axis=1),
+    }
+    grid_pre = np.clip(load - total_re, 0.0, None).sum(axis=1)
+    consumer_rates = [r if r is not None else rates for r in portfolio.rates]
+    result = annual_result(slot, grid_pre, consumer_rates)
+    return PortfolioResult(portfolio=portfolio, result=result, allocated=alloc.sum(axis=(2, 3)))
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Hashable
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.batch_engine import SOLAR_MODES, CompiledModel, annual_result
+from core.excel_option_engine import OptionSizing
+from core.model_cache import ModelCache
+
+# Grid over effective MW per MW of load (covers 0..10x oversizing by default)
+SOLAR_RATIO_MAX = 10.0
+WIND_RATIO_MAX = 10.0
+GRID_POINTS = 101
+
+# failed builds are retried after this long; only the most recent failures are remembered
+FAILED_RETRY_S = 300.0
+FAILED_MAX = 64
+
+
+# -----------------------------
+# Surface
+# -----------------------------
+@dataclass(frozen=True)
+class ResponseSurface:
+    """
+    The engine's nonlinear part, precomputed on a dense sizing grid for one solar mode.
+
+    Every kWh scales with (load, effective solar, effective wind) taken together, so one
+    grid over effective solar / wind MW per MW of load covers all loads, losses and rates.
+    Only the clipped (month, slot) sums are stored: excess and grid-before-BESS, (ns, nw, 4)
+    annual kWh at 1 MW load. Load, solar and wind kWh stay exact.
+    """
+    solar_mode: str | None
+    solar_axis: np.ndarray       # (ns,) effective MWp per MW load
+    wind_axis: np.ndarray        # (nw,) effective MW per MW load
+    excess: np.ndarray           # (ns, nw, 4)
+    grid_pre: np.ndarray         # (ns, nw, 4)
+    load: np.ndarray             # (4,) annual kWh per MW load
+    solar: np.ndarray            # (4,) annual kWh per effective MWp
+    wind: np.ndarray             # (4,) annual kWh per effective MW
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in (
+            self.solar_axis, self.wind_axis, self.excess, self.grid_pre, self.load, self.solar, self.wind
+        )))
+
+
+def effective_solar_mode(sizing: OptionSizing) -> str | None:
+    """Solar mode the engine actually uses (None when there is no solar)."""
+    if sizing.solar_mode and float(sizing.solar_mw) > 0:
+        return sizing.solar_mode.upper().strip()
+    return None
+
+
+def build_response_surface(
+    compiled: CompiledModel,
+    solar_mode: str | None,
+    solar_max: float = SOLAR_RATIO_MAX,
+    wind_max: float = WIND_RATIO_MAX,
+    points: int = GRID_POINTS,
+) -> ResponseSurface:
+    """Evaluate the clipped slot sums on a points x points grid (one row of the grid at a time)."""
+    days = compiled.days[:, None]
+    load = compiled.load * days
+    wind = compiled.wind * days
+    if solar_mode:
+        if solar_mode not in SOLAR_MODES:
+            raise ValueError(f"Unknown solar_mode='{solar_mode}' (use FT/SAT/EW/None)")
+        if solar_mode not in compiled.solar:
+            raise KeyError(f"[solar ref ({solar_mode})] Missing solar reference column in model")
+        solar = compiled.solar[solar_mode] * days
+    else:
+        solar = np.zeros((12, 4))
+
+    s_axis = np.linspace(0.0, float(solar_max), int(points))
+    w_axis = np.linspace(0.0, float(wind_max), int(points))
+
+    excess = np.empty((len(s_axis), len(w_axis), 4))
+    grid_pre = np.empty_like(excess)
+    wind_part = w_axis[:, None, None] * wind[None]          # (nw, 12, 4)
+    for i, s in enumerate(s_axis):
+        re = s * solar[None] + wind_part
+        excess[i] = np.clip(re - load[None], 0.0, None).sum(axis=1)
+        grid_pre[i] = np.clip(load[None] - re, 0.0, None).sum(axis=1)
+
+    return ResponseSurface(
+        solar_mode=solar_mode,
+        solar_axis=s_axis,
+        wind_axis=w_axis,
+        excess=excess,
+        grid_pre=grid_pre,
+        load=load.sum(axis=0),
+        solar=solar.sum(axis=0),
+        wind=wind.sum(axis=0),
+    )
+
+
+def _bracket(axis: np.ndarray, x: float) -> tuple[int, float]:
+    i = int(np.clip(np.searchsorted(axis, x, side="right") - 1, 0, len(axis) - 2))
+    t = (x - axis[i]) / (axis[i + 1] - axis[i])
+    return i, float(t)
+
+
+def interpolate_option(surface: ResponseSurface, sizing: OptionSizing, rates: dict | None) -> pd.DataFrame | None:
+    """
+    Approximate run_option table by bilinear interpolation of the surface.
+    Returns None when the sizing is outside the surface (other solar mode, zero load,
+    oversizing beyond the grid); callers then wait for the exact result.
+    """
+    load_mw = float(sizing.load_mw)
+    mode = effective_solar_mode(sizing)
+    if load_mw <= 0 or (mode is not None and mode != surface.solar_mode):
+        return None
+
+    solar_eff = float(sizing.solar_mw) * (1.0 - float(sizing.solar_loss)) if mode else 0.0
+    wind_eff = float(sizing.wind_mw) * (1.0 - float(sizing.wind_loss))
+    x, y = solar_eff / load_mw, wind_eff / load_mw
+    if not (0.0 <= x <= surface.solar_axis[-1] and 0.0 <= y <= surface.wind_axis[-1]):
+        return None
+
+    i, tx = _bracket(surface.solar_axis, x)
+    j, ty = _bracket(surface.wind_axis, y)
+
+    def _lerp(a: np.ndarray) -> np.ndarray:
+        lo = a[i, j] * (1.0 - ty) + a[i, j + 1] * ty
+        hi = a[i + 1, j] * (1.0 - ty) + a[i + 1, j + 1] * ty
+        return load_mw * (lo * (1.0 - tx) + hi * tx)
+
+    solar = solar_eff * surface.solar
+    wind = wind_eff * surface.wind
+    slot = {
+        "load_kwh": load_mw * surface.load,
+        "solar_kwh": solar,
+        "wind_kwh": wind,
+        "total_re_kwh": solar + wind,
+        "excess_kwh": _lerp(surface.excess),
+    }
+    res = annual_result({k: v[None] for k, v in slot.items()}, _lerp(surface.grid_pre)[None], rates)
+    return res.annual_table(0)
+
+
+# -----------------------------
+# Background builds
+# -----------------------------
+class SurfaceBuilder:
+    """
+    Builds response surfaces on a background thread and parks them in a ModelCache.
+    get() never blocks: it returns the surface once it is ready, None before that.
+    A failed build is not retried for retry_after_s seconds; the last FAILED_MAX
+    failures are kept.
+    """
+
+    def __init__(self, cache: ModelCache, max_workers: int = 1, retry_after_s: float = FAILED_RETRY_S):
+        self.cache = cache
+        self.retry_after_s = float(retry_after_s)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hre-surface")
+        self._lock = threading.Lock()
+        self._pending: dict[Hashable, Future] = {}
+        self._failed: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()   # key -> (monotonic time, error)
+
+    def get(self, key: Hashable, compiled: CompiledModel, solar_mode: str | None) -> ResponseSurface | None:
+        surface = self.cache.get(key)
+        if surface is not None:
+            return surface
+        with self._lock:
+            failed = self._failed.get(key)
+            if failed is not None and time.monotonic() - failed[0] >= self.retry_after_s:
+                del self._failed[key]
+                failed = None
+            if key not in self._pending and failed is None:
+                self._pending[key] = self._executor.submit(self._build, key, compiled, solar_mode)
+        return None
+
+    def error(self, key: Hashable) -> str | None:
+        """Why the last build of `key` failed, while it is still being held back."""
+        with self._lock:
+            failed = self._failed.get(key)
+        return failed[1] if failed is not None else None
+
+    def _build(self, key: Hashable, compiled: CompiledModel, solar_mode: str | None) -> None:
+        try:
+            self.cache.put(key, build_response_surface(compiled, solar_mode))
+        except Exception as e:
+            # a model that can't be surfaced (e.g. missing solar ref) shouldn't be retried on every rerun
+            with self._lock:
+                self._failed[key] = (time.monotonic(), f"{type(e).__name__}: {e}")
+                self._failed.move_to_end(key)
+                while len(self._failed) > FAILED_MAX:
+                    self._failed.popitem(last=False)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self, key: Hashable, timeout: float | None = None) -> ResponseSurface | None:
+        with self._lock:
+            fut = self._pending.get(key)
+        if fut is not None:
+            fut.result(timeout=timeout)
+        return self.cache.get(key)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from contextlib import closing, contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+from typing import Iterator
+
+import pandas as pd
+
+from core.block_rules import rules_fingerprint
+from core.excel_option_engine import ENGINE_VERSION, ExcelColMap, OptionSizing
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_key          TEXT PRIMARY KEY,
+    workbook_fp      TEXT NOT NULL,
+    engine_version   TEXT NOT NULL,
+    load_mw          REAL,
+    solar_mode       TEXT,
+    solar_mw         REAL,
+    solar_loss       REAL,
+    solar_model_mode TEXT,
+    solar_dcac       REAL,
+    wind_mw          REAL,
+    wind_loss        REAL,
+    rates_json       TEXT NOT NULL,
+    re_percent       REAL,
+    total_cost_rs    REAL,
+    grid_kwh         REAL,
+    annual_json      TEXT NOT NULL,
+    dtypes_json      TEXT NOT NULL,
+    created_at       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_wb_re   ON runs (workbook_fp, re_percent);
+CREATE INDEX IF NOT EXISTS ix_runs_wb_cost ON runs (workbook_fp, total_cost_rs);
+CREATE INDEX IF NOT EXISTS ix_runs_sizing  ON runs (solar_mode, solar_mw, wind_mw, load_mw);
+"""
+
+SUMMARY_COLS = [
+    "run_key", "workbook_fp", "engine_version",
+    "load_mw", "solar_mode", "solar_mw", "solar_loss", "solar_model_mode", "solar_dcac",
+    "wind_mw", "wind_loss",
+    "re_percent", "total_cost_rs", "grid_kwh", "rates_json", "created_at",
+]
+
+
+def scenario_key(
+    workbook_fp: str,
+    sizing: OptionSizing,
+    rates: dict | None,
+    engine_version: str = ENGINE_VERSION,
+    colmap: ExcelColMap | None = None,
+    rules_fp: str | None = None,
+) -> str:
+    """
+    Stable key for (workbook, sizing, rates, engine version, column map, block rules).
+    rules_fp defaults to the active rule file: the rules decide which workbook block
+    feeds each engine column, so editing them must miss results parsed under the old ones.
+    """
+    payload = {
+        "wb": workbook_fp, "sizing": asdict(sizing), "rates": rates or {}, "engine": engine_version,
+        "rules": rules_fp or rules_fingerprint(),
+        "colmap": asdict(colmap or ExcelColMap()),
+    }
+    payload = json.dumps(payload, sort_keys=True, default=float)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _total_row_values(annual_df: pd.DataFrame) -> tuple[float | None, float | None, float | None]:
+    """(re_percent, total_cost_rs, grid_kwh) from the Total row, if present."""
+    if "tod_slot" not in annual_df.columns:
+        return None, None, None
+    total = annual_df[annual_df["tod_slot"].astype(str).str.lower() == "total"]
+    if total.empty:
+        return None, None, None
+
+    r = total.iloc[0]
+
+    def _f(v):
+        return None if pd.isna(v) else float(v)
+
+    cost = r.get("total_cost_rs", r.get("grid_cost_rs"))
+    return _f(r.get("re_percent")), _f(cost), _f(r.get("grid_kwh"))
+
+
+class ScenarioStore:
+    """
+    Local SQLite store of engine results (stdlib sqlite3 only).
+
+    Each row keeps workbook fingerprint, sizing, rate maps, engine version and
+    the full annual table; sizing fields, RE% and total cost are indexed so
+    analysts can query past runs without recomputing anything.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # one short-lived connection per call keeps this safe across Streamlit threads;
+        # committed on success, rolled back on error, always closed
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as con, con:
+            yield con
+
+    # -----------------------------
+    # Write / read single runs
+    # -----------------------------
+    def put(
+        self,
+        workbook_fp: str,
+        sizing: OptionSizing,
+        rates: dict | None,
+        annual_df: pd.DataFrame,
+        engine_version: str = ENGINE_VERSION,
+        colmap: ExcelColMap | None = None,
+    ) -> str:
+        key = scenario_key(workbook_fp, sizing, rates, engine_version, colmap)
+        re_pct, total_cost, grid_kwh = _total_row_values(annual_df)
+        s = asdict(sizing)
+
+        row = (
+            key, workbook_fp, engine_version,
+            s["load_mw"], s["solar_mode"], s["solar_mw"], s["solar_loss"], s["solar_model_mode"], s["solar_dcac"],
+            s["wind_mw"], s["wind_loss"],
+            json.dumps(rates or {}, sort_keys=True),
+            re_pct, total_cost, grid_kwh,
+            annual_df.to_json(orient="split", index=False),
+            json.dumps({c: str(t) for c, t in annual_df.dtypes.items()}),
+            datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        with self._connect() as con:
+            con.execute(f"INSERT OR REPLACE INTO runs VALUES ({','.join('?' * len(row))})", row)
+        return key
+
+    def get(
+        self,
+        workbook_fp: str,
+        sizing: OptionSizing,
+        rates: dict | None,
+        engine_version: str = ENGINE_VERSION,
+        colmap: ExcelColMap | None = None,
+    ) -> pd.DataFrame | None:
+        """Stored annual table for this exact scenario, or None."""
+        return self.get_by_key(scenario_key(workbook_fp, sizing, rates, engine_version, colmap))
+
+    def get_by_key(self, run_key: str) -> pd.DataFrame | None:
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT annual_json, dtypes_json FROM runs WHERE run_key = ?", (run_key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        annual_json, dtypes_json = row
+        df = pd.read_json(StringIO(annual_json), orient="split", convert_dates=False)
+        for c, t in json.loads(dtypes_json).items():
+            if c in df.columns:
+                df[c] = df[c].astype(t)
+        return df
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def query(
+        self,
+        workbook_fp: str | None = None,
+        min_re_percent: float | None = None,
+        max_total_cost_rs: float | None = None,
+        solar_mode: str | None = None,
+        engine_version: str | None = ENGINE_VERSION,
+        limit: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Summary rows of stored runs, e.g.
+          store.query(workbook_fp=fp, min_re_percent=70)
+        Pass engine_version=None to include runs from older engines.
+        """
+        where, params = [], []
+        if workbook_fp is not None:
+            where.append("workbook_fp = ?")
+            params.append(workbook_fp)
+        if min_re_percent is not None:
+            where.append("re_percent > ?")
+            params.append(float(min_re_percent))
+        if max_total_cost_rs is not None:
+            where.append("total_cost_rs <= ?")
+            params.append(float(max_total_cost_rs))
+        if solar_mode is not None:
+            where.append("solar_mode = ?")
+            params.append(solar_mode)
+        if engine_version is not None:
+            where.append("engine_version = ?")
+            params.append(engine_version)
+
+        sql = f"SELECT {', '.join(SUMMARY_COLS)} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY total_cost_rs"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._connect() as con:
+            rows = con.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=SUMMARY_COLS)
+
+    def __len__(self) -> int:
+        with self._connect() as con:
+            return int(con.execute("SELECT COUNT(*) FROM runs").fetchone()[0])
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from dataclasses import fields
+from pathlib import Path
+from typing import Iterator
+import csv
+import io
+import json
+
+import numpy as np
+
+from core.batch_engine import RATE_SOURCES, BatchResult, default_rate_maps
+from core.excel_option_engine import SLOT_ORDER, OptionSizing
+
+SIZING_FIELDS = [f.name for f in fields(OptionSizing)]
+_STR_FIELDS = {"solar_mode", "solar_model_mode"}
+
+
+# -----------------------------
+# Reading scenarios
+# -----------------------------
+def iter_scenario_records(path: Path) -> Iterator[dict]:
+    """Stream raw scenario records from a .csv or .jsonl file (one record at a time)."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported scenario file '{path.name}' (use .csv or .jsonl)")
+
+
+def _blank(v) -> bool:
+    return v is None or (isinstance(v, str) and v.strip() == "")
+
+
+def _sizing_value(name: str, v):
+    if name in _STR_FIELDS:
+        s = str(v).strip()
+        return None if s.lower() in ("", "none", "null") else s
+    return float(v)
+
+
+def parse_scenario(rec: dict, index: int) -> tuple[str, OptionSizing, dict]:
+    """
+    One record -> (scenario_id, OptionSizing, rates in run_option form).
+
+    Sizing: nested "sizing" dict, or flat OptionSizing field names.
+    Rates:  nested "rates" dict ({"solar_rate_map": {...}, ...}), or flat
+            "<source>_<slot>" (e.g. grid_D) / "<source>_rate" (all slots) columns.
+            Anything not given falls back to the Typical plans.
+    """
+    sid = rec.get("scenario_id")
+    sid = str(index) if _blank(sid) else str(sid)
+
+    src = rec.get("sizing") if isinstance(rec.get("sizing"), dict) else rec
+    kwargs = {}
+    for name in SIZING_FIELDS:
+        v = src.get(name)
+        if _blank(v):
+            continue
+        try:
+            kwargs[name] = _sizing_value(name, v)
+        except (TypeError, ValueError):
+            raise ValueError(f"Scenario {sid}: bad value for {name}: {v!r}") from None
+    sizing = OptionSizing(**kwargs)
+
+    rates = default_rate_maps()
+    nested = rec.get("rates") if isinstance(rec.get("rates"), dict) else {}
+    for source in RATE_SOURCES:
+        key = f"{source}_rate_map"
+        m = nested.get(key) or nested.get(source)
+        if isinstance(m, dict):
+            rates[key].update({s: float(m[s]) for s in SLOT_ORDER if s in m})
+
+        flat = rec.get(f"{source}_rate")
+        if not _blank(flat):
+            rates[key] = {s: float(flat) for s in SLOT_ORDER}
+        for s in SLOT_ORDER:
+            v = rec.get(f"{source}_{s}")
+            if not _blank(v):
+                rates[key][s] = float(v)
+
+    return sid, sizing, rates
+
+
+# -----------------------------
+# Writing results
+# -----------------------------
+def json_ready(v):
+    if isinstance(v, (float, np.floating)):
+        return None if np.isnan(v) else float(v)
+    if isinstance(v, np.integer):
+        return int(v)
+    return v
+
+
+def format_results(result: BatchResult, scenario_ids: list[str], fmt: str, header: bool = False) -> str:
+    """Serialise one evaluated chunk as CSV rows (scenario x slot) or JSONL lines (one per scenario)."""
+    long_df = result.long_frame(scenario_ids)
+
+    if fmt == "csv":
+        buf = io.StringIO()
+        long_df.to_csv(buf, header=header, index=False, lineterminator="\n")
+        return buf.getvalue()
+
+    totals = result.totals_frame()
+    cols = list(long_df.columns[1:])
+    rows = long_df[cols].to_numpy(dtype=object)
+
+    lines = []
+    for i, sid in enumerate(scenario_ids):
+        rec = {"scenario_id": sid}
+        rec.update({k: json_ready(v) for k, v in totals.iloc[i].items()})
+        rec["annual"] = [dict(zip(cols, map(json_ready, r))) for r in rows[5 * i: 5 * i + 5]]
+        lines.append(json.dumps(rec))
+    return "\n".join(lines) + "\n"
+
+
+def output_format(path: Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported output file '{Path(path).name}' (use .csv or .jsonl)")
+
+
+def completed_scenarios(out_path: Path, fmt: str) -> int:
+    """
+    Count scenarios fully written to an existing output file and truncate any
+    partially written tail, so an interrupted batch can resume where it stopped.
+    """
+    out_path = Path(out_path)
+    if not out_path.exists():
+        return 0
+
+    done = 0
+    good_end = 0
+    with open(out_path, "rb") as f:
+        if fmt == "csv":
+            header = f.readline()
+            good_end = len(header) if header.endswith(b"\n") else 0
+            slot_idx = next(csv.reader([header.decode("utf-8")]), []).index("tod_slot") if good_end else -1
+            pos = good_end
+            for line in f:
+                pos += len(line)
+                if not line.endswith(b"\n"):
+                    break
+                row = next(csv.reader([line.decode("utf-8")]))
+                if 0 <= slot_idx < len(row) and row[slot_idx] == "Total":
+                    done += 1
+                    good_end = pos
+        else:
+            pos = 0
+            for line in f:
+                pos += len(line)
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                done += 1
+                good_end = pos
+
+    with open(out_path, "r+b") as f:
+        f.truncate(good_end)
+    return done
+
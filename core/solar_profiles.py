@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from core.excel_option_engine import ExcelColMap
+from core.model_builder import MONTH_ORDER
+
+# -----------------------------
+# Site + loss inputs
+# -----------------------------
+@dataclass(frozen=True)
+class SolarSite:
+    latitude: float
+    longitude: float
+    tz_hours: float = 5.5          # local standard time offset from UTC (IST default)
+    albedo: float = 0.20
+
+    # Fixed tilt (FT): tilt defaults to |latitude|, facing the equator
+    ft_tilt: float | None = None
+    ft_azimuth: float | None = None
+
+    # Single-axis tracker (SAT): horizontal N-S axis, +/- rotation limit
+    sat_max_angle: float = 60.0
+
+    # East-west (EW): two low-tilt halves facing 90 / 270 degrees
+    ew_tilt: float = 10.0
+
+
+@dataclass(frozen=True)
+class SolarLosses:
+    temp_coeff: float = -0.0037    # per degC, relative to 25 degC STC
+    noct_c: float = 45.0           # nominal operating cell temperature
+    soiling: float = 0.02          # fraction of POA lost to soiling
+    other: float = 0.0             # any remaining DC derate (mismatch, wiring...)
+
+
+WEATHER_COLS = ["ghi", "dni", "dhi", "temp_air"]
+
+# (site, losses, colmap, weather hash) -> chronological reference frame, least recently used first
+_PROFILE_CACHE: OrderedDict[tuple, pd.DataFrame] = OrderedDict()
+PROFILE_CACHE_SIZE = 32
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _weather_index(weather: pd.DataFrame) -> pd.DatetimeIndex:
+    if isinstance(weather.index, pd.DatetimeIndex):
+        return weather.index
+    if "timestamp" in weather.columns:
+        return pd.DatetimeIndex(pd.to_datetime(weather["timestamp"]))
+    raise ValueError("weather needs a DatetimeIndex or a 'timestamp' column (local standard time)")
+
+
+def _weather_key(weather: pd.DataFrame) -> str:
+    idx = _weather_index(weather)
+    h = hashlib.sha1()
+    h.update(idx.asi8.tobytes())
+    for c in WEATHER_COLS:
+        h.update(np.ascontiguousarray(weather[c].to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()
+
+
+def _solar_position(idx: pd.DatetimeIndex, site: SolarSite, stamp_offset_h: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorised solar zenith / azimuth (radians, azimuth clockwise from north).
+    Spencer (1971) declination + equation of time; accurate to well under 1 degree,
+    which is plenty for typical-day references.
+    """
+    doy = idx.dayofyear.to_numpy(dtype=float)
+    clock_h = idx.hour.to_numpy(dtype=float) + idx.minute.to_numpy(dtype=float) / 60.0 + stamp_offset_h
+
+    b = 2.0 * np.pi * (doy - 1.0 + (clock_h - 12.0) / 24.0) / 365.0
+    decl = (
+        0.006918 - 0.399912 * np.cos(b) + 0.070257 * np.sin(b)
+        - 0.006758 * np.cos(2 * b) + 0.000907 * np.sin(2 * b)
+        - 0.002697 * np.cos(3 * b) + 0.00148 * np.sin(3 * b)
+    )
+    eot_min = 229.18 * (
+        0.000075 + 0.001868 * np.cos(b) - 0.032077 * np.sin(b)
+        - 0.014615 * np.cos(2 * b) - 0.040849 * np.sin(2 * b)
+    )
+
+    solar_h = clock_h + (4.0 * (site.longitude - 15.0 * site.tz_hours) + eot_min) / 60.0
+    omega = np.radians(15.0 * (solar_h - 12.0))
+    lat = np.radians(site.latitude)
+
+    cos_z = np.sin(lat) * np.sin(decl) + np.cos(lat) * np.cos(decl) * np.cos(omega)
+    zenith = np.arccos(np.clip(cos_z, -1.0, 1.0))
+    azimuth = np.arctan2(np.sin(omega), np.cos(omega) * np.sin(lat) - np.tan(decl) * np.cos(lat)) + np.pi
+    return zenith, azimuth
+
+
+def _poa(cos_aoi, tilt, ghi, dni, dhi, albedo) -> np.ndarray:
+    """Isotropic-sky plane-of-array irradiance (W/m2)."""
+    beam = dni * np.clip(cos_aoi, 0.0, None)
+    sky = dhi * (1.0 + np.cos(tilt)) / 2.0
+    ground = ghi * albedo * (1.0 - np.cos(tilt)) / 2.0
+    return beam + sky + ground
+
+
+def _fixed_cos_aoi(zenith, azimuth, tilt, surf_az) -> np.ndarray:
+    return np.cos(zenith) * np.cos(tilt) + np.sin(zenith) * np.sin(tilt) * np.cos(azimuth - surf_az)
+
+
+def _dc_kw_per_mwp(poa: np.ndarray, temp_air: np.ndarray, losses: SolarLosses) -> np.ndarray:
+    """POA (W/m2) -> DC kW per MWp with NOCT cell temperature and soiling."""
+    t_cell = temp_air + poa * (losses.noct_c - 20.0) / 800.0
+    temp_factor = 1.0 + losses.temp_coeff * (t_cell - 25.0)
+    kw = poa * temp_factor * (1.0 - losses.soiling) * (1.0 - losses.other)
+    return np.clip(kw, 0.0, None)
+
+
+# -----------------------------
+# MAIN BUILDERS
+# -----------------------------
+def build_solar_references(
+    weather: pd.DataFrame,
+    site: SolarSite,
+    losses: SolarLosses = SolarLosses(),
+    colmap: ExcelColMap = ExcelColMap(),
+    stamp_offset_h: float = 0.5,
+) -> pd.DataFrame:
+    """
+    Chronological 1 MWp reference profiles (kW) for FT, SAT and EW in one pass.
+
+    weather: hourly rows with ghi, dni, dhi (W/m2) and temp_air (degC),
+             indexed by local standard time (or with a 'timestamp' column).
+    stamp_offset_h: where inside the interval the sun is evaluated
+                    (0.5 = mid-hour, matching PVsyst-style hour-beginning stamps).
+
+    Output columns use the colmap solar names, so the result drops straight
+    into the engine once reduced to the typical day.
+    Cached per (site, losses, weather contents); the last PROFILE_CACHE_SIZE are kept.
+    """
+    missing = [c for c in WEATHER_COLS if c not in weather.columns]
+    if missing:
+        raise KeyError(f"[solar weather] Missing columns: {missing}. Available: {list(weather.columns)}")
+
+    key = (site, losses, colmap, float(stamp_offset_h), _weather_key(weather))
+    hit = _PROFILE_CACHE.get(key)
+    if hit is not None:
+        _PROFILE_CACHE.move_to_end(key)
+        return hit.copy()
+
+    idx = _weather_index(weather)
+    ghi = weather["ghi"].to_numpy(dtype=float)
+    dni = weather["dni"].to_numpy(dtype=float)
+    dhi = weather["dhi"].to_numpy(dtype=float)
+    temp_air = weather["temp_air"].to_numpy(dtype=float)
+
+    zenith, azimuth = _solar_position(idx, site, stamp_offset_h)
+    sun_up = np.cos(zenith) > 0.0
+    dni = np.where(sun_up, dni, 0.0)
+
+    # Fixed tilt, facing the equator unless told otherwise
+    ft_tilt = np.radians(abs(site.latitude) if site.ft_tilt is None else site.ft_tilt)
+    ft_az = site.ft_azimuth if site.ft_azimuth is not None else (180.0 if site.latitude >= 0 else 0.0)
+    ft_poa = _poa(_fixed_cos_aoi(zenith, azimuth, ft_tilt, np.radians(ft_az)), ft_tilt, ghi, dni, dhi, site.albedo)
+
+    # Single-axis tracker: rotate about the N-S axis towards the sun (east-west plane)
+    sx = np.sin(zenith) * np.sin(azimuth)          # east component of the sun vector
+    sz = np.cos(zenith)                            # up component
+    limit = np.radians(site.sat_max_angle)
+    rot = np.clip(np.arctan2(sx, sz), -limit, limit)
+    rot = np.where(sun_up, rot, 0.0)
+    sat_cos_aoi = np.sin(rot) * sx + np.cos(rot) * sz
+    sat_poa = _poa(sat_cos_aoi, np.abs(rot), ghi, dni, dhi, site.albedo)
+
+    # East-west: mean of the two halves
+    ew_tilt = np.radians(site.ew_tilt)
+    ew_east = _poa(_fixed_cos_aoi(zenith, azimuth, ew_tilt, np.radians(90.0)), ew_tilt, ghi, dni, dhi, site.albedo)
+    ew_west = _poa(_fixed_cos_aoi(zenith, azimuth, ew_tilt, np.radians(270.0)), ew_tilt, ghi, dni, dhi, site.albedo)
+    ew_poa = 0.5 * (ew_east + ew_west)
+
+    out = pd.DataFrame(
+        {
+            colmap.solar_ft_1mwp: _dc_kw_per_mwp(ft_poa, temp_air, losses),
+            colmap.solar_sat_1mwp: _dc_kw_per_mwp(sat_poa, temp_air, losses),
+            colmap.solar_ew_1mwp: _dc_kw_per_mwp(ew_poa, temp_air, losses),
+        },
+        index=idx,
+    )
+
+    _PROFILE_CACHE[key] = out
+    while len(_PROFILE_CACHE) > PROFILE_CACHE_SIZE:
+        _PROFILE_CACHE.popitem(last=False)
+    return out.copy()
+
+
+def solar_references_typical_day(
+    weather: pd.DataFrame,
+    site: SolarSite,
+    losses: SolarLosses = SolarLosses(),
+    colmap: ExcelColMap = ExcelColMap(),
+) -> pd.DataFrame:
+    """
+    Same references collapsed to the engine's typical day:
+      month | hour | <ft> | <sat> | <ew>
+    (mean kW per month x hour), ready to merge into model_df.
+    """
+    refs = build_solar_references(weather, site, losses=losses, colmap=colmap)
+    idx = refs.index
+
+    refs = refs.reset_index(drop=True)
+    refs["month"] = np.asarray(MONTH_ORDER)[idx.month.to_numpy() - 1]
+    refs["hour"] = idx.hour.to_numpy()
+
+    out = refs.groupby(["month", "hour"], as_index=False, observed=True).mean()
+    out["month"] = pd.Categorical(out["month"], categories=MONTH_ORDER, ordered=True)
+    return out.sort_values(["month", "hour"]).reset_index(drop=True)
+
+
+def clear_solar_cache() -> None:
+    _PROFILE_CACHE.clear()
@@ -1,11 +1,14 @@
 import pandas as pd
 
+from core.instrumentation import frame_counts, traced
+
 # Your banking slabs:
 # A: 12am–6am  -> hours 0..5
 # C: 6am–9am   -> hours 6..8
 # B: 9am–5pm   -> hours 9..16
 # D: 5pm–12am  -> hours 17..23
 
+@traced("tod.add_tod_slot", frame_counts)
 def add_tod_slot(df: pd.DataFrame, hour_col: str = "hour", out_col: str = "tod_slot") -> pd.DataFrame:
     h = df[hour_col].astype(int)
 
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from core.model_builder import MONTH_ORDER
+
+DAYS_NON_LEAP = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+DAYS_LEAP = np.array([31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+HOURS_NON_LEAP = 8760
+HOURS_LEAP = 8784
+
+# source hash -> (12, 24) typical-day array, least recently used first
+_TYPICAL_CACHE: OrderedDict[str, np.ndarray] = OrderedDict()
+TYPICAL_CACHE_SIZE = 256
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _infer_layout(n: int, steps_per_hour: int | None, leap: bool | None) -> tuple[int, bool]:
+    """
+    Work out (steps_per_hour, leap) from the series length.
+    8760 * k -> non-leap year at k steps/hour, 8784 * k -> leap year.
+    """
+    if steps_per_hour is not None:
+        k = int(steps_per_hour)
+        if leap is None:
+            leap = n == HOURS_LEAP * k
+        hours = HOURS_LEAP if leap else HOURS_NON_LEAP
+        if n != hours * k:
+            raise ValueError(f"Expected {hours * k} values for {k} steps/hour (leap={leap}), got {n}")
+        return k, bool(leap)
+
+    if n % HOURS_NON_LEAP == 0 and leap is not True:
+        return n // HOURS_NON_LEAP, False
+    if n % HOURS_LEAP == 0 and leap is not False:
+        return n // HOURS_LEAP, True
+
+    raise ValueError(
+        f"Cannot infer resolution from {n} values: expected a full chronological year "
+        f"(multiple of {HOURS_NON_LEAP} or {HOURS_LEAP})"
+    )
+
+
+def _source_key(values: np.ndarray, k: int, leap: bool) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{k}:{int(leap)}:{values.dtype.str}:".encode())
+    h.update(values.tobytes())
+    return h.hexdigest()
+
+
+# -----------------------------
+# Reducer
+# -----------------------------
+def reduce_to_typical_day(
+    values,
+    steps_per_hour: int | None = None,
+    leap: bool | None = None,
+) -> np.ndarray:
+    """
+    Collapse one chronological year (Jan 1 00:00 onwards, any fixed resolution)
+    into the engine's typical day: a (12, 24) array of month x hour means.
+
+    Resolution is inferred from the length unless steps_per_hour is given.
+    NaNs are treated as gaps (excluded from the mean); an all-gap cell becomes 0.
+    Results are memoised by source hash; the last TYPICAL_CACHE_SIZE are kept.
+    """
+    arr = np.ascontiguousarray(np.asarray(values, dtype=float).ravel())
+    k, leap = _infer_layout(arr.size, steps_per_hour, leap)
+
+    key = _source_key(arr, k, leap)
+    hit = _TYPICAL_CACHE.get(key)
+    if hit is not None:
+        _TYPICAL_CACHE.move_to_end(key)
+        return hit.copy()
+
+    days_in_month = DAYS_LEAP if leap else DAYS_NON_LEAP
+    n_days = int(days_in_month.sum())
+
+    # (day, hour, sub-hour step) -> per-day hourly sums / counts
+    cube = arr.reshape(n_days, 24, k)
+    valid = ~np.isnan(cube)
+    day_sum = np.where(valid, cube, 0.0).sum(axis=2)
+    day_cnt = valid.sum(axis=2)
+
+    # Sum consecutive days into months in one shot
+    month_starts = np.concatenate([[0], np.cumsum(days_in_month)[:-1]])
+    month_sum = np.add.reduceat(day_sum, month_starts, axis=0)
+    month_cnt = np.add.reduceat(day_cnt, month_starts, axis=0)
+
+    out = np.divide(month_sum, month_cnt, out=np.zeros_like(month_sum), where=month_cnt > 0)
+
+    _TYPICAL_CACHE[key] = out
+    while len(_TYPICAL_CACHE) > TYPICAL_CACHE_SIZE:
+        _TYPICAL_CACHE.popitem(last=False)
+    return out.copy()
+
+
+def typical_day_frame(
+    profiles: dict[str, object],
+    steps_per_hour: dict[str, int] | None = None,
+) -> pd.DataFrame:
+    """
+    Reduce several chronological profiles (each at its own resolution) into one
+    model_df-shaped table:
+      month | hour | <profile names...>
+    """
+    steps_per_hour = steps_per_hour or {}
+
+    out = pd.DataFrame({
+        "month": pd.Categorical(np.repeat(MONTH_ORDER, 24), categories=MONTH_ORDER, ordered=True),
+        "hour": np.tile(np.arange(24), 12),
+    })
+    for name, values in profiles.items():
+        out[name] = reduce_to_typical_day(values, steps_per_hour=steps_per_hour.get(name)).ravel()
+
+    return out
+
+
+def clear_typical_day_cache() -> None:
+    _TYPICAL_CACHE.clear()
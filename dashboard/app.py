@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import os
 import sys
-import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -12,11 +16,48 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from core.excel_option_engine import ExcelColMap
+from core.batch_engine import CompiledModel, compile_model
+from core.block_layout import LayoutCache
+from core.excel_option_engine import ExcelColMap, OptionSizing
+from core.fingerprint import bytes_fingerprint, file_fingerprint
+from core.jobs import JobManager
+from core.lazy_model import LazyModel, engine_columns, required_columns
+from core.model_cache import ModelCache
+from core.response_surface import SurfaceBuilder, effective_solar_mode
+from core.result_store import ScenarioStore
 from dashboard.components.sidebar_inputs import render_sidebar
 from dashboard.components.kpis import render_kpis
-from dashboard.components.charts import render_charts_energy, render_charts_costs
-from dashboard.services.option_service import load_base_model, run_option, summarize_totals
+from dashboard.components.charts import (
+    PREVIEW_NOTE,
+    cost_figures,
+    energy_figures,
+    preview_figures,
+    render_charts_costs,
+    render_charts_energy,
+    render_preview_chart,
+    render_sizing_heatmaps,
+)
+from dashboard.components.comparison import render_comparison
+from dashboard.components.fragments import (
+    DEBUG_KEY,
+    dependency_key,
+    memo,
+    memo_get,
+    memo_put,
+    panel,
+    render_timings_overlay,
+    timed,
+)
+from dashboard.components.jobs_panel import render_jobs_panel
+from dashboard.services.upload_store import UploadStore
+from dashboard.services.option_service import (
+    model_for_columns,
+    open_workbook_model,
+    preview_option,
+    run_option_cached,
+    summarize_totals,
+    sweep_solar_wind,
+)
 
 
 st.set_page_config(page_title="Hybrid RE Options Dashboard", layout="wide")
@@ -48,59 +89,324 @@ st.divider()
 default_demo = str((ROOT / "data" / "demo" / "MH_BESS_Solar_Wind_DEMO.xlsx").resolve())
 
 
+# Scenario result store (shared across sessions and restarts)
+SCENARIO_DB = ROOT / "data" / "cache" / "scenarios.sqlite"
+
+# Background job checkpoints + worker processes for long studies
+JOBS_DIR = ROOT / "data" / "cache" / "jobs"
+JOB_WORKERS = int(os.environ.get("HYBRID_RE_JOB_WORKERS", "2"))
+
+# Parsed-model memory budget shared by all sessions in this process
+MODEL_CACHE_MB = int(os.environ.get("HYBRID_RE_MODEL_CACHE_MB", "512"))
+
+# Block layouts of known workbook templates (skips header/title detection)
+LAYOUT_CACHE = ROOT / "data" / "cache" / "layouts.json"
+
+# Uploaded workbooks, stored once per distinct content (shared by all sessions)
+UPLOADS_DIR = ROOT / "data" / "cache" / "uploads"
+UPLOAD_QUOTA_MB = int(os.environ.get("HYBRID_RE_UPLOAD_QUOTA_MB", "2048"))
+
+# Exact engine runs behind the interpolated preview (threads shared by all sessions)
+EXACT_WORKERS = int(os.environ.get("HYBRID_RE_EXACT_WORKERS", "2"))
+EXACT_POLL_SECONDS = 0.3
+EXACT_RUN_KEY = "exact_run"
+
+
+@st.cache_resource(show_spinner=False)
+def _model_cache() -> ModelCache:
+    return ModelCache(max_bytes=MODEL_CACHE_MB * 1024 * 1024)
+
+
+@st.cache_resource(show_spinner=False)
+def _layout_cache() -> LayoutCache:
+    return LayoutCache(LAYOUT_CACHE)
+
+
+def _lazy_model(workbook_fp: str, load_path) -> LazyModel:
+    """Workbook read + block layout, shared across sessions; profiles are parsed on first use."""
+    return _model_cache().get_or_load(
+        ("lazy", workbook_fp), lambda: open_workbook_model(load_path(), layouts=_layout_cache())
+    )
+
+
+def _model_for(workbook_fp: str, lazy: LazyModel, columns: list[str]) -> pd.DataFrame:
+    """Parsed model with just these profile columns, shared (zero-copy) across sessions."""
+    def _load() -> pd.DataFrame:
+        df = model_for_columns(lazy, columns)
+        # the shared LazyModel keeps the blocks it just parsed; re-size it against the budget
+        _model_cache().refresh(("lazy", workbook_fp))
+        return df
+
+    return _model_cache().get_or_load(("model", workbook_fp, tuple(columns)), _load)
+
+
+def _compiled_model(workbook_fp: str, lazy: LazyModel, columns: list[str] | None = None) -> CompiledModel:
+    """Batch-engine form of the model (tiny), cached next to the parsed model."""
+    columns = engine_columns(ExcelColMap()) if columns is None else columns
+    return _model_cache().get_or_load(
+        ("compiled", workbook_fp, tuple(columns)),
+        lambda: compile_model(_model_for(workbook_fp, lazy, columns)),
+    )
+
+
 @st.cache_data(show_spinner=False)
-def _cached_load_base(excel_path: str) -> pd.DataFrame:
-    return load_base_model(excel_path, colmap=ExcelColMap())
+def _cached_file_fingerprint(excel_path: str, mtime: float) -> str:
+    return file_fingerprint(Path(excel_path))
+
+
+@st.cache_resource(show_spinner=False)
+def _job_manager() -> JobManager:
+    return JobManager(JOBS_DIR, max_workers=JOB_WORKERS)
+
+
+@st.cache_resource(show_spinner=False)
+def _surface_builder() -> SurfaceBuilder:
+    # finished surfaces live in the shared model cache, next to the model they came from
+    return SurfaceBuilder(_model_cache())
+
+
+@st.cache_resource(show_spinner=False)
+def _upload_store() -> UploadStore:
+    return UploadStore(UPLOADS_DIR, quota_bytes=UPLOAD_QUOTA_MB * 1024 * 1024)
+
+
+def _upload_fingerprint(uploaded) -> str:
+    """Hash each upload once per session instead of on every rerun."""
+    fps = st.session_state.setdefault("upload_fingerprints", {})
+    fp = fps.get(uploaded.file_id)
+    if fp is None:
+        fp = bytes_fingerprint(uploaded.getbuffer())
+        fps[uploaded.file_id] = fp
+    return fp
+
 
+def _hold_upload(workbook_fp: str | None) -> None:
+    """Keep this session's reference on the upload it is using (None releases it)."""
+    store = _upload_store()
+    holder = st.session_state.setdefault("upload_holder", uuid.uuid4().hex)
+    prev = st.session_state.get("upload_fp")
+    if prev and prev != workbook_fp:
+        store.release(prev, holder)
+    if workbook_fp:
+        store.acquire(workbook_fp, holder)   # renewed every rerun, lapses after the lease
+    st.session_state["upload_fp"] = workbook_fp
 
-# Sidebar inputs
+
+@st.cache_resource(show_spinner=False)
+def _scenario_store() -> ScenarioStore:
+    return ScenarioStore(SCENARIO_DB)
+
+
+@st.cache_resource(show_spinner=False)
+def _exact_runner() -> ThreadPoolExecutor:
+    # exact engine runs for sidebar edits; the page shows the surface preview meanwhile
+    return ThreadPoolExecutor(max_workers=EXACT_WORKERS, thread_name_prefix="hre-exact")
+
+
+@st.fragment(run_every=EXACT_POLL_SECONDS)
+def _await_exact_run(dep: str) -> None:
+    """Rerun the page once this session's background exact run has finished."""
+    pending = st.session_state.get(EXACT_RUN_KEY)
+    if pending is not None and pending[0] == dep and pending[1].done():
+        st.rerun()
+
+
+# Sidebar inputs (Streamlit fragments can't write to the sidebar, so these stay in the full run)
 ui = render_sidebar(default_excel_path=default_demo)
+st.sidebar.toggle("Show fragment timings", key=DEBUG_KEY, help="Debug overlay: execution time per page fragment")
 excel_input = ui.excel_input
 
 try:
     if isinstance(excel_input, str):
         # Demo mode: use file path
-        model_df = _cached_load_base(excel_input)
+        _hold_upload(None)
+        workbook_fp = _cached_file_fingerprint(excel_input, Path(excel_input).stat().st_mtime)
+        lazy = _lazy_model(workbook_fp, lambda: excel_input)
     else:
-        # Upload mode: UploadedFile -> temp file path
+        # Upload mode: content-addressed file in the upload store, parsed once per distinct content
         suffix = Path(excel_input.name).suffix.lower()
         if suffix not in [".xlsx", ".xls"]:
             st.error("Unsupported file type. Please upload .xlsx or .xls")
             st.stop()
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(excel_input.getbuffer())
-            tmp_path = tmp.name
+        workbook_fp = _upload_fingerprint(excel_input)
+        _hold_upload(workbook_fp)
+
+        def _upload_path() -> str:
+            # only touches disk when the model is not already cached
+            _, path = _upload_store().put(excel_input.getbuffer(), suffix, fingerprint=workbook_fp)
+            return str(path)
+
+        lazy = _lazy_model(workbook_fp, _upload_path)
 
-        model_df = _cached_load_base(tmp_path)
+    # only the blocks this sizing reads are parsed now; other tabs parse the rest on demand
+    run_columns = required_columns(ui.sizing, ExcelColMap())
+    model_df = _model_for(workbook_fp, lazy, run_columns)
 except Exception as e:
     st.error(f"Failed to load Excel/model_df.\n\n{e}")
     st.stop()
 
-try:
-    annual_df = run_option(model_df, ui.sizing, rates=ui.rates, colmap=ExcelColMap())
-except Exception as e:
-    st.error(f"Failed to compute option table.\n\n{e}")
-    st.stop()
+cache_stats = _model_cache().stats()
+st.sidebar.caption(
+    f"Model cache: {cache_stats.entries} models, {cache_stats.bytes_used / 1e6:.1f} / "
+    f"{cache_stats.max_bytes / 1e6:.0f} MB, {cache_stats.hits} hits / {cache_stats.misses} misses"
+)
 
-# KPIs (top row)
-totals = summarize_totals(annual_df)
-render_kpis(totals)
+# Every panel below memoises on a dependency key of its inputs: a sidebar edit (full rerun)
+# only recomputes panels whose inputs changed, and widgets inside a tab rerun that tab alone.
+option_dep = dependency_key(workbook_fp, ui.sizing, ui.rates)
 
-st.divider()
+# KPIs (top row): interpolated from the response surface at once; the exact engine run goes to
+# a background thread and a small polling fragment reruns the page when it has finished
+exact_pending = False
+preview_df = None
 
-# Tabs
+with timed("computation"):
+    annual_df = memo_get("computation", option_dep)
+    if annual_df is None:
+        try:
+            solar_mode = effective_solar_mode(ui.sizing)
+            surface = _surface_builder().get(
+                ("surface", workbook_fp, solar_mode), _compiled_model(workbook_fp, lazy, run_columns), solar_mode
+            )
+            preview_df = preview_option(surface, ui.sizing, ui.rates) if surface is not None else None
+        except Exception:
+            preview_df = None   # the preview is best-effort; the exact run reports real errors
 
-tab_overview, tab_energy, tab_costs = st.tabs(["Overview", "Energy", "Costs"])
+        pending = st.session_state.get(EXACT_RUN_KEY)
+        if pending is None or pending[0] != option_dep:
+            if pending is not None:
+                pending[1].cancel()   # superseded by this edit (no-op once it has started)
+            future = _exact_runner().submit(
+                run_option_cached, model_df, ui.sizing, ui.rates,
+                workbook_fp=workbook_fp, store=_scenario_store(), colmap=ExcelColMap(),
+            )
+            st.session_state[EXACT_RUN_KEY] = (option_dep, future)
+        else:
+            future = pending[1]
 
-with tab_overview:
+        if preview_df is None or future.done():
+            # nothing to show meanwhile (or already finished): take the exact table now
+            st.session_state.pop(EXACT_RUN_KEY, None)
+            try:
+                annual_df = future.result()
+            except Exception as e:
+                st.error(f"Failed to compute option table.\n\n{e}")
+                st.stop()
+            memo_put("computation", option_dep, annual_df)
+        else:
+            exact_pending = True
+
+with timed("kpis"):
+    if exact_pending:
+        render_kpis(summarize_totals(preview_df))
+        st.caption("≈ Interpolated annual totals, exact numbers loading…")
+        _await_exact_run(option_dep)
+    else:
+        render_kpis(summarize_totals(annual_df))
+
+st.divider()
+
+
+# -----------------------------
+# Tabs (one fragment each)
+# -----------------------------
+# While the exact run is pending these three tabs show the preview's annual totals only
+@panel("overview")
+def _overview_tab(annual_df: pd.DataFrame | None, preview_df: pd.DataFrame | None) -> None:
     st.subheader("Annual TOD table")
+    if annual_df is None:
+        st.caption(PREVIEW_NOTE)
+        st.dataframe(preview_df, use_container_width=True)
+        return
     st.dataframe(annual_df, use_container_width=True)
 
-with tab_energy:
+
+@panel("energy")
+def _energy_tab(annual_df: pd.DataFrame | None, preview_df: pd.DataFrame | None, dep: str) -> None:
     st.subheader("Energy charts")
-    render_charts_energy(annual_df)
+    if annual_df is None:
+        render_preview_chart(memo("preview_charts", dep, lambda: preview_figures(preview_df)), "energy_total")
+        return
+    render_charts_energy(annual_df, figures=memo("energy", dep, lambda: energy_figures(annual_df)))
 
-with tab_costs:
+
+@panel("costs")
+def _costs_tab(annual_df: pd.DataFrame | None, preview_df: pd.DataFrame | None, dep: str) -> None:
     st.subheader("Cost charts")
-    render_charts_costs(annual_df)
+    if annual_df is None:
+        render_preview_chart(memo("preview_charts", dep, lambda: preview_figures(preview_df)), "cost_total")
+        return
+    render_charts_costs(annual_df, figures=memo("costs", dep, lambda: cost_figures(annual_df)))
+
+
+@panel("compare")
+def _compare_tab(workbook_fp: str, lazy: LazyModel, sizing: OptionSizing, rates: dict) -> None:
+    st.subheader("Scenario comparison")
+    try:
+        render_comparison(_compiled_model(workbook_fp, lazy), workbook_fp, sizing, rates)
+    except Exception as e:
+        st.error(f"Failed to compare scenarios.\n\n{e}")
+
+
+@panel("sizing_map")
+def _sizing_tab(workbook_fp: str, lazy: LazyModel, sizing: OptionSizing, rates: dict) -> None:
+    st.subheader("Solar x wind sizing map")
+    c1, c2, c3 = st.columns(3)
+    solar_max = c1.number_input("Solar max (MWp)", min_value=0.1, value=max(5.0, 2.0 * sizing.solar_mw), step=0.5)
+    wind_max = c2.number_input("Wind max (MW)", min_value=0.1, value=max(3.0, 2.0 * sizing.wind_mw), step=0.5)
+    steps = int(c3.number_input("Grid steps per axis", min_value=5, max_value=200, value=50, step=5))
+
+    solar_values = np.linspace(0.0, float(solar_max), steps)
+    wind_values = np.linspace(0.0, float(wind_max), steps)
+
+    # the sweep ignores the sidebar solar/wind sizes (they are the axes); moving them only moves the marker
+    base = replace(sizing, solar_mw=0.0, wind_mw=0.0)
+    dep = dependency_key(workbook_fp, base, rates, solar_values, wind_values)
+    try:
+        grids = memo("sizing_map", dep, lambda: sweep_solar_wind(
+            _compiled_model(workbook_fp, lazy), sizing, rates, solar_values, wind_values
+        ))
+    except Exception as e:
+        st.error(f"Failed to compute sizing map.\n\n{e}")
+    else:
+        if not sizing.solar_mode:
+            st.caption("Solar mode is None: the solar axis has no effect. Pick FT/SAT/EW in the sidebar.")
+        render_sizing_heatmaps(solar_values, wind_values, grids, current=(sizing.solar_mw, sizing.wind_mw))
+
+
+@panel("studies")
+def _studies_tab(workbook_fp: str, lazy: LazyModel, sizing: OptionSizing, rates: dict) -> None:
+    st.subheader("Background studies")
+    # sweeps vary solar size and mode, so they need every engine profile, not just this sizing's
+    try:
+        compiled = _compiled_model(workbook_fp, lazy)
+    except Exception as e:
+        st.error(f"Failed to prepare the model for background studies.\n\n{e}")
+        return
+    render_jobs_panel(_job_manager(), compiled, sizing, rates)
+
+
+tab_overview, tab_energy, tab_costs, tab_compare, tab_sizing, tab_studies = st.tabs(
+    ["Overview", "Energy", "Costs", "Compare", "Sizing map", "Studies"]
+)
+
+with tab_overview:
+    _overview_tab(annual_df, preview_df)
+
+with tab_energy:
+    _energy_tab(annual_df, preview_df, option_dep)
+
+with tab_costs:
+    _costs_tab(annual_df, preview_df, option_dep)
+
+with tab_compare:
+    _compare_tab(workbook_fp, lazy, ui.sizing, ui.rates)
+
+with tab_sizing:
+    _sizing_tab(workbook_fp, lazy, ui.sizing, ui.rates)
+
+with tab_studies:
+    _studies_tab(workbook_fp, lazy, ui.sizing, ui.rates)
+
+render_timings_overlay()
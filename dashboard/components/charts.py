@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 
+from core.instrumentation import traced
+
 SLOT_ORDER = ["A", "C", "B", "D"]
 
 
@@ -24,39 +27,89 @@ def _has_cols(df: pd.DataFrame, cols: list[str]) -> bool:
     return all(c in df.columns for c in cols)
 
 
-def render_charts_energy(annual_df: pd.DataFrame) -> None:
-    """Energy tab: clean layout."""
-    df = _slot_df(annual_df)
+# Energy / Costs charts take one annual table, or {scenario name: table} to overlay several
+# scenarios in the same charts (Compare tab), coloured by scenario
+Tables = pd.DataFrame | dict[str, pd.DataFrame]
+
+
+def _chart_df(tables: Tables) -> tuple[pd.DataFrame, bool]:
+    """Slot rows of one table, or of several stacked with a 'scenario' column; second item = several."""
+    if isinstance(tables, pd.DataFrame):
+        return _slot_df(tables), False
+    frames = []
+    for name, annual_df in tables.items():
+        df = _slot_df(annual_df)
+        df["scenario"] = name
+        frames.append(df)
+    return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), True
+
+
+@traced("charts.energy_figures", lambda figs: {"figures": len(figs)})
+def energy_figures(tables: Tables) -> dict[str, go.Figure]:
+    """Energy tab figures by chart key (absent when their columns are missing)."""
+    df, multi = _chart_df(tables)
+    figs = {}
+    by_scenario = {"color": "scenario", "barmode": "group"} if multi else {}
 
     energy_cols = [c for c in ["load_kwh", "solar_kwh", "wind_kwh", "total_re_kwh", "grid_kwh"] if c in df.columns]
     if not energy_cols:
+        return figs
+
+    if multi:
+        melt = df.melt(id_vars=["tod_slot", "scenario"], value_vars=energy_cols, var_name="metric", value_name="kwh")
+        figs["energy_by_slot"] = px.bar(
+            melt, x="tod_slot", y="kwh", color="scenario", facet_col="metric", barmode="group", title="Energy by TOD slot"
+        )
+    else:
+        melt = df.melt(id_vars=["tod_slot"], value_vars=energy_cols, var_name="metric", value_name="kwh")
+        figs["energy_by_slot"] = px.bar(melt, x="tod_slot", y="kwh", color="metric", barmode="group", title="Energy by TOD slot")
+
+    if "re_percent" in df.columns:
+        figs["re_percent_by_slot"] = px.bar(df, x="tod_slot", y="re_percent", title="RE % by TOD slot", **by_scenario)
+
+    if multi and "grid_kwh" in df.columns:
+        figs["solar_vs_grid"] = px.bar(df, x="tod_slot", y="grid_kwh", title="Grid import by TOD slot (kWh)", **by_scenario)
+    elif _has_cols(df, ["solar_kwh", "grid_kwh"]):
+        figs["solar_vs_grid"] = px.bar(df, x="tod_slot", y=["solar_kwh", "grid_kwh"], barmode="group", title="Solar vs Grid (kWh)")
+
+    return figs
+
+
+@traced("charts.render_energy")
+def render_charts_energy(tables: Tables, figures: dict[str, go.Figure] | None = None, key: str = "") -> None:
+    """
+    Energy tab: clean layout. Pass prebuilt `figures` to skip rebuilding them; `key` prefixes
+    the chart keys when the charts appear twice on a page.
+    """
+    figs = energy_figures(tables) if figures is None else figures
+
+    if "energy_by_slot" not in figs:
         st.info("No energy columns found to plot.")
         return
 
-    melt = df.melt(id_vars=["tod_slot"], value_vars=energy_cols, var_name="metric", value_name="kwh")
-    fig1 = px.bar(melt, x="tod_slot", y="kwh", color="metric", barmode="group", title="Energy by TOD slot")
-    st.plotly_chart(fig1, use_container_width=True, key="energy_by_slot")
+    st.plotly_chart(figs["energy_by_slot"], use_container_width=True, key=f"{key}energy_by_slot")
 
     c1, c2 = st.columns(2, gap="large")
 
     with c1:
-        if "re_percent" in df.columns:
-            fig2 = px.bar(df, x="tod_slot", y="re_percent", title="RE % by TOD slot")
-            st.plotly_chart(fig2, use_container_width=True, key="re_percent_by_slot")
+        if "re_percent_by_slot" in figs:
+            st.plotly_chart(figs["re_percent_by_slot"], use_container_width=True, key=f"{key}re_percent_by_slot")
         else:
             st.info("re_percent not available.")
 
     with c2:
-        if _has_cols(df, ["solar_kwh", "grid_kwh"]):
-            fig3 = px.bar(df, x="tod_slot", y=["solar_kwh", "grid_kwh"], barmode="group", title="Solar vs Grid (kWh)")
-            st.plotly_chart(fig3, use_container_width=True, key="solar_vs_grid")
+        if "solar_vs_grid" in figs:
+            st.plotly_chart(figs["solar_vs_grid"], use_container_width=True, key=f"{key}solar_vs_grid")
         else:
             st.info("solar_kwh/grid_kwh not available.")
 
 
-def render_charts_costs(annual_df: pd.DataFrame) -> None:
-    """Costs tab: clean layout."""
-    df = _slot_df(annual_df)
+@traced("charts.cost_figures", lambda figs: {"figures": len(figs)})
+def cost_figures(tables: Tables) -> dict[str, go.Figure]:
+    """Costs tab figures by chart key (absent when their columns are missing)."""
+    df, multi = _chart_df(tables)
+    figs = {}
+    by_scenario = {"color": "scenario", "barmode": "group"} if multi else {}
 
     solar_c = "solar_cost_rs" if "solar_cost_rs" in df.columns else "solar_cost"
     wind_c = "wind_cost_rs" if "wind_cost_rs" in df.columns else "wind_cost"
@@ -64,26 +117,118 @@ def render_charts_costs(annual_df: pd.DataFrame) -> None:
     grid_c = "grid_cost_rs" if "grid_cost_rs" in df.columns else "grid_cost"
     total_c = "total_cost_rs" if "total_cost_rs" in df.columns else "total_cost"
 
+    if grid_c in df.columns:
+        figs["grid_cost_by_slot"] = px.bar(df, x="tod_slot", y=grid_c, title="Grid cost by TOD slot", **by_scenario)
+
+    if total_c in df.columns:
+        figs["total_cost_by_slot"] = px.bar(df, x="tod_slot", y=total_c, title="Total cost by TOD slot", **by_scenario)
+
+    breakdown_cols = [c for c in [solar_c, wind_c, bess_c, grid_c] if c in df.columns]
+    if breakdown_cols:
+        ids = ["tod_slot", "scenario"] if multi else ["tod_slot"]
+        melt = df.melt(id_vars=ids, value_vars=breakdown_cols, var_name="source", value_name="cost")
+        figs["cost_breakdown"] = px.bar(
+            melt, x="tod_slot", y="cost", color="source", barmode="stack", title="Cost breakdown by TOD slot",
+            **({"facet_col": "scenario"} if multi else {}),
+        )
+
+    return figs
+
+
+@traced("charts.render_costs")
+def render_charts_costs(tables: Tables, figures: dict[str, go.Figure] | None = None, key: str = "") -> None:
+    """Costs tab: clean layout. Pass prebuilt `figures` to skip rebuilding them; `key` as in render_charts_energy."""
+    figs = cost_figures(tables) if figures is None else figures
+
     c1, c2 = st.columns(2, gap="large")
 
     with c1:
-        if grid_c in df.columns:
-            fig1 = px.bar(df, x="tod_slot", y=grid_c, title="Grid cost by TOD slot")
-            st.plotly_chart(fig1, use_container_width=True, key="grid_cost_by_slot")
+        if "grid_cost_by_slot" in figs:
+            st.plotly_chart(figs["grid_cost_by_slot"], use_container_width=True, key=f"{key}grid_cost_by_slot")
         else:
             st.info("Grid cost column not found.")
 
     with c2:
-        if total_c in df.columns:
-            fig2 = px.bar(df, x="tod_slot", y=total_c, title="Total cost by TOD slot")
-            st.plotly_chart(fig2, use_container_width=True, key="total_cost_by_slot")
+        if "total_cost_by_slot" in figs:
+            st.plotly_chart(figs["total_cost_by_slot"], use_container_width=True, key=f"{key}total_cost_by_slot")
         else:
             st.info("Total cost column not found.")
 
-    breakdown_cols = [c for c in [solar_c, wind_c, bess_c, grid_c] if c in df.columns]
-    if breakdown_cols:
-        melt = df.melt(id_vars=["tod_slot"], value_vars=breakdown_cols, var_name="source", value_name="cost")
-        fig3 = px.bar(melt, x="tod_slot", y="cost", color="source", barmode="stack", title="Cost breakdown by TOD slot")
-        st.plotly_chart(fig3, use_container_width=True, key="cost_breakdown")
+    if "cost_breakdown" in figs:
+        st.plotly_chart(figs["cost_breakdown"], use_container_width=True, key=f"{key}cost_breakdown")
     else:
         st.info("No cost breakdown columns found.")
+
+
+PREVIEW_NOTE = "≈ Interpolated annual totals; the per-slot charts follow once the exact result is ready."
+
+
+@traced("charts.preview_figures", lambda figs: {"figures": len(figs)})
+def preview_figures(totals_df: pd.DataFrame) -> dict[str, go.Figure]:
+    """Annual-total bars for the interpolated preview (a Total row only, no per-slot split)."""
+    if totals_df is None or totals_df.empty:
+        return {}
+    row = totals_df.iloc[0]
+    figs = {}
+
+    energy = {c: row[c] for c in ["load_kwh", "solar_kwh", "wind_kwh", "total_re_kwh", "grid_kwh"] if c in row.index}
+    if energy:
+        df = pd.DataFrame({"metric": list(energy), "kwh": [float(v) for v in energy.values()]})
+        figs["energy_total"] = px.bar(df, x="metric", y="kwh", title="Annual energy (≈ preview)")
+
+    costs = {c: row[c] for c in ["solar_cost_rs", "wind_cost_rs", "bess_cost_rs", "grid_cost_rs"] if c in row.index}
+    if costs:
+        df = pd.DataFrame({"source": list(costs), "cost": [float(v) for v in costs.values()]})
+        figs["cost_total"] = px.bar(df, x="source", y="cost", title="Annual cost by source (≈ preview)")
+
+    return figs
+
+
+def render_preview_chart(figures: dict[str, go.Figure], key: str) -> None:
+    """One preview figure with the approximation note (Energy / Costs tabs while the exact run is pending)."""
+    st.caption(PREVIEW_NOTE)
+    if key in figures:
+        st.plotly_chart(figures[key], use_container_width=True, key=f"preview_{key}")
+
+
+HEATMAP_METRICS = {
+    "total_cost_rs": ("Total cost (₹)", "Viridis_r"),
+    "cost_per_kwh": ("Cost per kWh (₹/kWh)", "Viridis_r"),
+    "re_percent": ("RE %", "Greens"),
+    "cfe_percent": ("24/7 CFE %", "Greens"),
+}
+
+
+@traced("charts.render_sizing_heatmaps")
+def render_sizing_heatmaps(
+    solar_values,
+    wind_values,
+    grids: dict,
+    current: tuple[float, float] | None = None,
+) -> None:
+    """Heatmaps over solar MWp (y) x wind MW (x), with the sidebar point marked."""
+    metrics = {k: v for k, v in HEATMAP_METRICS.items() if k in grids}
+    cols = st.columns(max(len(metrics), 1), gap="large")
+
+    for col, (metric, (title, scale)) in zip(cols, metrics.items()):
+        z = grids[metric]
+        fig = go.Figure(
+            go.Heatmap(
+                x=list(wind_values), y=list(solar_values), z=z, colorscale=scale,
+                hovertemplate="Wind %{x:.2f} MW<br>Solar %{y:.2f} MWp<br>%{z:,.2f}<extra></extra>",
+            )
+        )
+        if current is not None:
+            fig.add_trace(
+                go.Scatter(
+                    x=[current[1]], y=[current[0]], mode="markers", name="Current",
+                    marker=dict(symbol="x", size=14, color="red", line=dict(width=2)),
+                    hovertemplate="Current sizing<extra></extra>",
+                )
+            )
+        fig.update_layout(
+            title=title, xaxis_title="Wind (MW)", yaxis_title="Solar (MWp)",
+            showlegend=False, margin=dict(l=10, r=10, t=40, b=10),
+        )
+        with col:
+            st.plotly_chart(fig, use_container_width=True, key=f"heatmap_{metric}")
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from core.batch_engine import CompiledModel
+from core.excel_option_engine import OptionSizing
+from dashboard.components.charts import render_charts_costs, render_charts_energy
+from dashboard.components.fragments import dependency_key
+from dashboard.services.option_service import run_options_batch, summarize_totals
+
+PINS_KEY = "pinned_scenarios"
+RESULTS_KEY = "pinned_results"
+MAX_PINS = 10
+
+
+def scenario_label(sizing: OptionSizing) -> str:
+    """Short human label, e.g. 'SAT 1.74 MWp + 0.5 MW wind'."""
+    parts = []
+    if sizing.solar_mode and sizing.solar_mw > 0:
+        parts.append(f"{sizing.solar_mode} {sizing.solar_mw:g} MWp")
+    if sizing.wind_mw > 0:
+        parts.append(f"{sizing.wind_mw:g} MW wind")
+    return " + ".join(parts) or "Grid only"
+
+
+def _pins() -> list[dict]:
+    return st.session_state.setdefault(PINS_KEY, [])
+
+
+def _results_key(workbook_fp: str, pins: list[dict], shared_rates: dict | None) -> str:
+    return dependency_key(workbook_fp, [(p["sizing"], p["rates"]) for p in pins], shared_rates)
+
+
+def _evaluate(compiled: CompiledModel, workbook_fp: str, pins: list[dict], shared_rates: dict | None) -> list[pd.DataFrame]:
+    """All pinned scenarios in one batched engine call, re-run only when inputs change."""
+    key = _results_key(workbook_fp, pins, shared_rates)
+    cached = st.session_state.get(RESULTS_KEY)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    rates = [shared_rates or p["rates"] for p in pins]
+    tables = run_options_batch(compiled, [p["sizing"] for p in pins], rates)
+    st.session_state[RESULTS_KEY] = (key, tables)
+    return tables
+
+
+def _pin_controls(sizing: OptionSizing, rates: dict) -> None:
+    pins = _pins()
+    c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+    name = c1.text_input("Scenario name (optional)", placeholder=scenario_label(sizing), key="pin_name")
+    if c2.button("📌 Pin current scenario", use_container_width=True, disabled=len(pins) >= MAX_PINS):
+        label = name.strip() or scenario_label(sizing)
+        existing = {p["name"] for p in pins}
+        if label in existing:
+            n = 2
+            while f"{label} ({n})" in existing:
+                n += 1
+            label = f"{label} ({n})"
+        pins.append({"name": label, "sizing": sizing, "rates": {k: dict(v) for k, v in rates.items()}})
+    if len(pins) >= MAX_PINS:
+        st.caption(f"Up to {MAX_PINS} pinned scenarios.")
+
+
+def render_comparison(compiled: CompiledModel, workbook_fp: str, sizing: OptionSizing, rates: dict) -> None:
+    """Compare tab: pin scenarios, evaluate them together, show tables, deltas and overlaid charts."""
+    _pin_controls(sizing, rates)
+
+    pins = _pins()
+    if not pins:
+        st.info("Pin the current sidebar scenario to start comparing.")
+        return
+
+    c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+    remove = c1.multiselect("Remove pinned", options=[p["name"] for p in pins], key="unpin_names")
+    if c2.button("Remove selected", use_container_width=True, disabled=not remove):
+        st.session_state[PINS_KEY] = [p for p in pins if p["name"] not in remove]
+        st.rerun(scope="fragment")
+
+    use_shared = st.toggle("Use current sidebar rates for all pinned scenarios", value=False)
+    tables = _evaluate(compiled, workbook_fp, pins, rates if use_shared else None)
+    names = [p["name"] for p in pins]
+
+    # -----------------------------
+    # Totals + deltas vs baseline
+    # -----------------------------
+    baseline = st.selectbox("Baseline", options=names, index=0)
+    totals = pd.DataFrame([summarize_totals(t) for t in tables], index=names)
+    totals["cost_per_kwh"] = totals["total_cost_rs"] / totals["load_kwh"].where(totals["load_kwh"] > 0)
+
+    deltas = totals - totals.loc[baseline]
+    summary = totals.join(deltas.add_prefix("Δ "))
+
+    st.markdown("**Totals and deltas vs baseline**")
+    st.dataframe(summary, use_container_width=True)
+
+    # -----------------------------
+    # Side-by-side annual tables
+    # -----------------------------
+    st.markdown("**Annual TOD tables**")
+    per_row = 2
+    for start in range(0, len(tables), per_row):
+        cols = st.columns(per_row, gap="large")
+        for col, name, table in zip(cols, names[start:start + per_row], tables[start:start + per_row]):
+            with col:
+                st.caption(name)
+                st.dataframe(table, use_container_width=True, hide_index=True)
+
+    # -----------------------------
+    # Energy / cost charts, scenarios overlaid
+    # -----------------------------
+    scenarios = dict(zip(names, tables))
+    st.markdown("**Energy**")
+    render_charts_energy(scenarios, key="cmp_")
+    st.markdown("**Costs**")
+    render_charts_costs(scenarios, key="cmp_")
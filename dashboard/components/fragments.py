@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from functools import wraps
+from typing import Any, Callable
+import hashlib
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core.instrumentation import TRACE_ENV, enabled as tracing_enabled, span_totals
+
+DEBUG_KEY = "debug_fragment_timings"
+TIMINGS_KEY = "fragment_timings"
+MEMO_KEY = "fragment_memo"
+MEMO_STATS_KEY = "fragment_memo_stats"   # memo hits/misses, kept apart from run timings
+
+
+# -----------------------------
+# Dependency keys + memo
+# -----------------------------
+def _jsonable(value: Any) -> Any:
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def dependency_key(*parts: Any) -> str:
+    """Stable hash of a panel's inputs (dataclasses, dicts, numbers, strings, arrays)."""
+    payload = json.dumps(parts, sort_keys=True, default=_jsonable)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _memo_stats(name: str) -> dict:
+    return st.session_state.setdefault(MEMO_STATS_KEY, {}).setdefault(name, {"hits": 0, "misses": 0, "reused": None})
+
+
+def memo_get(name: str, dep: str) -> Any | None:
+    hit = st.session_state.get(MEMO_KEY, {}).get(name)
+    value = hit[1] if hit is not None and hit[0] == dep else None
+    stats = _memo_stats(name)
+    stats["reused"] = value is not None
+    stats["hits" if value is not None else "misses"] += 1
+    return value
+
+
+def memo_put(name: str, dep: str, value: Any) -> None:
+    # one entry per panel: only the latest inputs are worth keeping
+    st.session_state.setdefault(MEMO_KEY, {})[name] = (dep, value)
+
+
+def memo(name: str, dep: str, build: Callable[[], Any]) -> Any:
+    """Panel output for these inputs; build() only runs when the dependency key changed."""
+    value = memo_get(name, dep)
+    if value is None:
+        value = build()
+        memo_put(name, dep, value)
+    return value
+
+
+# -----------------------------
+# Timing
+# -----------------------------
+def debug_enabled() -> bool:
+    return bool(st.session_state.get(DEBUG_KEY)) or st.query_params.get("debug") == "1"
+
+
+def _timing(name: str) -> dict:
+    return st.session_state.setdefault(TIMINGS_KEY, {}).setdefault(name, {"runs": 0, "ms": 0.0})
+
+
+@contextmanager
+def timed(name: str):
+    """Record wall time of one page section under `name`."""
+    t0 = time.perf_counter()
+    yield
+    entry = _timing(name)
+    entry["ms"] = (time.perf_counter() - t0) * 1000.0
+    entry["runs"] += 1
+
+
+def panel(name: str, fragment: bool = True):
+    """
+    Timed page section. With fragment=True it also becomes a Streamlit fragment: edits to
+    widgets inside it rerun only this function, not the sidebar, model load or other tabs.
+    """
+    def deco(fn):
+        @wraps(fn)
+        def run(*args, **kwargs):
+            with timed(name):
+                out = fn(*args, **kwargs)
+            if debug_enabled():
+                entry = _timing(name)
+                memo_hit = st.session_state.get(MEMO_STATS_KEY, {}).get(name, {}).get("reused")
+                note = " (inputs unchanged, reused)" if memo_hit else ""
+                st.caption(f"⏱ {name}: {entry['ms']:.1f} ms, run #{entry['runs']}{note}")
+            return out
+
+        return st.fragment(run) if fragment else run
+
+    return deco
+
+
+def render_timings_overlay() -> None:
+    """Per-fragment timings of the latest runs (only with the debug toggle or ?debug=1)."""
+    if not debug_enabled():
+        return
+    timings = st.session_state.get(TIMINGS_KEY, {})
+    if not timings:
+        return
+    df = pd.DataFrame(
+        [{"fragment": name, "last ms": round(t["ms"], 1), "runs": t["runs"]} for name, t in timings.items()]
+    )
+    memos = st.session_state.get(MEMO_STATS_KEY, {})
+    with st.expander("⏱ Fragment timings", expanded=True):
+        st.dataframe(df, hide_index=True, use_container_width=True)
+        if memos:
+            st.markdown("**Memoised panel outputs (this session)**")
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {"memo": name, "hits": m["hits"], "misses": m["misses"],
+                         "last": {True: "reused", False: "recomputed", None: "-"}[m["reused"]]}
+                        for name, m in memos.items()
+                    ]
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        _render_stage_spans()
+
+
+def _render_stage_spans() -> None:
+    """Process-wide stage spans (Excel parse, detection, merge, TOD, engine, costing, charts)."""
+    if not tracing_enabled():
+        st.caption(f"Start the app with {TRACE_ENV}=1 for stage-level timings.")
+        return
+    totals = span_totals()
+    if not totals:
+        return
+    st.markdown("**Stages (all sessions since start)**")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {"stage": name, "calls": t.count, "total ms": round(t.seconds * 1000.0, 1),
+                 "mean ms": round(t.seconds * 1000.0 / t.count, 2), "max ms": round(t.max_seconds * 1000.0, 1),
+                 "rows": t.rows, "bytes": t.bytes}
+                for name, t in sorted(totals.items(), key=lambda kv: -kv[1].seconds)
+            ]
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import numpy as np
+import streamlit as st
+
+from core.batch_engine import CompiledModel, sizing_grid
+from core.excel_option_engine import OptionSizing
+from core.jobs import CANCELLED, DONE, FAILED, INTERRUPTED, JobManager
+
+POLL_SECONDS = 2
+MAX_SWEEP_POINTS = 250_000
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _job_totals_csv(_manager: JobManager, job_id: str) -> bytes:
+    # finished jobs never change, so caching on job_id is safe
+    return _manager.result(job_id, totals_only=True).to_csv(index=False).encode()
+
+
+def _sweep_form(manager: JobManager, compiled: CompiledModel, sizing: OptionSizing, rates: dict) -> None:
+    with st.form("sweep_job_form"):
+        st.markdown("**Solar x wind sizing sweep** (uses the sidebar solar mode, load, losses and rates)")
+        c1, c2 = st.columns(2)
+        with c1:
+            s_min = st.number_input("Solar min (MWp)", min_value=0.0, value=0.0, step=0.1)
+            s_max = st.number_input("Solar max (MWp)", min_value=0.0, value=5.0, step=0.1)
+            s_n = st.number_input("Solar steps", min_value=1, max_value=1000, value=200, step=1)
+        with c2:
+            w_min = st.number_input("Wind min (MW)", min_value=0.0, value=0.0, step=0.1)
+            w_max = st.number_input("Wind max (MW)", min_value=0.0, value=3.0, step=0.1)
+            w_n = st.number_input("Wind steps", min_value=1, max_value=1000, value=200, step=1)
+        submitted = st.form_submit_button("Submit background job")
+
+    if not submitted:
+        return
+
+    n = int(s_n) * int(w_n)
+    if n > MAX_SWEEP_POINTS:
+        st.error(f"{n:,} points is above the {MAX_SWEEP_POINTS:,} limit for one job.")
+        return
+
+    solar_vals = np.linspace(float(s_min), float(s_max), int(s_n))
+    wind_vals = np.linspace(float(w_min), float(w_max), int(w_n))
+    # row-major like sizing_grid: scenario i -> (solar_vals[i // w_n], wind_vals[i % w_n])
+    sizings = sizing_grid(sizing, solar_vals, wind_vals)
+    ids = np.char.add(np.char.mod("s%.3f", solar_vals)[:, None], np.char.mod("_w%.3f", wind_vals)[None, :]).ravel()
+
+    job_id = manager.submit(
+        compiled, sizings, rates, scenario_ids=ids,
+        label=f"{sizing.solar_mode or 'No solar'} sweep {int(s_n)}x{int(w_n)}",
+    )
+    st.success(f"Submitted job {job_id} ({n:,} scenarios).")
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _job_list(manager: JobManager) -> None:
+    # re-runs on its own timer: polling never reruns the rest of the page
+    jobs = manager.list_jobs()
+    if not jobs:
+        st.caption("No background jobs yet.")
+        return
+
+    for job in jobs[:10]:
+        with st.container(border=True):
+            st.markdown(f"**{job.label or job.job_id}** · `{job.job_id}` · {job.state}")
+            st.progress(min(job.progress / 100.0, 1.0), text=f"{job.done:,} / {job.total:,} scenarios")
+
+            c1, c2, c3 = st.columns(3)
+            if job.state not in (DONE, FAILED, CANCELLED):
+                if c1.button("Cancel", key=f"cancel_{job.job_id}"):
+                    manager.cancel(job.job_id)
+            if job.state in (INTERRUPTED, FAILED, CANCELLED):
+                if c2.button("Resume", key=f"resume_{job.job_id}"):
+                    manager.resume(job.job_id)
+            if job.state == DONE:
+                c3.download_button(
+                    "Download totals (CSV)",
+                    data=_job_totals_csv(manager, job.job_id),
+                    file_name=f"{job.job_id}_totals.csv",
+                    mime="text/csv",
+                    key=f"dl_{job.job_id}",
+                )
+            if job.error:
+                st.error(job.error)
+
+
+def render_jobs_panel(manager: JobManager, compiled: CompiledModel, sizing: OptionSizing, rates: dict) -> None:
+    """
+    Studies tab: submit long sweeps to the background job queue and watch their progress.
+    compiled should hold every engine profile (compile_model on engine_columns()).
+    """
+    _sweep_form(manager, compiled, sizing, rates)
+    _job_list(manager)
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+from core.batch_engine import CompiledModel, evaluate_batch, sizing_grid
+from core.block_layout import LayoutCache
+from core.lazy_model import LazyModel
 from core.loader import load_model_df
 from core.tod import add_tod_slot, add_tod_rate
-from core.excel_option_engine import build_option_annual_table, OptionSizing, ExcelColMap
+from core.excel_option_engine import build_option_result, OptionResult, OptionSizing, ExcelColMap
+from core.instrumentation import frame_counts, traced
+from core.response_surface import ResponseSurface, interpolate_option
+from core.result_store import ScenarioStore
 
 SLOT_ORDER = ["A", "C", "B", "D"]
 
@@ -20,6 +28,16 @@ def load_base_model(excel_path: str, colmap: ExcelColMap | None = None) -> pd.Da
     return model_df
 
 
+def open_workbook_model(excel_path: str, layouts: LayoutCache | None = None) -> LazyModel:
+    """Read the workbook and detect its blocks once (known templates via `layouts`); profiles are parsed on demand."""
+    return LazyModel(Path(excel_path), layouts=layouts)
+
+
+def model_for_columns(lazy: LazyModel, columns: list[str]) -> pd.DataFrame:
+    """(month x hour) model with only these profile blocks parsed (absent ones skipped), TOD slots added."""
+    return add_tod_slot(lazy.frame(columns, missing="skip"))
+
+
 def _normalize_rate_inputs(rates: dict | None) -> tuple[dict[str, float], dict[str, float], dict[str, float], dict[str, float]]:
     """Return 4 slot->rate maps: solar, wind, bess, grid."""
     rates = rates or {}
@@ -40,6 +58,18 @@ def _normalize_rate_inputs(rates: dict | None) -> tuple[dict[str, float], dict[s
     return solar, wind, bess, grid
 
 
+def _normalized_rates(rates: dict | None) -> dict[str, dict[str, float]]:
+    """Rates in the engine's *_rate_map form, with every slot filled."""
+    solar_map, wind_map, bess_map, grid_map = _normalize_rate_inputs(rates)
+    return {
+        "solar_rate_map": solar_map,
+        "wind_rate_map": wind_map,
+        "bess_rate_map": bess_map,
+        "grid_rate_map": grid_map,
+    }
+
+
+@traced("service.add_cost_columns", frame_counts)
 def _add_cost_columns_rs(annual_df: pd.DataFrame, solar_map: dict[str, float], wind_map: dict[str, float], bess_map: dict[str, float]) -> pd.DataFrame:
     out = annual_df.copy()
     out["tod_slot"] = out["tod_slot"].astype(str)
@@ -108,7 +138,9 @@ def _add_cost_columns_rs(annual_df: pd.DataFrame, solar_map: dict[str, float], w
     return out
 
 
-def run_option(model_df: pd.DataFrame, sizing: OptionSizing, rates: dict | None = None, colmap: ExcelColMap | None = None) -> pd.DataFrame:
+@traced("service.run_option", lambda res: frame_counts(res.annual))
+def run_option_result(model_df: pd.DataFrame, sizing: OptionSizing, rates: dict | None = None, colmap: ExcelColMap | None = None) -> OptionResult:
+    """run_option's single engine pass, keeping the monthly/hourly drill-down views (.monthly, .hourly)."""
     colmap = colmap or ExcelColMap()
 
     solar_map, wind_map, bess_map, grid_map = _normalize_rate_inputs(rates)
@@ -116,16 +148,97 @@ def run_option(model_df: pd.DataFrame, sizing: OptionSizing, rates: dict | None
     # Apply grid TOD rate to hourly model (needed for grid_cost_rs in annual table)
     df = add_tod_rate(model_df.copy(), grid_map)
 
-    annual = build_option_annual_table(df, sizing, colmap=colmap)
-    annual = _add_cost_columns_rs(annual, solar_map, wind_map, bess_map)
+    res = build_option_result(
+        df, sizing,
+        rates={"solar_rate_map": solar_map, "wind_rate_map": wind_map, "bess_rate_map": bess_map},
+        colmap=colmap,
+    )
+    annual = _add_cost_columns_rs(res.annual, solar_map, wind_map, bess_map)
 
     # UI cleanup
-    
     annual = annual.drop(columns=["days"], errors="ignore")
 
+    return replace(res, annual=annual)
+
+
+def run_option(model_df: pd.DataFrame, sizing: OptionSizing, rates: dict | None = None, colmap: ExcelColMap | None = None) -> pd.DataFrame:
+    return run_option_result(model_df, sizing, rates, colmap).annual
+
+
+def run_option_cached(
+    model_df: pd.DataFrame,
+    sizing: OptionSizing,
+    rates: dict | None,
+    workbook_fp: str,
+    store: ScenarioStore,
+    colmap: ExcelColMap | None = None,
+) -> pd.DataFrame:
+    """run_option, served from the scenario store when this exact run was computed before."""
+    norm_rates = _normalized_rates(rates)
+
+    hit = store.get(workbook_fp, sizing, norm_rates, colmap=colmap)
+    if hit is not None:
+        return hit
+
+    annual = run_option(model_df, sizing, rates=norm_rates, colmap=colmap)
+    store.put(workbook_fp, sizing, norm_rates, annual, colmap=colmap)
     return annual
 
 
+def sweep_solar_wind(
+    compiled: CompiledModel,
+    sizing: OptionSizing,
+    rates: dict | None,
+    solar_values,
+    wind_values,
+) -> dict[str, np.ndarray]:
+    """
+    Evaluate a solar MWp x wind MW grid (other sizing fields from `sizing`) in one
+    batched engine call. Returns 2D arrays shaped (len(solar_values), len(wind_values)),
+    plus 24/7 CFE % and avoided tCO2 when the model has grid emission factors.
+    """
+    grid = sizing_grid(sizing, solar_values, wind_values)
+    res = evaluate_batch(compiled, grid, _normalized_rates(rates))
+
+    shape = (len(solar_values), len(wind_values))
+    total_cost = res.total["total_cost_rs"].reshape(shape)
+    load = res.total["load_kwh"].reshape(shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_kwh = np.where(load > 0, total_cost / load, np.nan)
+
+    out = {
+        "total_cost_rs": total_cost,
+        "cost_per_kwh": cost_per_kwh,
+        "re_percent": res.total["re_percent"].reshape(shape),
+    }
+    if res.carbon is not None:
+        out["cfe_percent"] = res.carbon.total["cfe_percent"].reshape(shape)
+        out["avoided_tco2"] = res.carbon.total["avoided_tco2"].reshape(shape)
+    return out
+
+
+def run_options_batch(
+    compiled: CompiledModel,
+    sizings: list[OptionSizing],
+    rates: list[dict | None],
+) -> list[pd.DataFrame]:
+    """Several scenarios in one batched engine call; each table matches run_option's output."""
+    res = evaluate_batch(compiled, sizings, [_normalized_rates(r) for r in rates])
+    return [res.annual_table(i) for i in range(len(sizings))]
+
+
+def preview_option(surface: ResponseSurface, sizing: OptionSizing, rates: dict | None) -> pd.DataFrame | None:
+    """
+    Interpolated annual totals (the Total row of run_option's table) while the exact result
+    is computed; None if out of range. Only totals are returned: interpolating the clipped
+    sums is close in aggregate but can be far off per slot (excess, BESS).
+    """
+    table = interpolate_option(surface, sizing, _normalized_rates(rates))
+    if table is None:
+        return None
+    return table[table["tod_slot"] == "Total"].reset_index(drop=True)
+
+
 def summarize_totals(annual_df: pd.DataFrame) -> dict[str, float]:
     """Return totals from the 'Total' row if present, else sum across slots."""
     df = annual_df.copy()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+import os
+import threading
+import time
+import uuid
+
+from core.fingerprint import bytes_fingerprint
+
+ALLOWED_SUFFIXES = (".xlsx", ".xls")
+
+
+@dataclass(frozen=True)
+class UploadStats:
+    files: int
+    bytes_used: int
+    quota_bytes: int
+    referenced: int
+
+
+class UploadStore:
+    """
+    Uploaded workbooks on disk, content-addressed by sha256 of their bytes.
+
+    - The same bytes map to one file (<fingerprint><suffix>), whichever session uploaded them.
+    - Sessions acquire() the files they use and release() them when they switch workbooks.
+      Sessions can end without telling us, so a reference also lapses after `lease_seconds`.
+    - Past `quota_bytes`, unreferenced files are deleted, least recently used first.
+    """
+
+    def __init__(self, root: Path, quota_bytes: int, lease_seconds: float = 3600.0):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes = int(quota_bytes)
+        self.lease_seconds = float(lease_seconds)
+        self._lock = threading.Lock()
+        self._refs: dict[str, dict[str, float]] = {}   # fingerprint -> holder -> last seen
+
+        # half-written files from a crashed process
+        for tmp in self.root.glob("*.tmp"):
+            tmp.unlink(missing_ok=True)
+
+    # -----------------------------
+    # Files
+    # -----------------------------
+    def path_for(self, fingerprint: str, suffix: str) -> Path:
+        return self.root / f"{fingerprint}{suffix}"
+
+    def put(self, data: bytes | memoryview, suffix: str, fingerprint: str | None = None) -> tuple[str, Path]:
+        """Store upload bytes once. Returns (fingerprint, path); identical bytes are not rewritten."""
+        suffix = suffix.lower()
+        if suffix not in ALLOWED_SUFFIXES:
+            raise ValueError(f"Unsupported file type {suffix!r}. Please upload .xlsx or .xls")
+
+        fp = fingerprint or bytes_fingerprint(data)
+        path = self.path_for(fp, suffix)
+        with self._lock:
+            if path.exists():
+                os.utime(path)   # LRU order for quota eviction
+            else:
+                tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                tmp.replace(path)
+        self.enforce_quota(keep=fp)
+        return fp, path
+
+    # -----------------------------
+    # References
+    # -----------------------------
+    def acquire(self, fingerprint: str, holder: str) -> None:
+        with self._lock:
+            self._refs.setdefault(fingerprint, {})[holder] = time.time()
+
+    def release(self, fingerprint: str, holder: str) -> None:
+        with self._lock:
+            holders = self._refs.get(fingerprint)
+            if holders is not None:
+                holders.pop(holder, None)
+                if not holders:
+                    self._refs.pop(fingerprint, None)
+        self.enforce_quota()
+
+    def refcount(self, fingerprint: str) -> int:
+        with self._lock:
+            self._expire_leases()
+            return len(self._refs.get(fingerprint, {}))
+
+    def _expire_leases(self) -> None:
+        cutoff = time.time() - self.lease_seconds
+        for fp in list(self._refs):
+            holders = {h: t for h, t in self._refs[fp].items() if t >= cutoff}
+            if holders:
+                self._refs[fp] = holders
+            else:
+                del self._refs[fp]
+
+    # -----------------------------
+    # Quota
+    # -----------------------------
+    def _files(self) -> list[tuple[Path, os.stat_result]]:
+        out = []
+        for p in self.root.iterdir():
+            if p.suffix in ALLOWED_SUFFIXES:
+                try:
+                    out.append((p, p.stat()))
+                except FileNotFoundError:
+                    continue
+        return out
+
+    def enforce_quota(self, keep: str | None = None) -> int:
+        """Delete unreferenced files (oldest first) until under quota. Returns bytes freed."""
+        freed = 0
+        with self._lock:
+            self._expire_leases()
+            files = sorted(self._files(), key=lambda e: e[1].st_mtime)
+            used = sum(st.st_size for _, st in files)
+            for p, st in files:
+                if used <= self.quota_bytes:
+                    break
+                fp = p.stem
+                if fp == keep or fp in self._refs:
+                    continue
+                p.unlink(missing_ok=True)
+                used -= st.st_size
+                freed += st.st_size
+        return freed
+
+    def stats(self) -> UploadStats:
+        with self._lock:
+            self._expire_leases()
+            files = self._files()
+            return UploadStats(
+                files=len(files),
+                bytes_used=sum(st.st_size for _, st in files),
+                quota_bytes=self.quota_bytes,
+                referenced=len(self._refs),
+            )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from benchmarks.workbooks import WorkbookSpec, write_workbook
+from core.loader import load_model_df
+from core.tod import add_tod_slot
+
+
+@pytest.fixture(scope="session")
+def workbook(tmp_path_factory) -> Path:
+    """Synthetic stacked-block workbook (the benchmark generator's default template)."""
+    return write_workbook(tmp_path_factory.mktemp("wb") / "synthetic.xlsx", WorkbookSpec("tests", seed=3))
+
+
+@pytest.fixture(scope="session")
+def model_df(workbook) -> pd.DataFrame:
+    return add_tod_slot(load_model_df(workbook))
+
+
+@pytest.fixture()
+def tracing():
+    """Spans on (in-memory only) for one test, then back off with an empty recorder."""
+    from core import instrumentation
+
+    instrumentation.reset_spans()
+    instrumentation.configure(enabled=True)
+    yield instrumentation
+    instrumentation.configure(enabled=False)
+    instrumentation.reset_spans()
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from benchmarks.parity import random_scenarios, run_parity
+
+
+def test_batch_paths_match_run_option(model_df):
+    scenarios = random_scenarios(60, seed=7)
+    stats = run_parity(model_df, scenarios, ("batch", "service_batch"), workers=1, chunk=20)
+
+    for name, st in stats.items():
+        assert st.evaluated == len(scenarios), name
+        assert st.failed == 0, (name, st.errors, {c: s for c, s in st.columns.items() if s.mismatches})
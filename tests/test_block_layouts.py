@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from benchmarks.workbooks import MONTHS, WorkbookSpec, expected_model_df, write_workbook
+from core import block_layout
+from core.block_layout import LayoutCache, detect_layout, layout_fingerprint, validate_layout
+from core.lazy_model import LazyModel
+
+READERS = ["stream", "pandas"]
+
+
+def _values(seed: int) -> np.ndarray:
+    """(24, 12) hour x month profile."""
+    return np.round(np.random.default_rng(seed).uniform(0.0, 1000.0, size=(24, 12)), 6)
+
+
+def _put_block(ws, row: int, col: int, title: str, values: np.ndarray) -> None:
+    """Title at (row, col), Time | Jan..Dec header two rows below, then 24 hours."""
+    ws.cell(row, col, title)
+    for j, label in enumerate(["Time", *MONTHS]):
+        ws.cell(row + 2, col + j, label)
+    for h in range(24):
+        ws.cell(row + 3 + h, col, h)
+        for m in range(12):
+            ws.cell(row + 3 + h, col + 1 + m, float(values[h, m]))
+
+
+# sheet -> [(row, col, title, column name, seed)]
+LAYOUT = {
+    "Data": [
+        (1, 1, "Load Reference 1MW", "load_1mw", 1),
+        (1, 16, "Wind Generation Reference for 1 MW", "wind_1mw", 2),   # side by side, one blank column apart
+        (30, 1, "Difference for Charging Limits", "bess_charge_limit_kw", 3),
+    ],
+    "Solar": [
+        (3, 2, "SAT Solar Generation Reference for 1 MWp", "solar_sat_1mwp", 4),
+        (3, 18, "EW Solar Generation Reference for 1 MWp", "solar_ew_1mwp", 5),
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def grid_workbook(tmp_path_factory):
+    wb = Workbook()
+    wb.remove(wb.active)
+    for sheet, blocks in LAYOUT.items():
+        ws = wb.create_sheet(sheet)
+        for row, col, title, _, seed in blocks:
+            _put_block(ws, row, col, title, _values(seed))
+    path = tmp_path_factory.mktemp("layouts") / "grid.xlsx"
+    wb.save(path)
+    return path
+
+
+def _expected(sheets: list[str]) -> pd.DataFrame:
+    out = pd.DataFrame({
+        "month": pd.Categorical(np.repeat(MONTHS, 24), categories=MONTHS, ordered=True),
+        "hour": np.tile(np.arange(24), 12),
+    })
+    for sheet in sheets:
+        for *_, name, seed in LAYOUT[sheet]:
+            out[name] = _values(seed).T.ravel()
+    return out
+
+
+def _frame(path, sheet, reader) -> pd.DataFrame:
+    return LazyModel(path, sheet=sheet, layouts=LayoutCache(), reader=reader).frame()
+
+
+@pytest.mark.parametrize("reader", READERS)
+@pytest.mark.parametrize("sheet, sheets", [
+    ("Data", ["Data"]),
+    ("Solar", ["Solar"]),
+    (["Data", "Solar"], ["Data", "Solar"]),
+    (None, ["Data", "Solar"]),
+])
+def test_side_by_side_and_multi_sheet_blocks(grid_workbook, reader, sheet, sheets):
+    pd.testing.assert_frame_equal(_frame(grid_workbook, sheet, reader), _expected(sheets), check_dtype=False)
+
+
+@pytest.mark.parametrize("reader", READERS)
+def test_block_origins_and_roles(grid_workbook, reader):
+    lazy = LazyModel(grid_workbook, sheet=None, layouts=LayoutCache(), reader=reader)
+    assert lazy.origins["load_1mw"][::2] == lazy.origins["bess_charge_limit_kw"][::2] == ("Data", 0)
+    assert lazy.origins["wind_1mw"][0] == "Data" and lazy.origins["wind_1mw"][2] == 15
+    assert lazy.origins["solar_ew_1mwp"][0] == "Solar" and lazy.origins["solar_ew_1mwp"][2] == 17
+    assert lazy.roles == {
+        "load": "load_1mw", "wind": "wind_1mw", "solar_sat": "solar_sat_1mwp", "solar_ew": "solar_ew_1mwp",
+    }
+
+
+@pytest.mark.parametrize("reader", READERS)
+@pytest.mark.parametrize("spec", [
+    WorkbookSpec("stacked", seed=5),
+    WorkbookSpec("stacked_helpers", blocks=8, helper_cols=4, formula_noise=0.1, tail_rows=50, seed=6),
+])
+def test_stacked_templates_unchanged(tmp_path, reader, spec):
+    path = write_workbook(tmp_path / f"{spec.name}.xlsx", spec)
+    pd.testing.assert_frame_equal(_frame(path, spec.sheet, reader), expected_model_df(spec), check_dtype=False)
+
+
+# -----------------------------
+# Layout cache
+# -----------------------------
+@pytest.fixture()
+def data_grid(grid_workbook) -> pd.DataFrame:
+    return pd.read_excel(grid_workbook, sheet_name="Data", header=None)
+
+
+def _shift_down(grid: pd.DataFrame, rows: int = 1) -> pd.DataFrame:
+    """Same shape, every cell moved down `rows` rows (blank rows on top, bottom rows dropped)."""
+    blank = pd.DataFrame(np.nan, index=range(rows), columns=grid.columns, dtype=object)
+    return pd.concat([blank, grid.iloc[:-rows].astype(object)], ignore_index=True)
+
+
+def test_changed_fingerprint_rescans(data_grid, monkeypatch):
+    calls = []
+    real = block_layout.detect_layout
+
+    def counting(*args, **kwargs):
+        calls.append(args[1])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(block_layout, "detect_layout", counting)
+    cache = LayoutCache()
+
+    first = cache.detect(data_grid, "Data")
+    assert cache.detect(data_grid, "Data") == first
+    assert (cache.hits, cache.misses, len(calls)) == (1, 1, 1)
+
+    retitled = data_grid.copy()
+    retitled.iat[0, 0] = "Load Requirement"
+    assert layout_fingerprint(retitled, "Data") != layout_fingerprint(data_grid, "Data")
+    layout = cache.detect(retitled, "Data")
+    assert (cache.misses, len(calls)) == (2, 2)
+    assert layout.titles[0] == "Load Requirement" and layout.names[0] == "load_requirement_1mw"
+    assert len(cache) == 2
+
+
+def test_validate_layout_rejects_a_shifted_header_row(data_grid):
+    layout = detect_layout(data_grid, "Data")
+    assert validate_layout(data_grid, layout)
+
+    shifted = _shift_down(data_grid)
+    assert shifted.shape == data_grid.shape
+    assert not validate_layout(shifted, layout)
+    assert not validate_layout(data_grid, replace(layout, header_rows=tuple(r + 1 for r in layout.header_rows)))
+
+    # a stale entry under the same fingerprint is detected again, not served
+    cache = LayoutCache()
+    cache.put("template", layout)
+    redetected = cache.detect(shifted, "Data", fingerprint="template")
+    assert cache.misses == 1
+    assert redetected.header_rows == tuple(r + 1 for r in layout.header_rows)
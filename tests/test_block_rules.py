@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.workbooks import TITLES
+from core.block_rules import default_block_rules, slug
+from core.model_bundle import LEGACY_COLUMNS
+
+# Titles of the existing templates -> (column, engine role). Engine roles used to be the
+# title slug (still renamed on bundle load via LEGACY_COLUMNS); the rest keep their names.
+TEMPLATE_NAMES = {
+    "Load Reference 1MW": ("load_1mw", "load"),
+    "160 FT Solar Generation Reference for 1 MWp": ("solar_ft_1mwp", "solar_ft"),
+    "SAT Solar Generation Reference for 1 MWp": ("solar_sat_1mwp", "solar_sat"),
+    "EW Solar Generation Reference for 1 MWp": ("solar_ew_1mwp", "solar_ew"),
+    "Wind Generation Reference for 1 MW": ("wind_1mw", "wind"),
+    "Difference for Discharging Limits": ("bess_discharge_limit_kw", None),
+    "Difference for Charging Limits": ("bess_charge_limit_kw", None),
+    "Load Requirement": ("load_requirement_1mw", None),
+}
+
+
+def test_template_titles_are_pinned():
+    assert set(TITLES) == set(TEMPLATE_NAMES)
+
+
+@pytest.mark.parametrize("title", sorted(TEMPLATE_NAMES))
+def test_template_title_resolution(title):
+    name, role = TEMPLATE_NAMES[title]
+    res = default_block_rules().resolve(title)
+    assert (res.name, res.role) == (name, role)
+    if role is not None and role != "load":
+        assert LEGACY_COLUMNS[slug(title)] == name
+
+
+@pytest.mark.parametrize("title", [
+    "  Wind   Generation Reference for 1 MW ",
+    "WIND GENERATION REFERENCE FOR 1MW",
+    "Wind Profile",
+])
+def test_wind_title_variants(title):
+    assert default_block_rules().resolve(title).role == "wind"
+
+
+@pytest.mark.parametrize("title, name", [
+    ("Wind + Solar combined", "wind_solar_combined"),
+    ("Solar and Wind Generation 1 MW", "solar_and_wind_generation_1_mw"),
+    ("Wind speed", "wind_speed"),
+    ("Wind Discharging Limits", "wind_discharging_limits"),
+])
+def test_wind_rule_leaves_other_wind_titles_alone(title, name):
+    res = default_block_rules().resolve(title)
+    assert (res.name, res.role) == (name, None)
+
+
+def test_rules_file_changes_the_scenario_key(tmp_path, monkeypatch):
+    from core.block_rules import DEFAULT_RULES_PATH, RULES_ENV
+    from core.excel_option_engine import OptionSizing
+    from core.result_store import scenario_key
+
+    sizing = OptionSizing(load_mw=5, solar_mw=4)
+    before = scenario_key("wb", sizing, None)
+
+    custom = tmp_path / "rules.json"
+    custom.write_text(DEFAULT_RULES_PATH.read_text() + "\n")
+    monkeypatch.setenv(RULES_ENV, str(custom))
+    assert scenario_key("wb", sizing, None) != before
+
+    monkeypatch.delenv(RULES_ENV)
+    assert scenario_key("wb", sizing, None) == before
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from core.batch_engine import SOLAR_MODES, compile_model, evaluate_batch
+from core.carbon import CARBON_COLS, option_carbon, scenario_carbon
+from core.excel_option_engine import DISCHARGE_SLOT, SLOT_ORDER, OptionSizing
+from dashboard.services.option_service import run_option_result
+
+
+@pytest.fixture(scope="module")
+def compiled(model_df):
+    return compile_model(model_df, grid_ef=0.71)
+
+
+def test_fully_matched_residuals_are_plain_zero(compiled):
+    sizings = [OptionSizing(load_mw=1, solar_mode="SAT", solar_mw=s, wind_mw=w) for s in (50, 200) for w in (200, 1000)]
+    carbon = evaluate_batch(compiled, sizings, None, carbon=True).carbon
+
+    for i in range(len(sizings)):
+        for table in (carbon.month_table(i), carbon.slot_table(i)):
+            for col in ("residual_grid_kwh", "residual_tco2"):
+                values = table[col].to_numpy()
+                assert (values >= 0).all(), col
+                assert not np.signbit(values).any(), (col, values)
+
+
+SIZINGS = [
+    OptionSizing(load_mw=5, solar_mode="FT", solar_mw=4, wind_mw=2),
+    OptionSizing(load_mw=5, solar_mode="SAT", solar_mw=30, wind_mw=10, wind_loss=0.05),
+    OptionSizing(load_mw=2, solar_mode="EW", solar_mw=0, wind_mw=0),
+]
+
+
+@pytest.mark.parametrize("sizing", SIZINGS, ids=lambda s: f"{s.solar_mode}{s.solar_mw}w{s.wind_mw}")
+def test_option_carbon_matches_batch(model_df, compiled, sizing):
+    single = option_carbon(run_option_result(model_df, sizing), grid_ef=0.71)
+    batch = evaluate_batch(compiled, [sizing], None).carbon
+
+    for a, b in ((single.slot_table(0), batch.slot_table(0)), (single.month_table(0), batch.month_table(0))):
+        for col in CARBON_COLS:
+            tol = 0.02 if col.endswith("tco2") or col == "cfe_percent" else 1.0
+            np.testing.assert_allclose(a[col], b[col], atol=tol, err_msg=col)
+
+
+def test_cfe_never_exceeds_load(compiled):
+    sizings = [OptionSizing(load_mw=3, solar_mode=m, solar_mw=s, wind_mw=w)
+               for m in ("FT", "SAT", "EW") for s in (0, 5, 80) for w in (0, 4, 60)]
+    carbon = evaluate_batch(compiled, sizings, None).carbon
+    for view in (carbon.slot, carbon.month, carbon.total):
+        assert (view["cfe_kwh"] <= view["load_kwh"]).all()
+        assert (view["cfe_percent"] <= 100.0).all()
+
+
+def test_bess_only_fills_the_slot_d_shortfall(compiled):
+    hm = compiled.hourly
+    d = SLOT_ORDER.index(DISCHARGE_SLOT)
+    args = (np.ones(2), np.array([0, 0]), np.array([4.0, 4.0]), np.array([1.0, 1.0]))
+    no_bess = scenario_carbon(hm, *args, np.zeros(2), list(SOLAR_MODES))
+    # a small battery and one far larger than the whole slot-D load
+    with_bess = scenario_carbon(hm, *args, np.array([1_000.0, 1e12]), list(SOLAR_MODES))
+
+    gained = with_bess.slot["cfe_kwh"] - no_bess.slot["cfe_kwh"]
+    shortfall = no_bess.slot["load_kwh"] - no_bess.slot["cfe_kwh"]
+    others = [k for k in range(len(SLOT_ORDER)) if k != d]
+    assert (gained[:, others] == 0).all()
+    assert gained[0, d] == pytest.approx(1_000.0, abs=1.0)
+    assert gained[1, d] == pytest.approx(shortfall[1, d], abs=1.0)
+    assert (with_bess.slot["cfe_kwh"] <= with_bess.slot["load_kwh"]).all()
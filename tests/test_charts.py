@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from core.batch_engine import default_rate_maps
+from core.excel_option_engine import OptionSizing
+from dashboard.components.charts import cost_figures, energy_figures
+from dashboard.services.option_service import run_option
+
+
+@pytest.fixture(scope="module")
+def tables(model_df):
+    sizings = {
+        "solar": OptionSizing(load_mw=2, solar_mode="SAT", solar_mw=3),
+        "wind": OptionSizing(load_mw=2, wind_mw=3),
+        "grid": OptionSizing(load_mw=2),
+    }
+    return {name: run_option(model_df, s, default_rate_maps()) for name, s in sizings.items()}
+
+
+@pytest.mark.parametrize("build", [energy_figures, cost_figures])
+def test_one_table_and_overlay_share_chart_keys(tables, build):
+    single = build(tables["solar"])
+    overlay = build(tables)
+    assert set(single) == set(overlay) and single
+
+
+def test_overlay_colours_by_scenario(tables):
+    figs = energy_figures(tables)
+    assert [t.name for t in figs["re_percent_by_slot"].data] == list(tables)
+    assert [t.name for t in cost_figures(tables)["total_cost_by_slot"].data] == list(tables)
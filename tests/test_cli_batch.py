@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cli import main
+from core.scenario_io import parse_scenario
+from dashboard.services.option_service import run_option
+
+SCENARIOS = [
+    {"scenario_id": "base", "load_mw": 5, "solar_mode": "SAT", "solar_mw": 8, "solar_loss": 0.03, "wind_mw": 4},
+    {"scenario_id": "ft_flat", "load_mw": 2, "solar_mode": "FT", "solar_mw": 6, "wind_mw": 0, "grid_rate": 9.5},
+    {"scenario_id": "wind_only", "load_mw": 10, "solar_mode": "", "solar_mw": 0, "wind_mw": 12, "grid_D": 11.0},
+]
+
+
+def _reference(model_df, rec: dict, i: int) -> pd.DataFrame:
+    _, sizing, rates = parse_scenario(rec, i)
+    return run_option(model_df, sizing, rates)
+
+
+def _numeric(df: pd.DataFrame) -> np.ndarray:
+    return df.drop(columns=["tod_slot"]).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_csv_round_trip(workbook, model_df, tmp_path, workers):
+    scen = tmp_path / "scenarios.csv"
+    pd.DataFrame(SCENARIOS).to_csv(scen, index=False)
+    out = tmp_path / "out.csv"
+
+    assert main(["batch", str(workbook), str(scen), "-o", str(out), "--chunk-size", "2", "--workers", str(workers)]) == 0
+
+    got = pd.read_csv(out, keep_default_na=False, na_values=[""])
+    assert got["scenario_id"].drop_duplicates().tolist() == [r["scenario_id"] for r in SCENARIOS]
+    recs = pd.read_csv(scen, keep_default_na=False).to_dict("records")
+    for i, rec in enumerate(recs):
+        ref = _reference(model_df, rec, i)
+        table = got[got["scenario_id"] == rec["scenario_id"]].drop(columns=["scenario_id"])
+        assert table["tod_slot"].tolist() == ref["tod_slot"].tolist()
+        np.testing.assert_allclose(_numeric(table[ref.columns]), _numeric(ref), rtol=1e-12, equal_nan=True)
+
+
+def test_batch_jsonl_resumes(workbook, model_df, tmp_path):
+    scen = tmp_path / "scenarios.jsonl"
+    scen.write_text("".join(json.dumps(r) + "\n" for r in SCENARIOS), encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+
+    assert main(["batch", str(workbook), str(scen), "-o", str(out)]) == 0
+    first = out.read_text(encoding="utf-8")
+    assert main(["batch", str(workbook), str(scen), "-o", str(out)]) == 0
+    assert out.read_text(encoding="utf-8") == first
+
+    lines = [json.loads(line) for line in first.splitlines()]
+    assert [r["scenario_id"] for r in lines] == [r["scenario_id"] for r in SCENARIOS]
+    for i, (rec, line) in enumerate(zip(SCENARIOS, lines)):
+        ref = _reference(model_df, rec, i)
+        total = ref[ref["tod_slot"] == "Total"].iloc[0]
+        assert line["total_cost_rs"] == pytest.approx(float(total["total_cost_rs"]), rel=1e-12)
+        assert line["re_percent"] == pytest.approx(float(total["re_percent"]))
+        assert pd.DataFrame(line["annual"])["tod_slot"].tolist() == ref["tod_slot"].tolist()
+
+
+def test_batch_refuses_to_resume_other_inputs(workbook, tmp_path, capsys):
+    scen = tmp_path / "scenarios.jsonl"
+    scen.write_text("".join(json.dumps(r) + "\n" for r in SCENARIOS[:2]), encoding="utf-8")
+    out = tmp_path / "out.jsonl"
+    args = ["batch", str(workbook), str(scen), "-o", str(out)]
+
+    assert main(args) == 0
+    first = out.read_text(encoding="utf-8")
+    sidecar = out.with_name(out.name + ".resume.json")
+
+    # an edited scenario file would silently skip/shift rows: refused, output untouched
+    scen.write_text("".join(json.dumps(r) + "\n" for r in SCENARIOS[1:]), encoding="utf-8")
+    assert main(args) == 2
+    assert "scenarios_fp" in capsys.readouterr().err
+    assert out.read_text(encoding="utf-8") == first
+
+    # so is an output written for another workbook, or one whose inputs are unknown
+    recorded = json.loads(sidecar.read_text(encoding="utf-8"))
+    sidecar.write_text(json.dumps({**recorded, "workbook_fp": "0" * 64}), encoding="utf-8")
+    assert main(args) == 2
+    assert "workbook_fp" in capsys.readouterr().err
+    sidecar.unlink()
+    assert main(args) == 2
+    assert out.read_text(encoding="utf-8") == first
+
+    # --overwrite starts over against the current inputs
+    assert main(args + ["--overwrite"]) == 0
+    assert [json.loads(line)["scenario_id"] for line in out.read_text(encoding="utf-8").splitlines()] == [
+        r["scenario_id"] for r in SCENARIOS[1:]
+    ]
+    assert main(args) == 0
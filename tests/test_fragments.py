@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from streamlit.testing.v1 import AppTest
+
+
+def _page():
+    import streamlit as st
+
+    from dashboard.components.fragments import memo, panel
+
+    @panel("tab")
+    def _tab():
+        memo("tab", "dep-1", lambda: 1)
+        memo("figures", "dep-1", lambda: 2)
+
+    _tab()
+
+
+def test_memo_stats_kept_apart_from_fragment_timings():
+    from dashboard.components.fragments import MEMO_STATS_KEY, TIMINGS_KEY
+
+    at = AppTest.from_function(_page).run()
+    at.run()
+    assert not at.exception
+
+    timings = at.session_state[TIMINGS_KEY]
+    assert set(timings) == {"tab"} and timings["tab"]["runs"] == 2
+    assert "reused" not in timings["tab"]
+
+    memos = at.session_state[MEMO_STATS_KEY]
+    assert set(memos) == {"tab", "figures"}
+    assert (memos["figures"]["hits"], memos["figures"]["misses"], memos["figures"]["reused"]) == (1, 1, True)
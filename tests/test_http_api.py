@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import shutil
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.fingerprint import file_fingerprint
+from core.http_api import ApiHandler, ApiServer, ModelPool
+from core.model_bundle import BUNDLE_SUFFIX, save_model_bundle
+from core.loader import load_model_df
+
+
+@pytest.fixture()
+def api(tmp_path, workbook):
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    shutil.copy(workbook, models_dir / "site.xlsx")
+    save_model_bundle(load_model_df(workbook), models_dir / f"site{BUNDLE_SUFFIX}")
+
+    httpd = ApiServer(("127.0.0.1", 0), ModelPool(models_dir=models_dir), workers=2)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", models_dir
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _post(url: str, payload: dict) -> tuple[int, dict]:
+    req = urllib.request.Request(url, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_register_path_inside_models_dir(api):
+    base, _ = api
+    status, body = _post(f"{base}/models", {"path": "site.xlsx"})
+    assert status == 200, body
+
+    status, body = _post(f"{base}/totals", {"fingerprint": body["fingerprint"], "sizing": {"load_mw": 5, "solar_mw": 4}})
+    assert status == 200 and len(body["results"]) == 1
+
+
+@pytest.mark.parametrize("path", ["../outside.xlsx", "/etc/passwd", "site" + BUNDLE_SUFFIX, "sub/../../site.xlsx"])
+def test_register_path_refuses_escapes_and_bundles(api, path):
+    base, models_dir = api
+    shutil.copy(models_dir / "site.xlsx", models_dir.parent / "outside.xlsx")
+    status, body = _post(f"{base}/models", {"path": path})
+    assert status == 403, body
+
+
+def test_register_path_disabled_without_models_dir(workbook):
+    with pytest.raises(PermissionError):
+        ModelPool().resolve_request_path(str(workbook))
+
+
+def test_register_streams_workbook_bytes(api):
+    base, models_dir = api
+    data = (models_dir / "site.xlsx").read_bytes()
+    req = urllib.request.Request(f"{base}/models", data, {"Content-Type": "application/octet-stream"})
+    with urllib.request.urlopen(req) as resp:
+        body = json.loads(resp.read())
+    assert body["fingerprint"] == file_fingerprint(models_dir / "site.xlsx")
+
+
+def test_idle_keepalive_connections_do_not_starve_the_pool(api, monkeypatch):
+    monkeypatch.setattr(ApiHandler, "timeout", 0.5)
+    base, _ = api
+    port = int(base.rsplit(":", 1)[1])
+    # one idle connection per worker (workers=2), each parked waiting for a request line
+    idle = [socket.create_connection(("127.0.0.1", port)) for _ in range(2)]
+    try:
+        with urllib.request.urlopen(f"{base}/health", timeout=10) as resp:
+            assert json.loads(resp.read()) == {"status": "ok"}
+    finally:
+        for s in idle:
+            s.close()
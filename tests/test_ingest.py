@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import shutil
+
+from core import ingest
+from core.block_rules import DEFAULT_RULES_PATH, RULES_ENV
+from core.ingest import bundle_path, run_ingest
+
+
+def test_ingest_rechecks_on_sheet_layout_and_rules_change(tmp_path, workbook, monkeypatch):
+    src = tmp_path / "in" / "site.xlsx"
+    src.parent.mkdir()
+    shutil.copy(workbook, src)
+    out = tmp_path / "cache"
+    books = [("site", src)]
+
+    first = run_ingest(books, out, sheet="Data", workers=1)
+    assert (first.ok, first.skipped) == (1, 0)
+    assert run_ingest(books, out, sheet="Data", workers=1).skipped == 1
+
+    # another sheet is a different parse: not "unchanged", and never the Data bundle
+    other = run_ingest(books, out, sheet="Other", workers=1)
+    assert (other.skipped, other.failed) == (0, 1)
+    assert bundle_path(out, "f" * 64, "Data") != bundle_path(out, "f" * 64, "Other")
+
+    # back on Data the existing bundle is reused
+    again = run_ingest(books, out, sheet="Data", workers=1)
+    assert (again.skipped, again.cached) == (0, 1)
+
+    # a detection-rule bump re-parses into a new bundle
+    monkeypatch.setattr(ingest, "LAYOUT_VERSION", "test")
+    bumped = run_ingest(books, out, sheet="Data", workers=1)
+    assert (bumped.skipped, bumped.ok) == (0, 1)
+    assert len(list((out / ingest.MODELS_DIR).glob("*"))) == 2
+
+    # so does editing the active rule file
+    rules = tmp_path / "rules.json"
+    rules.write_text(DEFAULT_RULES_PATH.read_text() + "\n")
+    monkeypatch.setenv(RULES_ENV, str(rules))
+    edited = run_ingest(books, out, sheet="Data", workers=1)
+    assert (edited.skipped, edited.ok) == (0, 1)
+    assert run_ingest(books, out, sheet="Data", workers=1).skipped == 1
+    assert len(list((out / ingest.MODELS_DIR).glob("*"))) == 3
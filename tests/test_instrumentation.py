@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from core.instrumentation import frame_counts, traced
+
+
+def test_traced_records_counts(tracing):
+    @traced("test.frame", frame_counts)
+    def make():
+        return pd.DataFrame({"a": [1.0, 2.0, 3.0]})
+
+    assert len(make()) == 3
+    (sp,) = tracing.recent_spans()
+    assert sp["name"] == "test.frame" and sp["rows"] == 3 and sp["bytes"] == 24
+
+
+def test_traced_counts_failure_does_not_change_result(tracing):
+    @traced("test.object", frame_counts)
+    def make():
+        return object()
+
+    assert make() is not None
+    (sp,) = tracing.recent_spans()
+    assert sp["counts_error"].startswith("TypeError")
+    assert "error" not in sp
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import socket
+import sys
+import time
+import types
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from core import jobs
+from core.jobs import INTERRUPTED, RUNNING, JobManager
+
+
+def _write_status(root, job_id: str, **fields) -> None:
+    d = root / job_id
+    (d / "parts").mkdir(parents=True)
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    status = {
+        "job_id": job_id, "label": "", "state": RUNNING, "total": 10, "done": 0, "n_chunks": 1,
+        "created_at": now, "updated_at": now, "error": None,
+    }
+    status.update(fields)
+    (d / "status.json").write_text(json.dumps(status))
+
+
+def _dead_pid() -> int:
+    pid = 2 ** 22 - 7
+    while jobs._pid_alive(pid):
+        pid -= 1
+    return pid
+
+
+@pytest.mark.skipif(os.name == "nt", reason="PID probing is heartbeat-only on Windows")
+def test_startup_only_interrupts_orphaned_jobs(tmp_path):
+    host = socket.gethostname()
+    stale = (datetime.now(timezone.utc) - timedelta(seconds=jobs.STALE_AFTER_S + 60)).isoformat(timespec="seconds")
+    _write_status(tmp_path, "live", owner_pid=os.getpid(), owner_host=host)
+    _write_status(tmp_path, "dead_pid", owner_pid=_dead_pid(), owner_host=host)
+    _write_status(tmp_path, "stale", owner_pid=os.getpid(), owner_host=host, updated_at=stale)
+    _write_status(tmp_path, "other_host", owner_pid=1, owner_host=host + "-elsewhere")
+    _write_status(tmp_path, "legacy")
+
+    mgr = JobManager(tmp_path)
+    states = {st.job_id: st.state for st in mgr.list_jobs()}
+    assert states == {
+        "live": RUNNING, "other_host": RUNNING,
+        "dead_pid": INTERRUPTED, "stale": INTERRUPTED, "legacy": INTERRUPTED,
+    }
+
+
+def _sweep():
+    from core.batch_engine import default_rate_maps, sizing_grid
+    from core.excel_option_engine import OptionSizing
+
+    solar, wind = np.array([0.0, 2.0, 4.0]), np.array([0.0, 1.5])
+    ids = np.char.add(np.char.mod("s%.3f", solar)[:, None], np.char.mod("_w%.3f", wind)[None, :]).ravel()
+    return sizing_grid(OptionSizing(load_mw=3, solar_mode="SAT"), solar, wind), default_rate_maps(), ids
+
+
+def test_sweep_job_from_sizing_arrays(tmp_path, model_df, monkeypatch):
+    from core.batch_engine import compile_model, evaluate_batch
+
+    # spawn re-runs __main__ in each worker; AppTest tests leave a throwaway script there
+    monkeypatch.setitem(sys.modules, "__main__", types.ModuleType("__main__"))
+    compiled = compile_model(model_df)
+    grid, rates, ids = _sweep()
+    manager = JobManager(tmp_path, max_workers=1)
+    try:
+        job_id = manager.submit(compiled, grid, rates, scenario_ids=ids, chunk_size=4)
+        deadline = time.monotonic() + 120
+        while manager.status(job_id).state not in jobs.FINAL_STATES and time.monotonic() < deadline:
+            time.sleep(0.2)
+        assert manager.status(job_id).state == jobs.DONE
+        got = manager.result(job_id, totals_only=True)
+    finally:
+        manager.shutdown()
+
+    expected = evaluate_batch(compiled, grid, rates, carbon=False).long_frame(ids)
+    expected = expected[expected["tod_slot"] == "Total"].reset_index(drop=True)
+    assert got["scenario_id"].tolist() == ids.tolist()
+    np.testing.assert_allclose(got["total_cost_rs"], expected["total_cost_rs"].astype(float))
+
+
+def test_worker_model_cache_is_bounded(tmp_path, model_df, monkeypatch):
+    from core.batch_engine import compile_model
+
+    monkeypatch.setattr(jobs, "_WORKER_MODELS", jobs.OrderedDict())
+    grid, rates, ids = _sweep()
+    chunk = tmp_path / "chunk.pkl"
+    chunk.write_bytes(pickle.dumps((ids, grid, rates)))
+    models = []
+    for i in range(jobs.WORKER_MODEL_CACHE_SIZE + 2):
+        models.append(str(tmp_path / f"model{i}.pkl"))
+        (tmp_path / f"model{i}.pkl").write_bytes(pickle.dumps(compile_model(model_df)))
+        assert jobs._run_chunk(models[-1], str(chunk), str(tmp_path / f"part{i}.csv")) == len(ids)
+    assert list(jobs._WORKER_MODELS) == models[-jobs.WORKER_MODEL_CACHE_SIZE:]
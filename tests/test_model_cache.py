@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+import pytest
+
+from core.block_layout import LayoutCache
+from core.lazy_model import LazyModel
+from core.model_cache import ModelCache
+
+
+class _Growing:
+    def __init__(self, nbytes: int):
+        self.nbytes = nbytes
+
+
+def test_refresh_resizes_and_evicts_lru():
+    cache = ModelCache(max_bytes=100)
+    cache.put("old", np.zeros(5))          # 40 bytes
+    grower = _Growing(30)
+    cache.put("lazy", grower)
+    assert cache.stats().bytes_used == 70
+
+    grower.nbytes = 80
+    cache.refresh("lazy")
+    assert "old" not in cache and "lazy" in cache
+    assert cache.stats().bytes_used == 80
+
+    grower.nbytes = 500                    # now larger than the whole budget
+    cache.refresh("lazy")
+    assert len(cache) == 0 and cache.stats().bytes_used == 0
+    cache.refresh("missing")
+
+
+def test_lazy_model_size_tracks_extraction(workbook):
+    lazy = LazyModel(workbook, layouts=LayoutCache())
+    cache = ModelCache(max_bytes=1 << 30)
+    cache.put("lazy", lazy)
+    before = cache.stats().bytes_used
+
+    lazy.frame(lazy.names[:2])
+    cache.refresh("lazy")
+    assert cache.stats().bytes_used == lazy.nbytes > before
+
+
+def test_key_lock_released_when_loader_raises():
+    cache = ModelCache(max_bytes=1 << 20)
+
+    def boom():
+        raise ValueError("bad workbook")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("k", boom)
+    assert cache._key_locks == {}
+    assert cache.get_or_load("k", lambda: np.ones(3)).sum() == 3
+
+
+def test_get_or_load_only_drops_its_own_key_lock():
+    cache = ModelCache(max_bytes=1000)
+    newer = threading.Lock()
+
+    def loader():
+        # a later caller registered its own lock for the key while this load ran
+        cache._key_locks["k"] = newer
+        return np.zeros(2)
+
+    cache.get_or_load("k", loader)
+    assert cache._key_locks.get("k") is newer
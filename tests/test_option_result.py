@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from core.batch_engine import KWH_COLS, default_rate_maps
+from core.excel_option_engine import DISCHARGE_SLOT, SLOT_ORDER, OptionSizing
+from dashboard.services.option_service import run_option_result
+
+SIZINGS = [
+    OptionSizing(load_mw=5, solar_mode="SAT", solar_mw=8, wind_mw=4),       # some excess, BESS < slot-D grid
+    OptionSizing(load_mw=2, solar_mode="FT", solar_mw=40, wind_mw=30),      # BESS covers slot D
+    OptionSizing(load_mw=5, solar_mode=None, solar_mw=0, wind_mw=0),        # no RE at all
+]
+
+
+@pytest.fixture(scope="module", params=SIZINGS, ids=["partial", "oversized", "grid_only"])
+def result(request, model_df):
+    return run_option_result(model_df, request.param, default_rate_maps())
+
+
+def test_monthly_kwh_sum_to_the_annual_table(result):
+    annual = result.annual.set_index("tod_slot").loc[SLOT_ORDER]
+    by_slot = result.monthly.groupby("tod_slot", observed=True)[KWH_COLS].sum().loc[SLOT_ORDER]
+    # 12 monthly rows per slot, each rounded to the kWh
+    for col in KWH_COLS:
+        np.testing.assert_allclose(by_slot[col], annual[col].astype(float), atol=12, err_msg=col)
+    assert len(result.monthly) == 12 * len(SLOT_ORDER)
+
+
+def test_bess_lands_only_in_slot_d(result):
+    monthly, annual = result.monthly, result.annual
+    assert (monthly.loc[monthly["tod_slot"] != DISCHARGE_SLOT, "bess_kwh"] == 0).all()
+    assert (annual.loc[~annual["tod_slot"].isin([DISCHARGE_SLOT, "Total"]), "bess_kwh"] == 0).all()
+    assert (monthly["bess_kwh"] >= 0).all()
+
+
+def test_hourly_view_is_the_typical_day(result):
+    hourly = result.hourly
+    assert len(hourly) == 12 * 24
+    np.testing.assert_allclose(hourly["excess_kw"] - hourly["grid_kw"], hourly["total_re_kw"] - hourly["load_kw"])
+
+
+def test_views_do_not_rerun_the_engine(model_df, tracing):
+    res = run_option_result(model_df, SIZINGS[0], default_rate_maps())
+    runs = [sp for sp in tracing.recent_spans() if sp["name"] == "engine.build_option_annual_table"]
+    assert len(runs) == 1
+
+    res.monthly, res.hourly
+    runs = [sp for sp in tracing.recent_spans() if sp["name"] == "engine.build_option_annual_table"]
+    assert len(runs) == 1
+    # cached on the result: same frames on repeat access
+    assert res.monthly is res.monthly and res.hourly is res.hourly
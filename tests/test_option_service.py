@@ -4,3 +4,36 @@ Add pytest later.
 
 def test_placeholder():
     assert True
+
+
+def test_run_option_with_tracing(model_df, tracing):
+    from core.batch_engine import default_rate_maps
+    from core.excel_option_engine import OptionSizing
+    from dashboard.services.option_service import run_option
+
+    sizing = OptionSizing(load_mw=5, solar_mode="SAT", solar_mw=8, wind_mw=4)
+    traced_df = run_option(model_df, sizing, default_rate_maps())
+
+    spans = {sp["name"]: sp for sp in tracing.recent_spans()}
+    assert "counts_error" not in spans["service.run_option"]
+    assert spans["service.run_option"]["rows"] == len(traced_df) == 5
+
+    tracing.configure(enabled=False)
+    assert traced_df.equals(run_option(model_df, sizing, default_rate_maps()))
+
+
+def test_preview_is_total_level_only(model_df):
+    from core.batch_engine import compile_model, default_rate_maps
+    from core.excel_option_engine import OptionSizing
+    from core.response_surface import build_response_surface
+    from dashboard.services.option_service import preview_option, run_option, summarize_totals
+
+    sizing = OptionSizing(load_mw=4, solar_mode="SAT", solar_mw=6, wind_mw=2)
+    surface = build_response_surface(compile_model(model_df), "SAT", points=41)
+    preview = preview_option(surface, sizing, default_rate_maps())
+
+    assert preview["tod_slot"].tolist() == ["Total"]
+    exact = summarize_totals(run_option(model_df, sizing, default_rate_maps()))
+    approx = summarize_totals(preview)
+    assert approx["load_kwh"] == exact["load_kwh"]
+    assert abs(approx["re_percent"] - exact["re_percent"]) < 1.0
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.batch_engine import compile_model, default_rate_maps, evaluate_batch
+from core.excel_option_engine import OptionSizing
+from core.portfolio import ConsumerSpec, PlantSpec, _share_matrix, allocate, build_portfolio, evaluate_portfolio
+
+
+@pytest.fixture(scope="module")
+def compiled(model_df):
+    return compile_model(model_df)
+
+
+@pytest.fixture(scope="module")
+def shared(compiled):
+    consumers = [
+        ConsumerSpec("mill", compiled, load_mw=6, priority=2),
+        ConsumerSpec("office", compiled, load_mw=2, priority=1),
+        ConsumerSpec("depot", compiled, load_mw=3),
+    ]
+    plants = [
+        PlantSpec("sat", compiled, "solar", mw=5, loss=0.02, solar_mode="SAT"),
+        PlantSpec("ft", compiled, "solar", mw=2, solar_mode="FT"),
+        PlantSpec("wind", compiled, "wind", mw=3, loss=0.05),
+    ]
+    return build_portfolio(consumers, plants)
+
+
+def test_single_consumer_matches_evaluate_batch(compiled):
+    rates = default_rate_maps()
+    sizing = OptionSizing(load_mw=5, solar_mode="SAT", solar_mw=4, solar_loss=0.02, wind_mw=2, wind_loss=0.05)
+    portfolio = build_portfolio(
+        [ConsumerSpec("site", compiled, load_mw=5)],
+        [PlantSpec("solar", compiled, "solar", mw=4, loss=0.02, solar_mode="SAT"),
+         PlantSpec("wind", compiled, "wind", mw=2, loss=0.05)],
+    )
+    got = evaluate_portfolio(portfolio, rates=rates).consumer_table("site")
+    expected = evaluate_batch(compiled, [sizing], rates, carbon=False).annual_table(0)
+    pd.testing.assert_frame_equal(got, expected)
+
+
+@pytest.mark.parametrize("method", ["pro_rata", "priority", "fixed"])
+def test_allocation_conserves_each_plant(shared, method):
+    shares = np.array([[0.5, 0.2, 0.0], [0.25, 0.3, 0.6], [0.25, 0.5, 0.4]]) if method == "fixed" else None
+    alloc = allocate(shared, method, shares)
+    assert alloc.shape == (3, 3, 12, 4)
+    assert (alloc >= 0).all()
+    np.testing.assert_allclose(alloc.sum(axis=0), shared.generation, rtol=1e-12, atol=1e-6)
+
+
+def test_priority_serves_the_higher_priority_consumer_first(shared):
+    alloc = allocate(shared, "priority")
+    pool = shared.generation.sum(axis=0)
+    got = alloc.sum(axis=1)                                       # (C, 12, 4)
+    mill, office = shared.consumers.index("mill"), shared.consumers.index("office")
+
+    # the mill (priority 2) is served up to its load before the office sees anything
+    np.testing.assert_allclose(
+        np.minimum(got[mill], shared.load[mill]), np.minimum(pool, shared.load[mill]), atol=1e-6,
+    )
+    short = pool < shared.load[mill]
+    assert short.any()
+    np.testing.assert_allclose(got[office][short], 0.0, atol=1e-9)
+
+
+@pytest.mark.parametrize("shares", [
+    np.full((3, 3), 0.3),
+    {"sat": {"mill": 0.6, "office": 0.6}, "ft": {"mill": 1.0}, "wind": {"depot": 1.0}},
+    {"ft": {"mill": 1.0}, "wind": {"depot": 1.0}},                  # sat unassigned
+])
+def test_share_matrix_rejects_shares_not_summing_to_one(shared, shares):
+    with pytest.raises(ValueError, match="do not sum to 1"):
+        _share_matrix(shared, shares)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+
+from core import response_surface
+from core.batch_engine import compile_model
+from core.model_cache import ModelCache
+from core.response_surface import SurfaceBuilder
+
+
+@pytest.fixture()
+def builder():
+    b = SurfaceBuilder(ModelCache(max_bytes=64 * 1024 * 1024), retry_after_s=3600)
+    yield b
+    b.shutdown()
+
+
+def test_failed_build_is_held_back_then_retried(builder, model_df, monkeypatch):
+    compiled = compile_model(model_df)
+    real = response_surface.build_response_surface
+    calls = []
+
+    def flaky(compiled, solar_mode, **kw):
+        calls.append(solar_mode)
+        if len(calls) == 1:
+            raise OSError("disk hiccup")
+        return real(compiled, solar_mode, points=11)
+
+    monkeypatch.setattr(response_surface, "build_response_surface", flaky)
+
+    assert builder.get("k", compiled, "SAT") is None
+    assert builder.wait("k") is None
+    assert builder.error("k") == "OSError: disk hiccup"
+
+    # within the retry window the failure is remembered, not rebuilt on every rerun
+    assert builder.get("k", compiled, "SAT") is None
+    assert len(calls) == 1
+
+    builder.retry_after_s = 0.0
+    assert builder.get("k", compiled, "SAT") is None
+    assert builder.wait("k") is not None
+    assert builder.error("k") is None and len(calls) == 2
+
+
+def test_failures_are_bounded(builder, model_df, monkeypatch):
+    compiled = compile_model(model_df)
+
+    def broken(compiled, solar_mode, **kw):
+        raise ValueError("no solar ref")
+
+    monkeypatch.setattr(response_surface, "build_response_surface", broken)
+    for i in range(response_surface.FAILED_MAX + 5):
+        builder.get(i, compiled, "SAT")
+        builder.wait(i)
+    assert len(builder._failed) == response_surface.FAILED_MAX
+    assert builder.error(0) is None and builder.error(response_surface.FAILED_MAX + 4) is not None
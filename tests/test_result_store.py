@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.batch_engine import default_rate_maps
+from core.excel_option_engine import ExcelColMap, OptionSizing
+from core.result_store import ScenarioStore, scenario_key
+from dashboard.services.option_service import run_option
+
+SIZING = OptionSizing(load_mw=5, solar_mode="SAT", solar_mw=8, wind_mw=4)
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return ScenarioStore(tmp_path / "runs.sqlite")
+
+
+def test_round_trip_keeps_int_costs_and_nan_rates(store, model_df):
+    rates = default_rate_maps()
+    annual = run_option(model_df, SIZING, rates)
+    assert str(annual["total_cost_rs"].dtype) == "Int64"
+    assert annual["solar_rate"].isna().any()          # the Total row carries no rate
+
+    key = store.put("wb", SIZING, rates, annual)
+    got = store.get("wb", SIZING, rates)
+    pd.testing.assert_frame_equal(got, annual)
+    assert key == scenario_key("wb", SIZING, rates)
+    assert len(store) == 1
+
+    row = store.query(workbook_fp="wb").iloc[0]
+    assert row["re_percent"] == annual.loc[annual["tod_slot"] == "Total", "re_percent"].iloc[0]
+
+
+def test_round_trip_with_missing_costs(store):
+    annual = pd.DataFrame({
+        "tod_slot": ["A", "Total"],
+        "load_kwh": [10.0, 10.0],
+        "grid_rate": [7.5, np.nan],
+        "grid_cost_rs": pd.array([75, pd.NA], dtype="Int64"),
+    })
+    store.put("wb", SIZING, None, annual)
+    pd.testing.assert_frame_equal(store.get("wb", SIZING, None), annual)
+
+
+@pytest.mark.parametrize("change", [
+    {"sizing": replace(SIZING, wind_mw=4.5)},
+    {"sizing": replace(SIZING, solar_mode="FT")},
+    {"rates": {"grid_rate_map": {"A": 7.0, "B": 8.0, "C": 9.0, "D": 10.0}}},
+    {"colmap": ExcelColMap(load_1mw="load_requirement_1mw")},
+    {"workbook_fp": "other"},
+    {"engine_version": "0"},
+])
+def test_any_input_change_misses(store, change):
+    annual = pd.DataFrame({"tod_slot": ["Total"], "re_percent": [50.0]})
+    base = {"workbook_fp": "wb", "sizing": SIZING, "rates": None}
+    store.put(**base, annual_df=annual)
+    assert store.get(**base) is not None
+
+    args = {**base, **change}
+    assert scenario_key(**args) != scenario_key(**base)
+    assert store.get(**args) is None
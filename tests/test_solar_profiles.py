@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.excel_option_engine import ExcelColMap
+from core.solar_profiles import SolarLosses, SolarSite, build_solar_references, clear_solar_cache, solar_references_typical_day
+
+COLMAP = ExcelColMap()
+NO_LOSSES = SolarLosses(temp_coeff=0.0, soiling=0.0)
+PUNE = SolarSite(latitude=18.5, longitude=73.9, tz_hours=5.5)
+
+
+def _weather(start: str, hours: int, dni: float, dhi: float) -> pd.DataFrame:
+    """Clear-sky-like weather: constant beam (zeroed below the horizon by the model), diffuse in daylight."""
+    idx = pd.date_range(start, periods=hours, freq="h")
+    day = ((idx.hour >= 6) & (idx.hour < 18)).astype(float)
+    return pd.DataFrame({"ghi": (dni * 0.6 + dhi) * day, "dni": dni, "dhi": dhi * day, "temp_air": 25.0}, index=idx)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_solar_cache()
+    yield
+    clear_solar_cache()
+
+
+def test_clear_sky_day_integral():
+    # equinox, panel tilted at the latitude facing the equator, beam only: cos(aoi) = cos(hour angle),
+    # so one day is DNI x the integral of cos over daylight = 1000 W/m2 x 24/pi h
+    site = SolarSite(latitude=18.5, longitude=82.5, tz_hours=5.5, albedo=0.0)
+    refs = build_solar_references(_weather("2023-03-20", 24, dni=1000.0, dhi=0.0), site, NO_LOSSES)
+
+    assert refs[COLMAP.solar_ft_1mwp].sum() == pytest.approx(1000.0 * 24 / np.pi, rel=0.03)
+    # no generation without the sun
+    assert (refs.loc[(refs.index.hour < 5) | (refs.index.hour > 19)].to_numpy() == 0).all()
+
+
+def test_tracker_beats_fixed_beats_east_west():
+    refs = build_solar_references(_weather("2023-01-01", 8760, dni=850.0, dhi=120.0), PUNE)
+    annual = refs.sum()
+    ft, sat, ew = annual[COLMAP.solar_ft_1mwp], annual[COLMAP.solar_sat_1mwp], annual[COLMAP.solar_ew_1mwp]
+    assert sat > ft > ew > 0
+
+    # every hour, a tracker facing the sun sees at least as much beam as the fixed panel
+    day = refs.loc["2023-06-21"]
+    assert (day[COLMAP.solar_sat_1mwp] >= day[COLMAP.solar_ft_1mwp] - 1e-9).all()
+
+
+def test_typical_day_is_monthly_hour_mean():
+    weather = _weather("2023-01-01", 8760, dni=850.0, dhi=120.0)
+    refs = build_solar_references(weather, PUNE)
+    typical = solar_references_typical_day(weather, PUNE)
+
+    assert len(typical) == 12 * 24
+    jan_noon = refs.loc[(refs.index.month == 1) & (refs.index.hour == 12), COLMAP.solar_sat_1mwp].mean()
+    got = typical.loc[(typical["month"] == "Jan") & (typical["hour"] == 12), COLMAP.solar_sat_1mwp].iloc[0]
+    assert got == pytest.approx(jan_noon)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import typical_day
+from core.typical_day import clear_typical_day_cache, reduce_to_typical_day
+
+
+def _expected(idx: pd.DatetimeIndex, values: np.ndarray) -> np.ndarray:
+    means = pd.Series(values, index=idx).groupby([idx.month, idx.hour]).mean()
+    return means.to_numpy().reshape(12, 24)
+
+
+@pytest.mark.parametrize("start, freq, n", [
+    ("2023-01-01", "h", 8760),          # hourly, non-leap
+    ("2024-01-01", "h", 8784),          # hourly, leap year
+    ("2023-01-01", "15min", 8760 * 4),  # 15-minute
+])
+def test_reduce_gives_month_hour_means(start, freq, n):
+    idx = pd.date_range(start, periods=n, freq=freq)
+    rng = np.random.default_rng(7)
+    values = 100 * np.sin(np.pi * idx.hour / 24) + 10 * idx.month + rng.normal(0, 5, n)
+
+    out = reduce_to_typical_day(values)
+    assert out.shape == (12, 24)
+    np.testing.assert_allclose(out, _expected(idx, values), rtol=1e-12)
+
+
+def test_nan_gaps_are_excluded():
+    idx = pd.date_range("2023-01-01", periods=8760, freq="h")
+    values = np.arange(8760, dtype=float)
+    values[::7] = np.nan
+    expected = pd.Series(values, index=idx).groupby([idx.month, idx.hour]).mean().to_numpy().reshape(12, 24)
+    np.testing.assert_allclose(reduce_to_typical_day(values), expected)
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(typical_day, "TYPICAL_CACHE_SIZE", 3)
+    clear_typical_day_cache()
+    series = [np.full(8760, float(i)) for i in range(5)]
+    for s in series:
+        reduce_to_typical_day(s)
+    assert len(typical_day._TYPICAL_CACHE) == 3
+
+    # a hit refreshes the entry, so the oldest untouched one goes next
+    reduce_to_typical_day(series[2])
+    reduce_to_typical_day(np.full(8760, 9.0))
+    assert [v[0, 0] for v in typical_day._TYPICAL_CACHE.values()] == [4.0, 2.0, 9.0]
+    clear_typical_day_cache()
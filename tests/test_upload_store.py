@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from core.fingerprint import bytes_fingerprint
+from dashboard.services import upload_store
+from dashboard.services.upload_store import UploadStore
+
+
+def _age(path, seconds_ago: float) -> None:
+    t = path.stat().st_mtime - seconds_ago
+    os.utime(path, (t, t))
+
+
+def test_same_bytes_are_stored_once(tmp_path):
+    store = UploadStore(tmp_path, quota_bytes=10_000)
+    fp1, p1 = store.put(b"workbook-a", ".xlsx")
+    fp2, p2 = store.put(memoryview(b"workbook-a"), ".XLSX")
+    fp3, _ = store.put(b"workbook-b", ".xlsx")
+
+    assert (fp1, p1) == (fp2, p2)
+    assert fp1 == bytes_fingerprint(b"workbook-a") != fp3
+    assert store.stats().files == 2
+    with pytest.raises(ValueError):
+        store.put(b"x", ".csv")
+
+
+def test_refcounts_per_holder(tmp_path):
+    store = UploadStore(tmp_path, quota_bytes=10_000)
+    fp, _ = store.put(b"shared", ".xlsx")
+
+    store.acquire(fp, "session-1")
+    store.acquire(fp, "session-1")          # re-acquiring just refreshes the lease
+    store.acquire(fp, "session-2")
+    assert store.refcount(fp) == 2
+
+    store.release(fp, "session-1")
+    assert store.refcount(fp) == 1
+    store.release(fp, "session-2")
+    store.release(fp, "session-2")          # double release is harmless
+    assert store.refcount(fp) == 0
+
+
+def test_leases_lapse(tmp_path, monkeypatch):
+    store = UploadStore(tmp_path, quota_bytes=10_000, lease_seconds=60)
+    fp, _ = store.put(b"abandoned", ".xlsx")
+    store.acquire(fp, "gone")
+
+    now = upload_store.time.time()
+    monkeypatch.setattr(upload_store.time, "time", lambda: now + 61)
+    assert store.refcount(fp) == 0
+
+
+def test_eviction_over_quota_skips_referenced_and_new_files(tmp_path):
+    store = UploadStore(tmp_path, quota_bytes=250)
+    old_fp, old = store.put(b"o" * 100, ".xlsx")
+    held_fp, held = store.put(b"h" * 100, ".xlsx")
+    _age(old, 20)
+    _age(held, 30)                          # oldest, but a session still uses it
+    store.acquire(held_fp, "session")
+
+    new_fp, new = store.put(b"n" * 100, ".xls")
+
+    assert not old.exists()
+    assert held.exists() and new.exists()
+    assert store.stats().bytes_used == 200
+
+    # once released, the least recently used file goes first
+    store.release(held_fp, "session")
+    store.put(b"m" * 100, ".xlsx")
+    assert not held.exists() and new.exists()
+
+
+def test_stale_temp_files_are_cleared(tmp_path):
+    (tmp_path / "abc.xlsx.1234.tmp").write_bytes(b"half")
+    UploadStore(tmp_path, quota_bytes=10)
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from benchmarks.workbooks import EXCEL_MAX_ROWS, SCAN_ROWS, SIZES, WorkbookSpec, expected_model_df, size_for_target, write_workbook
+from core.loader import load_model_df
+
+# the xl workbook takes a couple of minutes to write; opt in with HYBRID_RE_SLOW_TESTS=1
+SLOW = os.environ.get("HYBRID_RE_SLOW_TESTS") == "1"
+
+
+def test_twelve_blocks_fit_the_scan_window(tmp_path):
+    spec = WorkbookSpec("twelve", blocks=12, helper_cols=4)
+    assert spec.header_rows()[-1] < SCAN_ROWS
+    got = load_model_df(write_workbook(tmp_path / "twelve.xlsx", spec))
+    expected = expected_model_df(spec)
+    assert list(got.columns) == list(expected.columns)
+    np.testing.assert_allclose(got[spec.names].to_numpy(), expected[spec.names].to_numpy())
+
+
+def test_too_many_blocks_are_rejected():
+    with pytest.raises(ValueError, match="at most 12 blocks"):
+        WorkbookSpec(blocks=13).validate()
+
+
+def test_size_for_target_lands_near_the_target(tmp_path):
+    # same shape as xl, scaled down so the check runs in seconds
+    spec = replace(SIZES["xl"], target_mb=4)
+    size = write_workbook(tmp_path / "sized.xlsx", spec).stat().st_size / 2**20
+    assert size == pytest.approx(4, rel=0.15)
+
+    xl = size_for_target(SIZES["xl"])
+    assert xl.blocks * xl.block_rows + xl.tail_rows <= EXCEL_MAX_ROWS
+
+
+@pytest.mark.skipif(not SLOW, reason="writes a ~100 MB workbook (set HYBRID_RE_SLOW_TESTS=1)")
+def test_xl_workbook_reaches_100_mb(tmp_path):
+    size = write_workbook(tmp_path / "xl.xlsx", SIZES["xl"]).stat().st_size / 2**20
+    assert size == pytest.approx(100, rel=0.1)